@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Set, List
 from .observer import Observer
+from api.log import get_logger
+
+_log = get_logger(__name__)
 
 
 class Observable(ABC):
@@ -45,9 +48,9 @@ class Observable(ABC):
         for observer in self._observers.copy():  # Use copy to avoid modification during iteration
             try:
                 observer.update(self, *args, **kwargs)
-            except Exception as e:
+            except Exception:
                 # Log the exception but continue notifying other observers
-                print(f"Error notifying observer {observer.get_id()}: {e}")
+                _log.exception("Error notifying observer %r", observer)
 
     def get_observers(self) -> List[Observer]:
         """
@@ -0,0 +1,161 @@
+"""
+Logging for the api and core packages, on top of the standard logging module.
+
+Loggers are named after their module (get_logger(__name__)), so levels can be set per
+module or package, e.g. with the SOK_LOG environment variable read by configure():
+SOK_LOG="warning,api.model.graph=debug,core.model=info".
+
+Nothing is logged below WARNING unless configured. A message below its logger's level
+costs one cached level check: arguments are only formatted when a record is emitted,
+expensive ones can be deferred with lazy(), and hot-path events can be sampled with
+sampled().
+"""
+import itertools
+import logging
+import logging.config
+import os
+from typing import Any, Callable, Dict, Optional
+
+# Environment variables: levels per logger (read by configure), and 1 in how many
+# sampled events are logged
+LEVELS_VAR = "SOK_LOG"
+SAMPLE_VAR = "SOK_LOG_SAMPLE"
+
+# Loggers the packages log under
+PACKAGES = ("api", "core")
+
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Default rate of samplers created without one
+_sample_every = max(int(os.environ.get(SAMPLE_VAR, 100)), 1)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get the logger of a module: get_logger(__name__)."""
+    return logging.getLogger(name)
+
+
+class lazy(object):
+    """
+    Argument computed only when the message is formatted:
+    log.debug("Nodes: %s", lazy(lambda: [n.id for n in graph.nodes])).
+    """
+
+    __slots__ = ("_func",)
+
+    def __init__(self, func: Callable[[], Any]):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+    def __repr__(self) -> str:
+        return repr(self._func())
+
+
+class SampledLogger(object):
+    """
+    Logs one in `every` events of a hot path, e.g. one insert in a hundred, so enabling
+    debug output on a large graph doesn't flood the logs or slow it down.
+
+    Events below the logger's level are dropped before they are counted.
+    """
+
+    def __init__(self, logger: logging.Logger, every: Optional[int] = None):
+        """
+        :param logger: The logger sampled events go to
+        :param every: Log one event in this many; the configured default (SOK_LOG_SAMPLE) if None
+        """
+        self.logger = logger
+        self.every = every
+        self._counter = itertools.count()
+
+    def log(self, level: int, msg: str, *args: Any) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        every = self.every or _sample_every
+        # next() on a count is atomic in CPython, so threads don't need a lock
+        if next(self._counter) % every:
+            return
+        if every > 1:
+            msg += " (1 in %d sampled)"
+            args += (every,)
+        self.logger.log(level, msg, *args, stacklevel=3)
+
+    def debug(self, msg: str, *args: Any) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args: Any) -> None:
+        self.log(logging.INFO, msg, *args)
+
+
+def sampled(logger: logging.Logger, every: Optional[int] = None) -> SampledLogger:
+    """Get a sampler of a logger's hot-path events (see SampledLogger)."""
+    return SampledLogger(logger, every)
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """
+    Parse a level specification such as "warning,core=info,api.model.graph=debug".
+
+    A bare level applies to the api and core packages; name=level applies to a module or
+    package and everything below it.
+
+    :raises ValueError: If a level is not a logging level name
+    :return: Logger name -> level
+    """
+    levels: Dict[str, int] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, level = part.rpartition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unknown log level: {level}")
+        for logger in ([name.strip()] if name else PACKAGES):
+            levels[logger] = value
+    return levels
+
+
+def logging_config(spec: Optional[str] = None, fmt: str = DEFAULT_FORMAT) -> Dict[str, Any]:
+    """
+    Build a logging.config.dictConfig configuration logging the api and core packages to
+    stderr, e.g. for Django's LOGGING setting.
+
+    :param spec: Levels as parsed by parse_levels; the SOK_LOG environment variable if None
+    :param fmt: Format of the records
+    :return: The configuration
+    """
+    if spec is None:
+        spec = os.environ.get(LEVELS_VAR, "")
+    levels = {name: logging.WARNING for name in PACKAGES}
+    levels.update(parse_levels(spec))
+    loggers: Dict[str, Dict[str, Any]] = {}
+    for name, level in levels.items():
+        # Modules below a package inherit its handler
+        package = name in PACKAGES
+        loggers[name] = {"level": logging.getLevelName(level),
+                         "handlers": ["sok"] if package else [],
+                         "propagate": not package}
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {"sok": {"format": fmt}},
+        "handlers": {"sok": {"class": "logging.StreamHandler", "formatter": "sok"}},
+        "loggers": loggers,
+    }
+
+
+def configure(spec: Optional[str] = None, sample_every: Optional[int] = None, fmt: str = DEFAULT_FORMAT) -> None:
+    """
+    Log the api and core packages to stderr with the given levels.
+
+    :param spec: Levels as parsed by parse_levels; the SOK_LOG environment variable if None
+    :param sample_every: Default rate of sampled events; unchanged (SOK_LOG_SAMPLE or 100) if None
+    :param fmt: Format of the records
+    """
+    global _sample_every
+    if sample_every is not None:
+        _sample_every = max(sample_every, 1)
+    logging.config.dictConfig(logging_config(spec, fmt))
@@ -1,5 +1,6 @@
 from .node import Node
 from .edge import Edge
+from .graph_diff import GraphDiff, PropertyChange
 from .graph import Graph
 
-__all__ = ["Node", "Edge", "Graph"]
+__all__ = ["Node", "Edge", "Graph", "GraphDiff", "PropertyChange"]
@@ -0,0 +1,313 @@
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+# Types whose values can be placed between a minimum and a maximum to estimate ranges
+_NUMERIC = (int, float)
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(value: Any) -> int:
+    """64-bit hash of a value. Python hashes small ints to themselves, so mix the bits."""
+    x = (hash((type(value).__name__, value)) + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class HyperLogLog(object):
+    """
+    Distinct-count sketch of fixed size.
+
+    With the default precision (1024 one-byte registers) estimates are within about 3%.
+    Values can't be removed, so after deletions the estimate counts values that were
+    ever seen.
+    """
+
+    def __init__(self, precision: int = 10):
+        """
+        :param precision: Number of index bits; the sketch keeps 2 ** precision registers
+        """
+        self._p = precision
+        self._m = 1 << precision
+        self._registers = bytearray(self._m)
+
+    def add(self, value: Any) -> None:
+        """Add a hashable value to the sketch."""
+        x = _mix(value)
+        index = x >> (64 - self._p)
+        rest = (x << self._p) & _MASK64
+        rank = 64 - self._p + 1 if rest == 0 else 64 - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        m = self._m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class TopK(object):
+    """
+    Approximate most frequent values (Misra-Gries).
+
+    Keeps counters for at most `capacity` values. When a new value finds no free counter,
+    all counters are decremented instead, so counts are lower bounds; values held by more
+    than 1 / (capacity + 1) of the items are always kept. Updates take amortized O(1).
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._capacity = capacity
+        self._counts: Dict[Any, int] = {}
+
+    def add(self, value: Any) -> None:
+        counts = self._counts
+        if value in counts:
+            counts[value] += 1
+        elif len(counts) < self._capacity:
+            counts[value] = 1
+        else:
+            for key in list(counts):
+                if counts[key] > 1:
+                    counts[key] -= 1
+                else:
+                    del counts[key]
+
+    def remove(self, value: Any) -> None:
+        count = self._counts.get(value)
+        if count is not None:
+            if count > 1:
+                self._counts[value] = count - 1
+            else:
+                del self._counts[value]
+
+    def count(self, value: Any) -> Optional[int]:
+        """Estimated count of a value, or None if it isn't tracked."""
+        return self._counts.get(value)
+
+    def most_common(self, k: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """Tracked values with their counts, most frequent first."""
+        ranked = sorted(self._counts.items(), key=lambda item: -item[1])
+        return ranked if k is None else ranked[:k]
+
+
+class AttributeStats(object):
+    """Statistics of one attribute across the nodes (or edges) of a graph."""
+
+    def __init__(self):
+        # Value type -> number of items holding a value of that type
+        self.types: Dict[type, int] = {}
+        # Number of items where the attribute is None
+        self.nulls = 0
+        # Value type -> smallest and largest value seen; bounds may be wider than the
+        # current data after removals
+        self.minimum: Dict[type, Any] = {}
+        self.maximum: Dict[type, Any] = {}
+        self.distinct = HyperLogLog()
+        self.top = TopK()
+
+    @property
+    def count(self) -> int:
+        """Number of items holding a non-None value."""
+        return sum(self.types.values())
+
+    @property
+    def value_type(self) -> type:
+        """The type of the values, a Union if several types were observed."""
+        types = tuple(self.types)
+        return Union[types] if types else type(None)
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            self.nulls += 1
+            return
+        value_type = type(value)
+        self.types[value_type] = self.types.get(value_type, 0) + 1
+        try:
+            low = self.minimum.get(value_type)
+            if low is None or value < low:
+                self.minimum[value_type] = value
+            high = self.maximum.get(value_type)
+            if high is None or value > high:
+                self.maximum[value_type] = value
+        except TypeError:
+            # Values without an order (e.g. dicts)
+            pass
+        try:
+            self.distinct.add(value)
+            self.top.add((value_type, value))
+        except TypeError:
+            # Unhashable values are counted but not sketched
+            pass
+
+    def remove(self, value: Any) -> None:
+        if value is None:
+            self.nulls = max(self.nulls - 1, 0)
+            return
+        value_type = type(value)
+        remaining = self.types.get(value_type, 0) - 1
+        if remaining > 0:
+            self.types[value_type] = remaining
+        else:
+            self.types.pop(value_type, None)
+            self.minimum.pop(value_type, None)
+            self.maximum.pop(value_type, None)
+        try:
+            self.top.remove((value_type, value))
+        except TypeError:
+            pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the statistics as plain data, e.g. for an API response."""
+        return {
+            "types": {t.__name__: n for t, n in self.types.items()},
+            "nulls": self.nulls,
+            "min": {t.__name__: _plain(v) for t, v in self.minimum.items()},
+            "max": {t.__name__: _plain(v) for t, v in self.maximum.items()},
+            "distinct": self.distinct.count(),
+            "top": [[_plain(v), n] for (_, v), n in self.top.most_common(10)],
+        }
+
+
+def _plain(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+class AttributeCatalog(object):
+    """
+    Statistics of the attributes of a set of nodes or edges, updated incrementally as
+    items are added, changed and removed: observed types, null counts, min/max,
+    distinct-count sketches and most frequent values.
+
+    Queries never scan the items: filter validation, query planning and autocompletion
+    are answered from the statistics alone.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, AttributeStats] = {}
+        # Number of items observed
+        self.size = 0
+
+    def __contains__(self, attribute: str) -> bool:
+        stats = self._stats.get(attribute)
+        return stats is not None and bool(stats.types)
+
+    def attributes(self) -> List[str]:
+        """Names of the attributes some item holds a value for."""
+        return [name for name, stats in self._stats.items() if stats.types]
+
+    def stats(self, attribute: str) -> Optional[AttributeStats]:
+        """Statistics of an attribute, or None if it was never seen."""
+        return self._stats.get(attribute)
+
+    def types(self, attribute: str) -> Tuple[type, ...]:
+        """Types of the values of an attribute, empty if no item holds it."""
+        stats = self._stats.get(attribute)
+        return tuple(stats.types) if stats is not None else ()
+
+    def attribute_types(self) -> Dict[str, type]:
+        """Attribute name -> type of its values, a Union if several types were observed."""
+        return {name: stats.value_type for name, stats in self._stats.items() if stats.types}
+
+    def add(self, data: Mapping[str, Any]) -> None:
+        """Account for a new item with the given data."""
+        self.size += 1
+        for key, value in data.items():
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = AttributeStats()
+            stats.add(value)
+
+    def remove(self, data: Mapping[str, Any]) -> None:
+        """Account for the removal of an item with the given data."""
+        self.size = max(self.size - 1, 0)
+        for key, value in data.items():
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.remove(value)
+
+    def change(self, old: Mapping[str, Any], new: Mapping[str, Any]) -> None:
+        """
+        Account for changed properties of an item.
+
+        :param old: The previous values of the changed keys; keys the item didn't hold are absent
+        :param new: The new values; keys removed from the item are absent
+        """
+        for key, value in old.items():
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.remove(value)
+        for key, value in new.items():
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = AttributeStats()
+            stats.add(value)
+
+    def clear(self) -> None:
+        self._stats.clear()
+        self.size = 0
+
+    def selectivity(self, attribute: str, operator: str, value: Any) -> Optional[float]:
+        """
+        Estimate the fraction of items an `attribute operator value` comparison matches.
+
+        Only values of exactly the type of `value` can match, like in Filter.apply.
+        Equality uses the most frequent values or the distinct count; ranges interpolate
+        between the minimum and maximum of numbers.
+
+        :return: The estimated fraction, or None if the statistics can't tell
+        """
+        if not self.size:
+            return None
+        stats = self._stats.get(attribute)
+        if stats is None or value is None:
+            return 0.0
+        typed = stats.types.get(type(value), 0)
+        if not typed:
+            return 0.0
+        share = typed / self.size
+        if operator in ("==", "!="):
+            try:
+                count = stats.top.count((type(value), value))
+            except TypeError:
+                return None
+            equal = count / typed if count is not None else 1.0 / max(stats.distinct.count(), 1)
+            equal = min(equal, 1.0)
+            return share * (equal if operator == "==" else 1.0 - equal)
+        low, high = stats.minimum.get(type(value)), stats.maximum.get(type(value))
+        if not isinstance(value, _NUMERIC) or isinstance(value, bool) or low is None or high is None:
+            return None
+        if high == low:
+            below = 0.0 if value < low else 1.0
+        else:
+            below = min(max((value - low) / (high - low), 0.0), 1.0)
+        return share * (below if operator in ("<", "<=") else 1.0 - below)
+
+    def suggest(self, attribute: str, prefix: str = "", limit: int = 10) -> List[Any]:
+        """
+        Suggest values of an attribute for autocompletion: its most frequent values
+        starting with `prefix`, most frequent first.
+        """
+        stats = self._stats.get(attribute)
+        if stats is None:
+            return []
+        prefix = prefix.lower()
+        values = [value for (_, value), _ in stats.top.most_common()
+                  if str(value).lower().startswith(prefix)]
+        return values[:limit]
+
+
+def merge_attribute_types(catalogs: Iterable[AttributeCatalog]) -> Dict[str, type]:
+    """Attribute name -> type over several catalogs, e.g. a graph's nodes and edges."""
+    types: Dict[str, set] = {}
+    for catalog in catalogs:
+        for name in catalog.attributes():
+            types.setdefault(name, set()).update(catalog.types(name))
+    return {name: Union[tuple(sorted(ts, key=lambda t: t.__name__))] for name, ts in types.items()}
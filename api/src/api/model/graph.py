@@ -1,6 +1,22 @@
-from typing import Optional, Set, Dict, Any, Union
+import sys
+from contextlib import contextmanager
+from typing import Optional, Set, Dict, Any, List, Tuple
 from api.model import Node, Edge
+from api.model.attribute_catalog import AttributeCatalog, merge_attribute_types
+from api.model.graph_diff import GraphDiff
+from api.model.sizing import deep_size
 from api.interface.observer import Observable
+from api.log import get_logger, sampled
+from api.tracing import traced
+
+_log = get_logger(__name__)
+# Node insertions are logged 1 in N: bulk loads insert millions
+_inserts = sampled(_log)
+
+def _previous(item: Node | Edge, keys) -> Dict[str, Any]:
+    """The current values of the given keys the item holds, before they change."""
+    return {key: item.data[key] for key in keys if key in item.data}
+
 
 class Graph(Observable):
     """A class representing a graph structure."""
@@ -21,14 +37,22 @@ class Graph(Observable):
         self._edges = edges if edges else set()
         self._nodes = nodes if nodes else set()
         self._directed = directed
-        self._attribute_types = {}
-
-        if nodes:
-            for node in nodes:
-                self.add_attribute_type(node)
-        if edges:
-            for edge in edges:
-                self.add_attribute_type(edge)
+        # Attribute statistics of the nodes and of the edges, built on first use (so
+        # filtered snapshots never pay for them), then updated by every mutation
+        self._catalogs: Optional[Tuple[AttributeCatalog, AttributeCatalog]] = None
+        # Nesting depth of batch() blocks and the notifications deferred by them
+        self._batch_depth = 0
+        self._pending_events: List[Dict[str, Any]] = []
+        # Undo records of the changes made inside transaction(), None outside of one
+        self._journal: Optional[List[tuple]] = None
+        # Incremented on every change, so results computed from the graph can be cached
+        self._version = 0
+        # Adjacency by node id: origin id -> target id -> edge, and the reverse.
+        # Built on first use, then kept up to date by the methods changing edges.
+        self._out: Optional[Dict[str, Dict[str, Edge]]] = None
+        self._in: Optional[Dict[str, Dict[str, Edge]]] = None
+        # Node id -> node, built on first use and kept up to date like the adjacency
+        self._by_id: Optional[Dict[str, Node]] = None
 
 
     @property
@@ -54,12 +78,111 @@ class Graph(Observable):
     @property
     def attribute_types(self) -> Dict[str, type]:
         """
-        Get the attribute types of the graph.
+        Get the attribute types of the graph's nodes and edges.
+
+        An attribute holding values of several types maps to a flat Union of them.
 
         :return: A dictionary mapping attribute names to their types.
         :rtype: Dict[str, type]
         """
-        return self._attribute_types
+        return merge_attribute_types(self._catalog_pair())
+
+    @property
+    def catalog(self) -> AttributeCatalog:
+        """
+        Get the statistics of the node attributes.
+
+        :return: The node attribute catalog
+        :rtype: AttributeCatalog
+        """
+        return self._catalog_pair()[0]
+
+    @property
+    def edge_catalog(self) -> AttributeCatalog:
+        """
+        Get the statistics of the edge attributes.
+
+        :return: The edge attribute catalog
+        :rtype: AttributeCatalog
+        """
+        return self._catalog_pair()[1]
+
+    def _catalog_pair(self) -> Tuple[AttributeCatalog, AttributeCatalog]:
+        if self._catalogs is None:
+            nodes, edges = AttributeCatalog(), AttributeCatalog()
+            for node in self._nodes:
+                nodes.add(node.data)
+            for edge in self._edges:
+                edges.add(edge.data)
+            self._catalogs = nodes, edges
+        return self._catalogs
+
+    def _track(self, item: Node | Edge, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """
+        Update the catalog for an item added (old is None), removed (new is None) or changed,
+        and record how to undo the change inside a transaction.
+        """
+        if self._journal is not None:
+            keys = None if old is None or new is None else [*old, *(k for k in new if k not in old)]
+            self._journal.append((item, None if old is None else dict(old), keys))
+        if self._catalogs is None:
+            return
+        catalog = self._catalogs[0 if isinstance(item, Node) else 1]
+        if old is None:
+            catalog.add(new)
+        elif new is None:
+            catalog.remove(old)
+        else:
+            catalog.change(old, new)
+
+    @property
+    def version(self) -> int:
+        """
+        Get the version of the graph, incremented on every change.
+
+        :return: The current version
+        :rtype: int
+        """
+        return self._version
+
+    def memory_usage(self, seen: Optional[Set[int]] = None) -> Dict[str, int]:
+        """
+        Measure the memory held by the graph, object by object (not sampled, so it takes
+        time proportional to the graph). Callers must keep the graph from changing meanwhile.
+
+        Breakdown:
+        - graph: the graph object and its node and edge sets
+        - nodes, edges: the Node and Edge objects with their ids
+        - attributes: the data dicts of nodes and edges, with their values
+        - indexes: the adjacency and node id maps, if built
+        - catalog: the attribute statistics, if built
+
+        :param seen: Ids of objects already counted, e.g. those of a base graph when
+                     measuring a filtered snapshot that shares its nodes; updated with the
+                     objects counted here
+        :return: Bytes per part, with their "total"
+        :rtype: Dict[str, int]
+        """
+        seen = set() if seen is None else seen
+        usage = {"graph": 0, "nodes": 0, "edges": 0, "attributes": 0, "indexes": 0, "catalog": 0}
+        for container in (self, vars(self), self._nodes, self._edges):
+            if id(container) not in seen:
+                seen.add(id(container))
+                usage["graph"] += sys.getsizeof(container)
+        for part, items in (("nodes", self._nodes), ("edges", self._edges)):
+            for item in items:
+                if id(item) not in seen:
+                    attributes = vars(item)
+                    seen.update((id(item), id(attributes)))
+                    usage[part] += sys.getsizeof(item) + sys.getsizeof(attributes)
+                    # The id; edges reference nodes already counted
+                    usage[part] += sum(deep_size(value, seen) for value in attributes.values()
+                                       if value is not item.data)
+                usage["attributes"] += deep_size(item.data, seen)
+        usage["indexes"] = deep_size(self._out, seen) + deep_size(self._in, seen) + deep_size(self._by_id, seen)
+        usage["catalog"] = deep_size(self._catalogs, seen)
+        usage["total"] = sum(usage.values())
+        return usage
 
     def add_node(self, node: Node) -> None:
         """
@@ -71,33 +194,27 @@ class Graph(Observable):
 
         if not isinstance(node, Node):
             raise TypeError(f"Expected a Node instance, got {format(type(node).__name__)}")
-        
-        self.add_attribute_type(node)
-        print("Graph before:", [n.id for n in self._nodes])
-        self._nodes.add(node)
+
+        if node not in self._nodes:
+            self._nodes.add(node)
+            self._index(node)
+            self._track(node, None, node.data)
         self.notify(action="add_node", node=node)
-        print("Graph after:", [n.id for n in self._nodes])
+        _inserts.debug("Added node %s, graph has %d nodes", node.id, len(self._nodes))
 
     def add_attribute_type(self, x: Node | Edge) -> None:
         """
-        Add an AttributeType to the graph.
+        Account in the attribute catalog for a node or edge added to the graph's sets directly.
         """
         if not isinstance(x, (Node, Edge)):
             raise TypeError(f"Expected a Node or Edge instance, got {format(type(x).__name__)}")
+        self._track(x, None, x.data)
 
-        for key, value in x.data.items():
-            if key not in self._attribute_types:
-                self._attribute_types[key] = type(value)
-            else:
-                value_type = self._attribute_types[key]
-                value_type = Union[value_type, type(value)]
-                self._attribute_types[key] = value_type
-        
     def get_attribute_type(self, key: str) -> type:
         """
         Get the AttributeType for the given key.
         """
-        return self._attribute_types[key]
+        return self.attribute_types[key]
 
 
     def add_edge(self, edge: Edge) -> None:
@@ -113,39 +230,98 @@ class Graph(Observable):
         if edge in self._edges:
             return
 
-        if self._directed:
-            self._edges.add(edge)
-        else:
-            self._edges.add(Edge(edge.target, edge.origin))
-
-        self.add_attribute_type(edge)
+        stored = edge if self._directed else Edge(edge.target, edge.origin)
+        self._edges.add(stored)
+        self._link(stored)
+        self._track(stored, None, stored.data)
 
-        self._nodes.add(edge.origin)
-        self._nodes.add(edge.target)
+        for node in (edge.origin, edge.target):
+            if node not in self._nodes:
+                self._nodes.add(node)
+                self._index(node)
+                self._track(node, None, node.data)
         self.notify(action="add_edge", edge=edge)
 
     def get_node(self, node_id: str) -> Optional[Node]:
         """Return the node with the given ID, or None if it doesn't exist."""
-        for node in self._nodes:
-            if node.id == node_id:
-                return node
-        return None
+        return self._nodes_by_id().get(node_id)
 
     def get_edge(self, origin_id: str, target_id: str) -> Optional[Edge]:
         """Return the edge from origin_id to target_id, or None if it doesn't exist."""
-        for edge in self._edges:
-            if edge.origin.id == origin_id and edge.target.id == target_id:
-                return edge
-        return None
+        return self._adjacency()[0].get(origin_id, {}).get(target_id)
+
+    def out_edges(self, node_id: str) -> List[Edge]:
+        """Return the edges starting at the node with the given ID."""
+        return list(self._adjacency()[0].get(node_id, {}).values())
+
+    def in_edges(self, node_id: str) -> List[Edge]:
+        """Return the edges ending at the node with the given ID."""
+        return list(self._adjacency()[1].get(node_id, {}).values())
+
+    def induced_subgraph(self, nodes: Set[Node]) -> 'Graph':
+        """
+        Return a graph with the given nodes and the edges of this graph between them.
+
+        Only the edges leaving the given nodes are visited, so the cost depends on their
+        degree rather than on the number of edges in the graph.
+
+        :param nodes: Nodes of this graph to keep
+        :type nodes: Set[Node]
+        :return: A new graph sharing the node and edge objects of this one
+        :rtype: Graph
+        """
+        if len(nodes) == len(self._nodes):
+            edges = set(self._edges)
+        else:
+            out = self._adjacency()[0]
+            ids = {node.id for node in nodes}
+            edges = {edge
+                     for node_id in ids
+                     for target_id, edge in out.get(node_id, {}).items()
+                     if target_id in ids}
+        return Graph(edges=edges, nodes=set(nodes), directed=self._directed)
+
+    def _adjacency(self):
+        if self._out is None:
+            self._out, self._in = {}, {}
+            for edge in self._edges:
+                self._link(edge)
+        return self._out, self._in
+
+    def _nodes_by_id(self) -> Dict[str, Node]:
+        if self._by_id is None:
+            self._by_id = {node.id: node for node in self._nodes}
+        return self._by_id
+
+    def _index(self, node: Node) -> None:
+        if self._by_id is not None:
+            self._by_id[node.id] = node
+
+    def _unindex(self, node: Node) -> None:
+        if self._by_id is not None:
+            self._by_id.pop(node.id, None)
+
+    def _link(self, edge: Edge) -> None:
+        if self._out is not None:
+            self._out.setdefault(edge.origin.id, {})[edge.target.id] = edge
+            self._in.setdefault(edge.target.id, {})[edge.origin.id] = edge
+
+    def _unlink(self, edge: Edge) -> None:
+        if self._out is not None:
+            self._out.get(edge.origin.id, {}).pop(edge.target.id, None)
+            self._in.get(edge.target.id, {}).pop(edge.origin.id, None)
 
     def remove_node(self, node_id: str):
         """Remove a node by ID if it exists and has no connected edges; raise ValueError otherwise."""
         node = self.get_node(node_id)
         if not node:
             raise ValueError(f"Node {node_id} not found.")
-        if any(edge.origin == node or edge.target == node for edge in self._edges):
+        out, in_ = self._adjacency()
+        if out.get(node_id) or in_.get(node_id):
             raise ValueError(f"Cannot delete node {node_id}, it has connected edges.")
         self._nodes.remove(node)
+        self._unindex(node)
+        self._track(node, node.data, None)
         self.notify(action="remove_node", node=node)
 
     def remove_edge(self, origin_id: str, target_id: str):
@@ -154,6 +330,8 @@ class Graph(Observable):
         if not edge:
             raise ValueError(f"Edge from {origin_id} to {target_id} not found.")
         self._edges.remove(edge)
+        self._unlink(edge)
+        self._track(edge, edge.data, None)
         self.notify(action="remove_edge", edge=edge)
 
     def is_directed(self) -> bool:
@@ -165,6 +343,7 @@ class Graph(Observable):
         node = self.get_node(node_id)
         if not node:
             raise ValueError(f"Node {node_id} not found.")
+        self._track(node, _previous(node, properties), properties)
         node.update_properties(properties)
         self.notify(action="update_node", node=node, properties=properties)
 
@@ -173,15 +352,203 @@ class Graph(Observable):
         edge = self.get_edge(origin_id, target_id)
         if not edge:
             raise ValueError(f"Edge from {origin_id} to {target_id} not found.")
+        self._track(edge, _previous(edge, properties), properties)
         edge.update_properties(properties)
         self.notify(action="update_edge", edge=edge, properties=properties)
 
     def clear(self):
         """Remove all nodes and edges from the graph and notify observers."""
+        if self._journal is not None:
+            self._journal.append((None, (set(self._nodes), set(self._edges), self._catalogs), None))
         self._nodes.clear()
         self._edges.clear()
+        self._out = self._in = self._by_id = None
+        self._catalogs = None
         self.notify(action="clear_graph")
 
+    def notify(self, *args, **kwargs) -> None:
+        """
+        Notify observers of a change, or defer the notification while inside batch().
+
+        :param args: Additional positional arguments to pass to observers
+        :param kwargs: Additional keyword arguments to pass to observers
+        """
+        self._version += 1
+        if self._batch_depth:
+            self._pending_events.append(kwargs)
+            return
+        super().notify(*args, **kwargs)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group several mutations into a single notification.
+
+        Changes made inside the block are applied immediately, but observers are notified
+        only once, when the outermost block exits, with action="batch" and the list of
+        deferred change events. Changes are not rolled back if the block raises (see
+        transaction).
+
+        Example:
+            with graph.batch():
+                graph.add_node(a)
+                graph.add_edge(Edge(a, b))
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._end_batch()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Like batch(), but all or nothing: if the block raises, the changes made inside it
+        are undone and observers are not notified of them. The version still moves on, so
+        results cached during the block are dropped. Transactions may be nested.
+
+        Only changes made through the graph's methods are undone, not edits of node or
+        edge data made directly.
+        """
+        outermost = self._journal is None
+        if outermost:
+            self._journal = []
+        mark, events = len(self._journal), len(self._pending_events)
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._undo(mark)
+            del self._pending_events[events:]
+            self._version += 1
+            raise
+        finally:
+            if outermost:
+                self._journal = None
+            self._end_batch()
+
+    def _end_batch(self) -> None:
+        self._batch_depth -= 1
+        if not self._batch_depth and self._pending_events:
+            events, self._pending_events = self._pending_events, []
+            self.notify(action="batch", events=events)
+
+    def _undo(self, mark: int) -> None:
+        """Undo the changes journaled since the given position, latest first."""
+        journal, self._journal = self._journal, None
+        try:
+            for item, old, keys in reversed(journal[mark:]):
+                if item is None:
+                    nodes, edges, self._catalogs = old
+                    self._nodes.update(nodes)
+                    self._edges.update(edges)
+                    self._out = self._in = self._by_id = None
+                    continue
+                items = self._nodes if isinstance(item, Node) else self._edges
+                if old is None:
+                    # Added
+                    items.discard(item)
+                    if isinstance(item, Edge):
+                        self._unlink(item)
+                    else:
+                        self._unindex(item)
+                    self._track(item, item.data, None)
+                elif keys is None:
+                    # Removed
+                    items.add(item)
+                    if isinstance(item, Edge):
+                        self._link(item)
+                    else:
+                        self._index(item)
+                    self._track(item, None, item.data)
+                else:
+                    current = _previous(item, keys)
+                    for key in keys:
+                        if key in old:
+                            item.data[key] = old[key]
+                        else:
+                            item.data.pop(key, None)
+                    self._track(item, current, old)
+            del journal[mark:]
+        finally:
+            self._journal = journal
+
+    def apply_diff(self, diff: GraphDiff) -> None:
+        """
+        Apply a GraphDiff computed by a data source, as one batch of change events.
+
+        Edges touching removed nodes are removed too, including edges the data source
+        doesn't know about. Changes to nodes or edges the graph no longer has are skipped,
+        so a diff can be applied to a graph that was edited since it was loaded.
+
+        Nodes and edges are found through the graph's id and adjacency maps, so the cost
+        is proportional to the size of the diff (and the degree of removed nodes), not to
+        the size of the graph.
+
+        :param diff: The changes to apply
+        :type diff: GraphDiff
+        """
+        nodes = self._nodes_by_id()
+        out, in_ = self._adjacency()
+        removed_edge_keys = set(diff.removed_edges)
+
+        with self.batch():
+            doomed = [out[o][t] for o, t in removed_edge_keys if t in out.get(o, ())]
+            for node_id in diff.removed_nodes:
+                doomed.extend(e for e in (*out.get(node_id, {}).values(), *in_.get(node_id, {}).values())
+                              if (e.origin.id, e.target.id) not in removed_edge_keys)
+            for edge in doomed:
+                if edge in self._edges:
+                    self._edges.remove(edge)
+                    self._unlink(edge)
+                    self._track(edge, edge.data, None)
+                    self.notify(action="remove_edge", edge=edge)
+
+            for node_id in diff.removed_nodes:
+                node = nodes.get(node_id)
+                if node is not None:
+                    self._nodes.discard(node)
+                    self._unindex(node)
+                    self._track(node, node.data, None)
+                    self.notify(action="remove_node", node=node)
+
+            for node_id, data in diff.added_nodes.items():
+                node = nodes.get(node_id)
+                if node is None:
+                    self.add_node(Node(id=node_id, data=data))
+                else:
+                    self._track(node, _previous(node, data), data)
+                    node.update_properties(data)
+                    self.notify(action="update_node", node=node, properties=data)
+
+            for node_id, change in diff.changed_nodes.items():
+                node = nodes.get(node_id)
+                if node is None:
+                    continue
+                self._track(node, _previous(node, [*change.values, *change.removed]), change.values)
+                node.update_properties(change.values)
+                for key in change.removed:
+                    node.data.pop(key, None)
+                self.notify(action="update_node", node=node, properties=change.values,
+                            removed=list(change.removed))
+
+            for (origin_id, target_id), data in diff.added_edges.items():
+                origin, target = nodes.get(origin_id), nodes.get(target_id)
+                if origin is not None and target is not None:
+                    self.add_edge(Edge(origin, target, data=data))
+
+            for (origin_id, target_id), change in diff.changed_edges.items():
+                edge = out.get(origin_id, {}).get(target_id)
+                if edge is None:
+                    continue
+                self._track(edge, _previous(edge, [*change.values, *change.removed]), change.values)
+                edge.update_properties(change.values)
+                for k in change.removed:
+                    edge.data.pop(k, None)
+                self.notify(action="update_edge", edge=edge, properties=change.values,
+                            removed=list(change.removed))
+
+    @traced("graph.deep_copy")
     def deep_copy(self, copy_observers: bool = False) -> 'Graph':
         """
         Create a deep copy of this Graph instance.
@@ -220,6 +587,37 @@ class Graph(Observable):
         
         return new_graph
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the graph into plain dicts and lists, e.g. for snapshots.
+
+        Edges refer to nodes by ID. Data dicts are not copied.
+
+        :return: {"directed": bool, "nodes": [{"id", "data"}], "edges": [{"origin", "target", "data"}]}
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "directed": self._directed,
+            "nodes": [{"id": node.id, "data": node.data} for node in self._nodes],
+            "edges": [{"origin": edge.origin.id, "target": edge.target.id, "data": edge.data}
+                      for edge in self._edges],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Graph':
+        """
+        Rebuild a graph from the output of to_dict().
+
+        :param data: Dict produced by to_dict()
+        :type data: Dict[str, Any]
+        :return: A new Graph instance
+        :rtype: Graph
+        """
+        node_mapping = {n["id"]: Node(id=n["id"], data=n["data"]) for n in data["nodes"]}
+        edges = {Edge(node_mapping[e["origin"]], node_mapping[e["target"]], data=e["data"])
+                 for e in data["edges"]}
+        return cls(edges=edges, nodes=set(node_mapping.values()), directed=data.get("directed", True))
+
     def __deepcopy__(self, memo) -> 'Graph':
         """
         Magic method for Python's copy.deepcopy() function.
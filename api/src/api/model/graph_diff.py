@@ -0,0 +1,89 @@
+from typing import Any, Dict, Hashable, Mapping, NamedTuple, Tuple
+
+EdgeKey = Tuple[str, str]
+
+
+class PropertyChange(NamedTuple):
+    """Changed properties of a node or edge: the values to set and the keys to remove."""
+    values: Dict[str, Any]
+    removed: Tuple[str, ...] = ()
+
+
+def _changes(old: Mapping[Hashable, Dict[str, Any]], new: Mapping[Hashable, Dict[str, Any]]):
+    """Split two keyed record collections into added, removed and changed records."""
+    added = {key: data for key, data in new.items() if key not in old}
+    removed = [key for key in old if key not in new]
+    changed = {}
+    for key, data in new.items():
+        previous = old.get(key)
+        if previous is None or previous == data:
+            continue
+        changed[key] = PropertyChange(
+            {k: v for k, v in data.items() if k not in previous or previous[k] != v},
+            tuple(k for k in previous if k not in data),
+        )
+    return added, removed, changed
+
+
+class GraphDiff(object):
+    """
+    Changes between two versions of a dataset, keyed by node id and by edge endpoints.
+
+    Nodes and edges are described by their data only, so a diff computed from a data
+    source can be applied to any graph loaded from it (see Graph.apply_diff).
+    """
+
+    def __init__(self,
+                 added_nodes: Dict[str, Dict[str, Any]] | None = None,
+                 removed_nodes: list | None = None,
+                 changed_nodes: Dict[str, PropertyChange] | None = None,
+                 added_edges: Dict[EdgeKey, Dict[str, Any]] | None = None,
+                 removed_edges: list | None = None,
+                 changed_edges: Dict[EdgeKey, PropertyChange] | None = None):
+        """
+        :param added_nodes: Node id -> data of new nodes
+        :param removed_nodes: Ids of removed nodes
+        :param changed_nodes: Node id -> property changes
+        :param added_edges: (origin id, target id) -> data of new edges
+        :param removed_edges: (origin id, target id) of removed edges
+        :param changed_edges: (origin id, target id) -> property changes
+        """
+        self.added_nodes = added_nodes or {}
+        self.removed_nodes = removed_nodes or []
+        self.changed_nodes = changed_nodes or {}
+        self.added_edges = added_edges or {}
+        self.removed_edges = removed_edges or []
+        self.changed_edges = changed_edges or {}
+
+    @classmethod
+    def between(cls,
+                old_nodes: Mapping[str, Dict[str, Any]], new_nodes: Mapping[str, Dict[str, Any]],
+                old_edges: Mapping[EdgeKey, Dict[str, Any]], new_edges: Mapping[EdgeKey, Dict[str, Any]]) -> 'GraphDiff':
+        """
+        Compute the diff between two versions of a dataset.
+
+        Records are compared as dicts, so unchanged records cost one comparison each and
+        only changed ones are examined key by key.
+
+        :param old_nodes: Node id -> data in the old version
+        :param new_nodes: Node id -> data in the new version
+        :param old_edges: (origin id, target id) -> data in the old version
+        :param new_edges: (origin id, target id) -> data in the new version
+        :return: The diff turning the old version into the new one
+        :rtype: GraphDiff
+        """
+        added_nodes, removed_nodes, changed_nodes = _changes(old_nodes, new_nodes)
+        added_edges, removed_edges, changed_edges = _changes(old_edges, new_edges)
+        return cls(added_nodes, removed_nodes, changed_nodes, added_edges, removed_edges, changed_edges)
+
+    def __len__(self) -> int:
+        """Number of changed nodes and edges."""
+        return (len(self.added_nodes) + len(self.removed_nodes) + len(self.changed_nodes)
+                + len(self.added_edges) + len(self.removed_edges) + len(self.changed_edges))
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __repr__(self) -> str:
+        return (f"GraphDiff(nodes: +{len(self.added_nodes)} -{len(self.removed_nodes)} ~{len(self.changed_nodes)}, "
+                f"edges: +{len(self.added_edges)} -{len(self.removed_edges)} ~{len(self.changed_edges)})")
@@ -0,0 +1,51 @@
+import sys
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Any, Set
+
+# Objects that live as long as the interpreter, never counted
+_SHARED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+# Objects that reference nothing
+_ATOMS = (str, bytes, int, float, bool, complex)
+
+
+def _slots(cls: type):
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        yield from ((slots,) if isinstance(slots, str) else slots)
+
+
+def deep_size(obj: Any, seen: Set[int]) -> int:
+    """
+    Bytes held by an object and everything it references, following containers,
+    instance dicts and slots.
+
+    Objects whose id is in `seen` are skipped and the ones counted are added to it, so
+    sharing one set across calls counts shared objects (e.g. nodes of a graph and of its
+    filtered snapshots) once, in the first call reaching them.
+
+    :param obj: The object to measure
+    :param seen: Ids of the objects already counted
+    :return: The size in bytes
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if item is None or id(item) in seen or isinstance(item, _SHARED):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, _ATOMS):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            attributes = getattr(item, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in _slots(type(item)):
+                stack.append(getattr(item, slot, None))
+    return size
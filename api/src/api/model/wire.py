@@ -0,0 +1,198 @@
+"""
+Compact binary encoding of graphs for the browser, decoded there by static/graph-wire.js.
+
+Strings (attribute keys, node ids, string values) are stored once in a string table and
+referenced by index; edges are pairs of node indexes; attributes are stored in columns,
+one per attribute and value type, holding the values of the rows set in a bitmap. Every
+array starts on an 8-byte boundary, so the decoder reads them as typed arrays without
+copying.
+
+Layout, little-endian:
+
+    header    magic "SOKG", u8 version, u8 flags (1: directed), u16 reserved,
+              u32 strings, u32 nodes, u32 edges, u32 columns
+    strings   u32[strings + 1] byte offsets into the UTF-8 blob, then the blob
+    nodes     u32[nodes] string index of each node id
+    edges     u32[edges] origin node indexes, u32[edges] target node indexes
+    columns   per column: u32 key string index, u8 target (0: nodes, 1: edges),
+              u8 value type, u16 reserved, u32 count, u32 reserved, u8[rows / 8]
+              bitmap of the rows having a value, then the count values in row order:
+              f64, i32, u8 (bools) or u32 string indexes (strings and JSON)
+
+Ints beyond 32 bits are sent as doubles, dates as ISO strings, and values other than
+numbers, bools and strings as JSON.
+"""
+import json
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .edge import Edge
+from .graph import Graph
+from .node import Node
+
+MAGIC = b"SOKG"
+VERSION = 1
+CONTENT_TYPE = "application/vnd.sok.graph"
+
+# Value types of the columns
+FLOAT64 = 1
+INT32 = 2
+BOOL = 3
+STRING = 4
+JSON = 5
+
+# Targets of the columns
+NODES = 0
+EDGES = 1
+
+_HEADER = struct.Struct("<4sBBHIIII")
+_COLUMN = struct.Struct("<IBBHII")
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+_ARRAY_TYPES = {FLOAT64: "d", INT32: "i", BOOL: "B", STRING: "I", JSON: "I"}
+
+
+def _typed(code: str, values: Iterable) -> bytes:
+    """Little-endian bytes of an array of machine values"""
+    items = array(code, values)
+    if sys.byteorder == "big":
+        items.byteswap()
+    return items.tobytes()
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+class _Strings(object):
+    """String table, interning each string once"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        index = self.index.get(value)
+        if index is None:
+            index = self.index[value] = len(self.index)
+        return index
+
+    def encode(self) -> bytes:
+        blobs = [s.encode("utf-8") for s in self.index]
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        return _pad(_typed("I", offsets)) + _pad(b"".join(blobs))
+
+
+def _wire_value(value: Any) -> Tuple[int, Any]:
+    """The column type a value is stored in, and the value to store"""
+    kind = type(value)
+    if kind is bool:
+        return BOOL, value
+    if kind is int:
+        return (INT32 if _INT32_MIN <= value <= _INT32_MAX else FLOAT64), value
+    if kind is float:
+        return FLOAT64, value
+    if kind is str:
+        return STRING, value
+    if isinstance(value, date):
+        return STRING, value.isoformat()
+    return JSON, json.dumps(value, default=str)
+
+
+def _columns(items: List[Node | Edge], target: int, strings: _Strings) -> List[bytes]:
+    """Encoded attribute columns of nodes or edges"""
+    size = (len(items) + 7) // 8
+    # (key, type) -> (bitmap, values in row order)
+    columns: Dict[Tuple[str, int], Tuple[bytearray, list]] = {}
+    for row, item in enumerate(items):
+        for key, value in item.data.items():
+            kind, value = _wire_value(value)
+            column = columns.get((key, kind))
+            if column is None:
+                column = columns[(key, kind)] = (bytearray(size), [])
+            column[0][row >> 3] |= 1 << (row & 7)
+            column[1].append(strings(value) if kind in (STRING, JSON) else value)
+    return [_COLUMN.pack(strings(key), target, kind, 0, len(values), 0) + _pad(bytes(bitmap))
+            + _pad(_typed(_ARRAY_TYPES[kind], values))
+            for (key, kind), (bitmap, values) in columns.items()]
+
+
+def encode(graph: Graph, edge_data: bool = True) -> bytes:
+    """
+    Encode a graph in the compact binary format.
+
+    Callers sharing the graph's nodes with writers should hold its read lock.
+
+    :param graph: The graph to encode
+    :param edge_data: Whether to send the attributes of the edges, or only their endpoints
+    :return: The encoded graph
+    """
+    strings = _Strings()
+    nodes = list(graph.nodes)
+    edges = list(graph.edges)
+    rows = {node: row for row, node in enumerate(nodes)}
+    node_ids = _typed("I", (strings(str(node.id)) for node in nodes))
+    origins = _typed("I", (rows[edge.origin] for edge in edges))
+    targets = _typed("I", (rows[edge.target] for edge in edges))
+    columns = _columns(nodes, NODES, strings) + (_columns(edges, EDGES, strings) if edge_data else [])
+    header = _HEADER.pack(MAGIC, VERSION, 1 if graph.is_directed() else 0, 0,
+                          len(strings.index), len(nodes), len(edges), len(columns))
+    return b"".join([header, strings.encode(), _pad(node_ids), _pad(origins), _pad(targets), *columns])
+
+
+def decode(data: bytes) -> Dict[str, Any]:
+    """
+    Decode a graph encoded by encode(), e.g. to check an encoding. Values come back as
+    sent: dates as ISO strings.
+
+    :param data: The encoded graph
+    :raises ValueError: If the data is not a graph in a known version of the format
+    :return: {"directed": bool, "nodes": [{"id", "data"}], "edges": [{"from", "to", "data"}]}
+    """
+    view = memoryview(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("Not an encoded graph")
+    magic, version, flags, _, string_count, node_count, edge_count, column_count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an encoded graph, or an unsupported version")
+    position = _HEADER.size
+
+    def take(code: str, count: int) -> array:
+        nonlocal position
+        items = array(code)
+        size = items.itemsize * count
+        items.frombytes(view[position:position + size])
+        if sys.byteorder == "big":
+            items.byteswap()
+        position += size + (-size % 8)
+        return items
+
+    offsets = take("I", string_count + 1)
+    blob = bytes(view[position:position + offsets[-1]])
+    position += offsets[-1] + (-offsets[-1] % 8)
+    strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(string_count)]
+
+    nodes = [{"id": strings[i], "data": {}} for i in take("I", node_count)]
+    origins, targets = take("I", edge_count), take("I", edge_count)
+    edges = [{"from": nodes[o]["id"], "to": nodes[t]["id"], "data": {}} for o, t in zip(origins, targets)]
+
+    for _ in range(column_count):
+        key, target, kind, _, count, _ = _COLUMN.unpack_from(data, position)
+        position += _COLUMN.size
+        items = nodes if target == NODES else edges
+        bitmap = take("B", (len(items) + 7) // 8)
+        values = iter(take(_ARRAY_TYPES[kind], count))
+        for row, item in enumerate(items):
+            if bitmap[row >> 3] & (1 << (row & 7)):
+                value = next(values)
+                if kind == BOOL:
+                    value = bool(value)
+                elif kind == STRING:
+                    value = strings[value]
+                elif kind == JSON:
+                    value = json.loads(strings[value])
+                item["data"][strings[key]] = value
+    return {"directed": bool(flags & 1), "nodes": nodes, "edges": edges}
@@ -1,5 +1,6 @@
 from .plugin import Plugin
-from .data_source_plugin import DataSourcePlugin
-from .visualizer import Visualizer
+from .data_source_plugin import DataSourcePlugin, ProgressCallback, reporting_progress
+from .visualizer import GRAPH_DATA_ELEMENT, Visualizer, graph_data_script
 
-__all__ = ["Plugin", "DataSourcePlugin", "Visualizer"]
\ No newline at end of file
+__all__ = ["Plugin", "DataSourcePlugin", "ProgressCallback", "reporting_progress", "Visualizer",
+           "GRAPH_DATA_ELEMENT", "graph_data_script"]
\ No newline at end of file
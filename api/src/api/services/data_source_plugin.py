@@ -1,19 +1,91 @@
 from api.services import Plugin
-from api.model import Graph
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from api.model import Graph, GraphDiff
+from api.tracing import trace_method
 
 from abc import abstractmethod
 
+# Receives the fraction of a load done (0 to 1) and a description of the current step
+ProgressCallback = Callable[[float, Optional[str]], None]
+
+# Callback of the load running in the current context (thread or task)
+_progress: ContextVar[Optional[ProgressCallback]] = ContextVar("data_source_progress", default=None)
+
+
+@contextmanager
+def reporting_progress(callback: ProgressCallback) -> Iterator[None]:
+    """
+    Send the progress reported by data source plugins in this context to a callback:
+
+        with reporting_progress(lambda done, step: print(done, step)):
+            plugin.load_data()
+
+    Plugins are shared by all workspaces, so the callback is bound to the context rather
+    than to the plugin; loads running in other threads report to their own callbacks.
+    """
+    token = _progress.set(callback)
+    try:
+        yield
+    finally:
+        _progress.reset(token)
+
 
 class DataSourcePlugin(Plugin):
     """
     Abstract base class for data source plugins.
     """
 
+    def __init_subclass__(cls, **kwargs):
+        """Time the load_data and reload_data of each plugin (see api.tracing)."""
+        super().__init_subclass__(**kwargs)
+        trace_method(cls, "load_data", "data_source.load_data")
+        trace_method(cls, "reload_data", "data_source.reload_data")
+
     @abstractmethod
     def load_data(self, **kwargs) -> Graph:
         """
         Load data from the data source.
 
         This method should be implemented by subclasses to load data from the specific data source.
+        Long loads should tell how far they are with report_progress.
         """
         pass
+
+    def report_progress(self, done: float, step: Optional[str] = None) -> None:
+        """
+        Report the progress of the running load_data to whoever started it (see
+        reporting_progress). Does nothing when no one listens.
+
+        :param done: Fraction of the load done, from 0 to 1
+        :param step: Description of the current step, e.g. "Parsing file"
+        """
+        callback = _progress.get()
+        if callback is not None:
+            callback(min(max(done, 0.0), 1.0), step)
+
+    def source_files(self) -> List[str]:
+        """
+        Files the loaded data comes from, watched for changes by the application.
+
+        Optional: plugins that can't reload incrementally return an empty list (the default).
+
+        :return: Paths of the source files
+        :rtype: List[str]
+        """
+        return []
+
+    def reload_data(self) -> Optional[GraphDiff]:
+        """
+        Re-read the source files and return what changed since the last load or reload.
+
+        Optional: the default returns None, meaning the plugin can't compute diffs.
+        Graphs already handed out by load_data are not modified; the caller applies the
+        diff to them with Graph.apply_diff.
+
+        :return: The changes, or None if incremental reload is not supported
+        :rtype: Optional[GraphDiff]
+        """
+        return None
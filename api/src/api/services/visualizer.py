@@ -1,12 +1,61 @@
+import json
+from typing import Optional
+
 from api.model import Graph
 from api.services import Plugin
+from api.tracing import trace_method
 from abc import ABC, abstractmethod
 
+# Id of the element holding the graph in the output of display_graph (see graph_data_script)
+GRAPH_DATA_ELEMENT = "sok-graph-data"
+
+
+def graph_data_script(graph: Graph) -> str:
+    """
+    The graph as a JSON data block, {"directed", "nodes": [{"id", "data"}], "edges": [{"from", "to"}]},
+    read by shells when the page defines no loadGraph() (see Visualizer.shell).
+
+    :param graph: The graph to embed
+    :return: A <script type="application/json"> element
+    """
+    data = json.dumps({
+        "directed": graph.is_directed(),
+        "nodes": [{"id": str(n.id), "data": n.data} for n in graph.nodes],
+        "edges": [{"from": str(e.origin.id), "to": str(e.target.id)} for e in graph.edges],
+    }, default=str, separators=(",", ":"))
+    # "</script>" in a value must not close the element
+    data = data.replace("<", "\\u003c")
+    return f'<script type="application/json" id="{GRAPH_DATA_ELEMENT}">{data}</script>'
+
+
 class Visualizer(Plugin,ABC):
 
+    def __init_subclass__(cls, **kwargs):
+        """Time the display_graph of each visualizer (see api.tracing)."""
+        super().__init_subclass__(**kwargs)
+        trace_method(cls, "display_graph", "visualizer.display_graph")
+
     @abstractmethod
     def identifier(self) -> str:
         pass
     @abstractmethod
     def display_graph(self,graph: Graph) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    def shell(self) -> Optional[str]:
+        """
+        The visualizer's HTML without the graph: markup, styles and a script drawing the
+        graph it gets from the data block of graph_data_script if the page has one, else
+        from loadGraph(), a function of the page returning a promise of
+        {directed, nodes: [{id, data}], edges: [{from, to}]}.
+
+        The shell doesn't change with the graph, so it is rendered once and can be cached
+        by the browser; display_graph can then be the shell after graph_data_script.
+
+        Optional: the default returns None, meaning the visualizer only renders through
+        display_graph.
+
+        :return: The shell, or None if the visualizer has none
+        :rtype: Optional[str]
+        """
+        return None
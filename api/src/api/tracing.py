@@ -0,0 +1,249 @@
+"""
+Lightweight latency tracing.
+
+Spans time a block of code (``with span("name"):``) or a function (``@traced("name")``)
+and add the duration to a histogram of the span name. Histograms are exported in the
+Prometheus text format by Registry.render.
+
+Tracing is disabled by default: span() then returns a shared no-op context manager and
+traced functions call straight through, so instrumented code pays one global lookup.
+"""
+import bisect
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets in seconds (the Prometheus client defaults)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric family of the span durations
+SPAN_METRIC = "span_duration_seconds"
+
+_enabled = False
+
+# Spans finished in the current trace (e.g. one request), or None outside of traces
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("sok_trace", default=None)
+
+
+def enable() -> None:
+    """Start recording spans."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording spans; instrumented code runs as if it wasn't."""
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+class Histogram(object):
+    """Counts of observed durations per bucket, with their sum."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # Non-cumulative counts; the last one is for values above every bucket
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """
+        :return: The cumulative count of each bucket (the last one for +Inf), the sum and the count
+        """
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Registry(object):
+    """Histograms keyed by metric name and labels."""
+
+    def __init__(self, prefix: str = "sok"):
+        """
+        :param prefix: Prefix of the exported metric names
+        """
+        self.prefix = prefix
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+        self._help: Dict[str, str] = {SPAN_METRIC: "Duration of traced operations."}
+        self._lock = threading.Lock()
+
+    def describe(self, metric: str, help_text: str) -> None:
+        """Set the HELP line of a metric."""
+        self._help[metric] = help_text
+
+    def histogram(self, metric: str, **labels: Any) -> Histogram:
+        """Get the histogram of a metric and label values, creating it on first use."""
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        family = self._histograms.get(metric)
+        histogram = family.get(key) if family is not None else None
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(metric, {}).setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, metric: str, value: float, **labels: Any) -> None:
+        self.histogram(metric, **labels).observe(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Export all histograms in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            families = {metric: dict(family) for metric, family in self._histograms.items()}
+        lines = []
+        for metric in sorted(families):
+            name = f"{self.prefix}_{metric}" if self.prefix else metric
+            if metric in self._help:
+                lines.append(f"# HELP {name} {self._help[metric]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key in sorted(families[metric]):
+                histogram = families[metric][key]
+                cumulative, total, count = histogram.snapshot()
+                for bound, value in zip(histogram.buckets, cumulative):
+                    lines.append("%s_bucket%s %d" % (name, _labels(key, 'le="%s"' % bound), value))
+                lines.append("%s_bucket%s %d" % (name, _labels(key, 'le="+Inf"'), count))
+                lines.append(f"{name}_sum{_labels(key)} {total}")
+                lines.append(f"{name}_count{_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# Where spans are recorded
+registry = Registry()
+
+
+class Span(object):
+    """Times the block it is entered for and records the duration when it exits."""
+
+    __slots__ = ("name", "labels", "start", "duration")
+
+    def __init__(self, name: str, labels: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.labels = labels or {}
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.duration = time.perf_counter() - self.start
+        registry.observe(SPAN_METRIC, self.duration, span=self.name, **self.labels)
+        spans = _trace.get()
+        if spans is not None:
+            spans.append((self.name, self.duration))
+
+
+class _NoSpan(object):
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **labels: Any):
+    """
+    Time a block of code: ``with span("workspace.filter_graph"):``.
+
+    :param name: The span name, the `span` label of the recorded histogram
+    :param labels: Extra labels of the histogram
+    :return: A context manager; a shared no-op one when tracing is disabled
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, labels)
+
+
+def traced(name: Optional[str] = None, **labels: Any) -> Callable:
+    """
+    Decorator timing each call of a function as a span.
+
+    :param name: The span name; defaults to the function's qualified name
+    :param labels: Extra labels of the histogram
+    """
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name, labels):
+                return func(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+    return decorate
+
+
+def trace_method(cls: type, attribute: str, name: str) -> None:
+    """
+    Trace a method a class defines itself, labelled with the class name; used by base
+    classes to trace the implementations of their abstract methods.
+    """
+    method = cls.__dict__.get(attribute)
+    if callable(method) and not getattr(method, "__traced__", False):
+        setattr(cls, attribute, traced(name, plugin=cls.__name__)(method))
+
+
+class Trace(object):
+    """
+    Collects the spans finished while it is active in the current context (thread or
+    task), e.g. to report where the time of one request went.
+    """
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+        self._token = None
+
+    def __enter__(self) -> 'Trace':
+        self._token = _trace.set(self.spans)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _trace.reset(self._token)
+
+    def totals(self) -> Iterator[Tuple[str, float, int]]:
+        """Total seconds and number of the spans of each name, in order of first appearance."""
+        totals: Dict[str, List[float]] = {}
+        for name, duration in self.spans:
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += duration
+            entry[1] += 1
+        for name, (duration, count) in totals.items():
+            yield name, duration, count
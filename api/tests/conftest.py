@@ -0,0 +1,56 @@
+import copy
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import pytest
+
+from api.interface.observer import Observer
+from api.model import Edge, Graph, Node
+
+# The graph tests start from unless they need another shape: two nodes joined by an edge
+NODES = {"a": {"rating": 1, "genre": "Drama"}, "b": {"rating": 2, "released": date(1999, 3, 31)}}
+EDGES = {("a", "b"): {"w": 1}}
+
+
+def build_graph(nodes: Optional[Dict[str, Dict[str, Any]]] = None,
+                edges: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None) -> Graph:
+    """
+    Build a graph, by default from NODES and EDGES.
+
+    :param nodes: Node id -> data
+    :param edges: (origin id, target id) -> data
+    """
+    if nodes is None:
+        nodes, edges = NODES, EDGES
+    nodes = {id_: Node(id_, copy.deepcopy(data)) for id_, data in nodes.items()}
+    return Graph(nodes=set(nodes.values()),
+                 edges={Edge(nodes[origin], nodes[target], copy.deepcopy(data))
+                        for (origin, target), data in (edges or {}).items()})
+
+
+class Recorder(Observer):
+    """Keeps the keyword arguments of the events it is notified of."""
+
+    def __init__(self):
+        self.events = []
+
+    def update(self, observable=None, *args, **kwargs):
+        self.events.append(kwargs)
+
+
+@pytest.fixture
+def make_graph():
+    return build_graph
+
+
+@pytest.fixture
+def graph():
+    return build_graph()
+
+
+@pytest.fixture
+def recorder(graph):
+    """A Recorder attached to the graph fixture."""
+    recorder = Recorder()
+    graph.attach(recorder)
+    return recorder
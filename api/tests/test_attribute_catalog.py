@@ -0,0 +1,168 @@
+import random
+from collections import Counter
+
+import pytest
+
+from api.model import Graph, Node
+from api.model.attribute_catalog import AttributeCatalog, HyperLogLog, TopK
+
+# The default sketch has a standard error of 1.04 / sqrt(1024), about 3.3%; allow 4 of them
+# so the check holds under any hash seed
+HLL_TOLERANCE = 0.13
+
+
+@pytest.mark.parametrize("distinct", [1000, 10000, 50000])
+def test_hyperloglog_estimates_within_its_error_bound(distinct):
+    sketch = HyperLogLog()
+    for i in range(distinct):
+        sketch.add(f"value-{i}")
+
+    assert abs(sketch.count() - distinct) <= HLL_TOLERANCE * distinct
+
+
+def test_hyperloglog_is_near_exact_for_small_counts():
+    sketch = HyperLogLog()
+    assert sketch.count() == 0
+    for i in range(100):
+        sketch.add(i)
+
+    # Linear counting has a standard error of about 2% here
+    assert abs(sketch.count() - 100) <= 10
+
+
+def test_hyperloglog_ignores_duplicates_and_keeps_its_size():
+    sketch = HyperLogLog()
+    for _ in range(50):
+        for i in range(1000):
+            sketch.add(i)
+
+    assert abs(sketch.count() - 1000) <= HLL_TOLERANCE * 1000
+    assert len(sketch._registers) == 1024
+
+
+def test_hyperloglog_tells_types_apart():
+    sketch = HyperLogLog()
+    for i in range(500):
+        sketch.add(i)
+        sketch.add(str(i))
+
+    assert abs(sketch.count() - 1000) <= HLL_TOLERANCE * 1000
+
+
+def test_topk_keeps_frequent_values_with_bounded_counters():
+    capacity = 8
+    top = TopK(capacity)
+    # 3 heavy values over a long tail of values seen once
+    stream = ["a"] * 500 + ["b"] * 350 + ["c"] * 250 + [f"tail-{i}" for i in range(900)]
+    random.Random(0).shuffle(stream)
+    exact = Counter(stream)
+
+    for value in stream:
+        top.add(value)
+        assert len(top._counts) <= capacity
+
+    # Values held by more than n / (capacity + 1) of the items are kept...
+    bound = len(stream) / (capacity + 1)
+    assert {"a", "b", "c"} <= {v for v, _ in top.most_common()}
+    # ...with lower-bound counts that are off by at most n / (capacity + 1)
+    for value, count in top.most_common():
+        assert exact[value] - bound <= count <= exact[value]
+
+
+def test_topk_remove_and_untracked_values():
+    top = TopK(2)
+    for value in ["a", "a", "b"]:
+        top.add(value)
+
+    top.remove("a")
+    top.remove("b")
+    top.remove("never-seen")
+
+    assert top.count("a") == 1
+    assert top.count("b") is None
+    assert top.most_common() == [("a", 1)]
+
+
+def _catalog():
+    catalog = AttributeCatalog()
+    for i in range(100):
+        catalog.add({"rating": i % 10, "genre": "Drama" if i < 60 else "Comedy"})
+    # Values of another type and missing values count toward the size only; few enough
+    # distinct values that the most frequent ones are all tracked
+    for i in range(100):
+        catalog.add({"rating": str(i % 20), "genre": None})
+    return catalog
+
+
+def test_selectivity_of_equality_uses_frequent_values():
+    catalog = _catalog()
+
+    assert catalog.selectivity("genre", "==", "Drama") == pytest.approx(0.3)
+    assert catalog.selectivity("genre", "!=", "Drama") == pytest.approx(0.2)
+    assert catalog.selectivity("rating", "==", 3) == pytest.approx(0.05)
+
+
+def test_selectivity_of_equality_falls_back_to_the_distinct_count():
+    catalog = AttributeCatalog()
+    for i in range(1000):
+        catalog.add({"id": i})
+
+    estimate = catalog.selectivity("id", "==", -1)
+
+    assert estimate == pytest.approx(1 / 1000, rel=HLL_TOLERANCE * 2)
+
+
+def test_selectivity_of_ranges_interpolates_between_bounds():
+    catalog = _catalog()
+
+    assert catalog.selectivity("rating", "<", 0) == pytest.approx(0.0)
+    assert catalog.selectivity("rating", ">=", 9) == pytest.approx(0.0)
+    assert catalog.selectivity("rating", "<", 4.5) == 0.0  # only ints can match an int filter
+    assert catalog.selectivity("rating", "<", 9) == pytest.approx(0.5)
+    assert catalog.selectivity("rating", ">", 3) == pytest.approx(0.5 * (1 - 3 / 9))
+    for operator in ("<", "<=", ">", ">="):
+        for value in range(-5, 15):
+            assert 0.0 <= catalog.selectivity("rating", operator, value) <= 0.5
+
+
+def test_selectivity_when_the_statistics_cant_tell():
+    catalog = _catalog()
+
+    assert AttributeCatalog().selectivity("rating", "==", 1) is None
+    assert catalog.selectivity("unknown", "==", 1) == 0.0
+    assert catalog.selectivity("rating", "==", None) == 0.0
+    assert catalog.selectivity("rating", "<", "5") is None
+    assert catalog.selectivity("rating", "<", True) == 0.0
+
+
+def test_suggest_matches_prefix_most_frequent_first():
+    catalog = AttributeCatalog()
+    for title, count in [("The Matrix", 5), ("the thing", 3), ("Alien", 9), ("Them!", 1)]:
+        for _ in range(count):
+            catalog.add({"title": title})
+
+    assert catalog.suggest("title", "the") == ["The Matrix", "the thing", "Them!"]
+    assert catalog.suggest("title", "THE", limit=2) == ["The Matrix", "the thing"]
+    assert catalog.suggest("title") == ["Alien", "The Matrix", "the thing", "Them!"]
+    assert catalog.suggest("title", "x") == []
+    assert catalog.suggest("unknown") == []
+
+
+def test_suggest_stays_bounded_by_the_sketch():
+    catalog = AttributeCatalog()
+    for i in range(1000):
+        catalog.add({"title": f"movie {i}"})
+
+    assert len(catalog.suggest("title", "movie", limit=1000)) <= 64
+
+
+def test_graph_catalog_follows_changes():
+    graph = Graph(nodes={Node("a", {"rating": 1}), Node("b", {"rating": 2})})
+    assert graph.catalog.types("rating") == (int,)
+
+    graph.update_node("a", {"rating": "high"})
+    graph.remove_node("b")
+
+    assert graph.catalog.types("rating") == (str,)
+    assert graph.catalog.suggest("rating", "h") == ["high"]
+    assert graph.catalog.selectivity("rating", "==", "high") == pytest.approx(1.0)
@@ -0,0 +1,84 @@
+from api.model import Edge, Graph, GraphDiff, Node
+from api.model.graph_diff import PropertyChange
+
+
+def test_between_splits_added_removed_and_changed_records():
+    old_nodes = {"a": {"rating": 1}, "b": {"rating": 2, "genre": "Drama"}, "c": {}}
+    new_nodes = {"a": {"rating": 1}, "b": {"rating": 3}, "d": {"rating": 4}}
+    old_edges = {("a", "b"): {"w": 1}, ("b", "c"): {}}
+    new_edges = {("a", "b"): {"w": 2, "kind": "x"}, ("a", "d"): {}}
+
+    diff = GraphDiff.between(old_nodes, new_nodes, old_edges, new_edges)
+
+    assert diff.added_nodes == {"d": {"rating": 4}}
+    assert diff.removed_nodes == ["c"]
+    assert diff.changed_nodes == {"b": PropertyChange({"rating": 3}, ("genre",))}
+    assert diff.added_edges == {("a", "d"): {}}
+    assert diff.removed_edges == [("b", "c")]
+    assert diff.changed_edges == {("a", "b"): PropertyChange({"w": 2, "kind": "x"}, ())}
+    assert len(diff) == 6
+
+
+def test_identical_versions_give_an_empty_diff():
+    nodes, edges = {"a": {"rating": 1}}, {("a", "a"): {}}
+    assert not GraphDiff.between(nodes, dict(nodes), edges, dict(edges))
+
+
+def test_applied_diff_turns_the_old_graph_into_the_new():
+    a, b, c = Node("a", {"rating": 1}), Node("b", {"rating": 2, "genre": "Drama"}), Node("c", {})
+    graph = Graph(nodes={a, b, c}, edges={Edge(a, b, {"w": 1}), Edge(b, c, {})})
+    new_nodes = {"a": {"rating": 1}, "b": {"rating": 3}, "d": {"rating": 4}}
+    new_edges = {("a", "b"): {"w": 2}, ("a", "d"): {}}
+
+    graph.apply_diff(GraphDiff.between({n.id: n.data for n in graph.nodes}, new_nodes,
+                                       {(e.origin.id, e.target.id): e.data for e in graph.edges}, new_edges))
+
+    assert {n.id: n.data for n in graph.nodes} == new_nodes
+    assert {(e.origin.id, e.target.id): e.data for e in graph.edges} == new_edges
+
+
+class _WatchedSet(set):
+    """A set counting how often it is iterated over."""
+    iterations = 0
+
+    def __iter__(self):
+        type(self).iterations += 1
+        return super().__iter__()
+
+
+def test_applying_a_diff_does_not_scan_the_graph():
+    nodes = {f"n{i}": Node(f"n{i}", {"rating": i}) for i in range(100)}
+    edges = {Edge(nodes[f"n{i}"], nodes[f"n{i + 1}"], {}) for i in range(99)}
+    graph = Graph(nodes=_WatchedSet(nodes.values()), edges=_WatchedSet(edges))
+    graph.get_node("n0"), graph.get_edge("n0", "n1")
+    _WatchedSet.iterations = 0
+
+    graph.apply_diff(GraphDiff(added_nodes={"new": {}}, removed_nodes=["n50"],
+                               changed_nodes={"n1": PropertyChange({"rating": -1})},
+                               added_edges={("new", "n0"): {}},
+                               changed_edges={("n0", "n1"): PropertyChange({"w": 1})}))
+
+    assert _WatchedSet.iterations == 0
+    assert graph.get_node("n50") is None and graph.get_edge("n49", "n50") is None
+    assert graph.get_edge("n50", "n51") is None and len(graph.edges) == 98
+    assert graph.get_node("n1").data["rating"] == -1 and graph.get_edge("n0", "n1").data == {"w": 1}
+    assert graph.get_edge("new", "n0") is not None
+
+
+def test_node_lookup_follows_every_change():
+    a, b = Node("a", {}), Node("b", {})
+    graph = Graph(nodes={a})
+    assert graph.get_node("a") is a
+    graph.add_edge(Edge(a, b, {}))
+    assert graph.get_node("b") is b
+    try:
+        with graph.transaction():
+            graph.remove_edge("a", "b")
+            graph.remove_node("b")
+            assert graph.get_node("b") is None
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert graph.get_node("b") is b
+    graph.clear()
+    assert graph.get_node("a") is None
@@ -0,0 +1,50 @@
+import pytest
+
+from api.model import Edge, Node
+
+
+def test_transaction_notifies_once(graph, recorder):
+    with graph.transaction():
+        graph.add_node(Node("c", {}))
+        graph.update_node("a", {"rating": 5})
+    assert [e["action"] for e in recorder.events] == ["batch"]
+    assert graph.get_node("a").data["rating"] == 5
+
+
+def test_failed_transaction_is_undone(graph, recorder):
+    before, version = graph.to_dict(), graph.version
+    catalog = graph.catalog.stats("rating").types.copy()
+    with pytest.raises(ValueError):
+        with graph.transaction():
+            graph.update_node("a", {"rating": 5, "new": True})
+            graph.remove_edge("a", "b")
+            graph.add_edge(Edge(graph.get_node("b"), Node("c", {"rating": 3})))
+            graph.remove_node("a")
+            graph.remove_node("missing")
+
+    assert sorted(n["id"] for n in graph.to_dict()["nodes"]) == sorted(n["id"] for n in before["nodes"])
+    assert graph.get_node("a").data == {"rating": 1, "genre": "Drama"}
+    assert graph.get_edge("a", "b").data == {"w": 1}
+    assert graph.get_edge("b", "c") is None
+    assert graph.catalog.stats("rating").types == catalog
+    assert "new" not in graph.catalog
+    assert recorder.events == []
+    assert graph.version > version
+
+
+def test_failed_clear_is_undone(graph):
+    with pytest.raises(RuntimeError):
+        with graph.transaction():
+            graph.clear()
+            raise RuntimeError()
+    assert len(graph.nodes) == 2 and graph.get_edge("a", "b") is not None
+
+
+def test_nested_transaction_undoes_only_its_changes(graph):
+    with graph.transaction():
+        graph.add_node(Node("c", {}))
+        with pytest.raises(ValueError):
+            with graph.transaction():
+                graph.add_node(Node("d", {}))
+                raise ValueError()
+    assert graph.get_node("c") is not None and graph.get_node("d") is None
@@ -0,0 +1,45 @@
+from datetime import date
+
+import pytest
+
+from api.model import Graph, wire
+
+# Values of every type the wire format encodes
+NODES = {"a": {"rating": 8.5, "votes": 120, "big": 2 ** 40, "seen": True, "title": "Heat",
+               "released": date(1995, 12, 15), "genres": ["Crime", "Drama"]},
+         "b": {"rating": 7, "title": "Ronin"},
+         "c": {}}
+EDGES = {("a", "b"): {"weight": 0.5}, ("b", "c"): {}}
+
+
+@pytest.fixture
+def graph(make_graph):
+    return make_graph(NODES, EDGES)
+
+
+def test_decode_reverses_encode(graph):
+    decoded = wire.decode(wire.encode(graph))
+
+    assert decoded["directed"] is True
+    nodes = {n["id"]: n["data"] for n in decoded["nodes"]}
+    assert nodes == dict(NODES, a=dict(NODES["a"], released="1995-12-15"))
+    assert {(e["from"], e["to"]): e["data"] for e in decoded["edges"]} == EDGES
+
+
+def test_edges_can_be_sent_without_their_data(graph):
+    decoded = wire.decode(wire.encode(graph, edge_data=False))
+
+    assert {(e["from"], e["to"]) for e in decoded["edges"]} == {("a", "b"), ("b", "c")}
+    assert all(e["data"] == {} for e in decoded["edges"])
+
+
+def test_arrays_are_aligned_to_eight_bytes(graph):
+    assert len(wire.encode(graph)) % 8 == 0
+    assert len(wire.encode(Graph())) % 8 == 0
+
+
+def test_decode_rejects_other_data():
+    with pytest.raises(ValueError):
+        wire.decode(b"{}")
+    with pytest.raises(ValueError):
+        wire.decode(b"XXXX" + wire.encode(Graph())[4:])
@@ -0,0 +1,16 @@
+"""
+Benchmarks of the graph explorer on generated movies and package dependency graphs.
+
+Run with `python -m benchmarks` (or `make benchmark`) from the repository root, after
+installing the packages; results are written as JSON and compared to baseline.json.
+
+Timings are machine-specific. Each run also times a fixed calibration workload, and
+baseline timings are scaled by the ratio of the calibration times before comparing;
+the scaling is approximate, so for exact comparisons save a baseline on the machine
+that runs them (`--save-baseline`).
+"""
+from .generators import movies_dataset, write_movies, write_packages
+from .suite import DATASETS, SIZES, calibrate, compare, measure, run, speed_ratio
+
+__all__ = ['movies_dataset', 'write_movies', 'write_packages', 'DATASETS', 'SIZES', 'calibrate', 'compare',
+           'measure', 'run', 'speed_ratio']
@@ -0,0 +1,81 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import suite
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def _sizes(text: str):
+    sizes = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        scale = {"k": 1000, "m": 1000000}.get(part[-1:], 1)
+        sizes.append(int(part[:-1] if scale > 1 else part) * scale)
+    return sizes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time loading, filtering, editing and rendering generated graphs.")
+    parser.add_argument("--sizes", type=_sizes, default=list(suite.SIZES[:3]),
+                        help="comma separated numbers of nodes, e.g. 1k,10k,100k,1m (default: 1k,10k,100k)")
+    parser.add_argument("--datasets", type=lambda s: s.split(","), default=None,
+                        help="comma separated datasets to run: " + ",".join(d.name for d in suite.DATASETS))
+    parser.add_argument("--repeat", type=int, default=3,
+                        help=f"timed runs of each case, at least {suite.MIN_REPEAT} to compare or save a baseline (default: 3)")
+    parser.add_argument("--warmup", type=int, default=suite.WARMUP,
+                        help=f"untimed runs of each case before the timed ones (default: {suite.WARMUP})")
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="keep the generated datasets here and reuse them in later runs")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"),
+                        help="file the results are written to (default: benchmark-results.json)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE,
+                        help="results to compare to (default: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=suite.THRESHOLD,
+                        help=f"slowdown over the baseline, as a fraction of its time, reported as a regression; "
+                             f"raise it when the baseline comes from another machine (default: {suite.THRESHOLD})")
+    parser.add_argument("--min-difference", type=float, default=suite.MIN_DIFFERENCE,
+                        help=f"seconds a case must lose before it counts as regressed (default: {suite.MIN_DIFFERENCE})")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new baseline instead of comparing")
+    args = parser.parse_args(argv)
+    if args.save_baseline and args.repeat < suite.MIN_REPEAT:
+        parser.error(f"--save-baseline needs --repeat {suite.MIN_REPEAT} or more")
+
+    results = suite.run(args.sizes, data_dir=args.data_dir, repeat=args.repeat, datasets=args.datasets,
+                        progress=lambda line: print(line, file=sys.stderr), warmup=args.warmup)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to store one")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if min(args.repeat, baseline["meta"].get("repeat", 0)) < suite.MIN_REPEAT:
+        print(f"Not compared: the results and the baseline need {suite.MIN_REPEAT} or more runs of each case")
+        return 0
+    if baseline["meta"].get("platform") != results["meta"]["platform"]:
+        print(f"Note: the baseline was measured on {baseline['meta'].get('platform')}")
+    if "calibration" in baseline["meta"]:
+        print(f"Baseline timings scaled by {suite.speed_ratio(results, baseline):.2f} "
+              f"to the speed of this machine")
+    else:
+        print("Note: the baseline has no calibration time; its timings are compared as measured")
+    regressions = suite.compare(results, baseline, args.threshold, args.min_difference)
+    for regression in regressions:
+        print(f"REGRESSION {regression.key}: {regression.baseline:.4f}s -> {regression.current:.4f}s "
+              f"({regression.ratio:.2f}x)")
+    compared = len(results["results"].keys() & baseline["results"].keys())
+    print(f"{len(regressions)} regression(s) in {compared} compared case(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+GENRES = ["Action", "Comedy", "Drama", "Sci-Fi", "Thriller", "Horror", "Romance", "Animation"]
+NATIONALITIES = ["USA", "UK", "Canada", "France", "Spain", "Germany", "South Korea", "Japan"]
+LANGUAGES = ["Python", "JavaScript", "Rust", "Go", "Java"]
+CATEGORIES = ["utils", "cli", "web", "data", "testing", "security"]
+LICENSES = ["MIT", "Apache-2.0", "GPL-3.0", "BSD-3-Clause", "MPL-2.0"]
+
+# Share of the nodes of each type in a movies dataset, as in movies_large.json
+MOVIE_TYPES = (("film", 0.35), ("actor", 0.45), ("director", 0.1), ("studio", 0.1))
+
+
+def _counts(size: int) -> Dict[str, int]:
+    counts = {kind: max(int(size * share), 1) for kind, share in MOVIE_TYPES}
+    # Rounding leftovers go to the actors
+    counts["actor"] += size - sum(counts.values())
+    return counts
+
+
+def movies_dataset(size: int, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate a movies dataset in the format read by the movies data source plugin.
+
+    Every film has about three actors, a director and a studio; one film in ten is a
+    sequel of an earlier one.
+
+    :param size: Number of nodes
+    :param seed: Seed of the random values, the same seed gives the same dataset
+    :return: The dataset, with its "nodes" and "edges" lists
+    """
+    rng = random.Random(seed)
+    counts = _counts(size)
+    ids = {kind: [f"{kind}{i:07d}" for i in range(1, n + 1)] for kind, n in counts.items()}
+    nodes = []
+    for i, node_id in enumerate(ids["film"], 1):
+        nodes.append({"id": node_id, "type": "film", "title": f"Movie {i}", "year": rng.randint(1950, 2024),
+                      "genre": rng.choice(GENRES), "rating": round(rng.uniform(1, 10), 1)})
+    for kind in ("actor", "director"):
+        for i, node_id in enumerate(ids[kind], 1):
+            nodes.append({"id": node_id, "type": kind, "name": f"{kind.title()} {i}",
+                          "birthYear": rng.randint(1930, 2005), "nationality": rng.choice(NATIONALITIES)})
+    for i, node_id in enumerate(ids["studio"], 1):
+        nodes.append({"id": node_id, "type": "studio", "name": f"Studio {i}",
+                      "founded": rng.randint(1900, 2020), "country": rng.choice(NATIONALITIES)})
+
+    edges = []
+
+    def link(origin: str, target: str, relation: str, **data):
+        edges.append({"from": origin, "to": target, "type": "related_to", "relationType": relation, **data})
+
+    for i, film in enumerate(ids["film"]):
+        for actor in set(rng.sample(ids["actor"], min(3, len(ids["actor"])))):
+            link(actor, film, "acted_in", characterName=f"Character_{rng.randint(1, 500)}",
+                 salary=rng.randint(100000, 5000000))
+        link(rng.choice(ids["director"]), film, "directed")
+        link(film, rng.choice(ids["studio"]), "produced_by")
+        if i and rng.random() < 0.1:
+            link(film, ids["film"][rng.randrange(i)], "sequel_of")
+    return {"nodes": nodes, "edges": edges}
+
+
+def write_movies(path: Path, size: int, seed: int = 0) -> Path:
+    """Write a generated movies dataset (see movies_dataset) as JSON."""
+    path = Path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(movies_dataset(size, seed), f)
+    return path
+
+
+def write_packages(path: Path, size: int, seed: int = 0) -> Path:
+    """
+    Write a package dependency graph in the Turtle format read by the packages data
+    source plugin.
+
+    Packages depend on up to three packages with higher numbers, so the dependencies form
+    a DAG like real ones; some also have optional dependencies and conflicts.
+
+    :param path: The file to write
+    :param size: Number of packages
+    :param seed: Seed of the random values, the same seed gives the same file
+    :return: The path written
+    """
+    rng = random.Random(seed)
+    path = Path(path)
+    name = [f"pkg{i:07d}" for i in range(size)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("@prefix ex: <http://example.org/> .\n"
+                "@prefix foaf: <http://xmlns.com/foaf/0.1/> .\n"
+                "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n\n")
+        for i in range(size):
+            lines = [f"ex:{name[i]} a ex:Package",
+                     f'foaf:name "{name[i]}"',
+                     f'ex:version "{rng.randint(0, 5)}.{rng.randint(0, 20)}.{rng.randint(0, 30)}"',
+                     f'ex:language "{rng.choice(LANGUAGES)}"',
+                     f'ex:category "{rng.choice(CATEGORIES)}"',
+                     f'ex:license "{rng.choice(LICENSES)}"',
+                     f'ex:maintainer "dev{rng.randint(1, 50)}"',
+                     f'ex:downloads "{rng.randint(100, 1000000)}"^^xsd:integer']
+            later = size - i - 1
+            if later:
+                dependencies = {rng.randint(i + 1, size - 1) for _ in range(rng.randint(0, min(3, later)))}
+                if dependencies:
+                    lines.append("ex:dependsOn " + ", ".join(f"ex:{name[d]}" for d in sorted(dependencies)))
+                if rng.random() < 0.1:
+                    lines.append(f"ex:optionalDependsOn ex:{name[rng.randint(i + 1, size - 1)]}")
+                if rng.random() < 0.02:
+                    lines.append(f"ex:conflictsWith ex:{name[rng.randint(i + 1, size - 1)]}")
+            lines.append(f'ex:isStable "{"true" if rng.random() < 0.7 else "false"}"')
+            f.write(" ;\n    ".join(lines) + " .\n\n")
+    return path
@@ -0,0 +1,325 @@
+import contextlib
+import functools
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from . import generators
+
+# Number of nodes of the generated graphs
+SIZES = (1000, 10000, 100000, 1000000)
+
+# Slowdown over the baseline, as a fraction of its time, reported as a regression
+THRESHOLD = 0.25
+# Differences below this many seconds are noise, whatever their ratio
+MIN_DIFFERENCE = 0.002
+
+# Number of CLI commands in the mutation case
+CLI_COMMANDS = 100
+
+# Entries of the calibration workload timed with every run
+CALIBRATION_SIZE = 100000
+
+# Untimed runs of each case before the timed ones, to fill caches and import lazily loaded code
+WARMUP = 1
+# Fewest timed runs whose median is worth comparing to a baseline
+MIN_REPEAT = 3
+
+
+class Dataset(NamedTuple):
+    """A kind of generated graph and the plugin that loads it."""
+    name: str
+    suffix: str
+    write: Callable[[Path, int, int], Path]
+    plugin: str
+    filter: str
+    search: str
+
+
+DATASETS = (
+    Dataset("movies", ".json", generators.write_movies,
+            "movies_json.plugin:MoviesDataSourcePlugin", "rating >= 7", "Movie 1"),
+    Dataset("packages", ".ttl", generators.write_packages,
+            "packages_rdf.plugin:PackagesDataSourcePlugin", "downloads >= 500000", "pkg00001"),
+)
+
+VISUALIZERS = (
+    "simple_visualizer.implementation:SimpleVisualizer",
+    "block_visualizer.block_visualizer:BlockVisualizer",
+)
+
+
+def _load(path: str) -> Optional[type]:
+    """Import a class from a `module:Class` path, or None if its package isn't installed."""
+    module, _, name = path.partition(":")
+    try:
+        return getattr(importlib.import_module(module), name)
+    except ImportError:
+        return None
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Send what the code under test prints to /dev/null, so the console doesn't weigh on the timings."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(func: Callable[[], Any], setup: Callable[[], Any] | None = None, repeat: int = 3,
+            warmup: int = WARMUP, teardown: Callable[[Any], Any] | None = None) -> Dict[str, Any]:
+    """
+    Time a function.
+
+    :param func: The function to time
+    :param setup: Called untimed before each run
+    :param repeat: Number of timed runs
+    :param warmup: Number of untimed runs before the timed ones
+    :param teardown: Called untimed after each run with what func returned, to release it
+    :return: The seconds of each timed run with their median and minimum
+    """
+    runs = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            with _quiet():
+                setup()
+        gc.collect()
+        with _quiet():
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            if teardown is not None:
+                teardown(result)
+        if i >= warmup:
+            runs.append(elapsed)
+    return {"median": statistics.median(runs), "min": min(runs), "runs": runs}
+
+
+def _calibration_workload(size: int = CALIBRATION_SIZE) -> List[str]:
+    """Build, hash and sort records in pure Python, the kind of work most cases do."""
+    records = {f"node{i}": {"rating": i * 7919 % 10, "title": f"Movie {i}"} for i in range(size)}
+    return sorted(records, key=lambda key: (records[key]["rating"], records[key]["title"]))
+
+
+def calibrate(repeat: int = MIN_REPEAT) -> float:
+    """
+    Time a fixed workload that doesn't depend on the code under test.
+
+    Timings are only comparable on one machine; the ratio of the calibration times of two
+    runs estimates how much faster one machine is than the other.
+
+    :param repeat: Number of timed runs
+    :return: The median seconds of the workload
+    """
+    return measure(_calibration_workload, repeat=max(repeat, MIN_REPEAT))["median"]
+
+
+def dataset_file(dataset: Dataset, size: int, data_dir: Path, seed: int = 0) -> Path:
+    """Get the file of a generated dataset, generating it unless data_dir already holds it."""
+    path = Path(data_dir) / f"{dataset.name}-{size}-{seed}{dataset.suffix}"
+    if not path.exists():
+        # Write under another name first so an interrupted run leaves no partial file
+        partial = path.with_name(path.name + ".partial")
+        dataset.write(partial, size, seed)
+        partial.replace(path)
+    return path
+
+
+def _cases(dataset: Dataset, plugin_class: type, path: Path, repeat: int, warmup: int = WARMUP) -> Iterable[tuple]:
+    """Run the cases of one dataset file, yielding (case name, timings)."""
+    from api.model import Graph, Edge, Node, wire
+    from core.application import Application
+    from core.model import Search
+    from core.model.filter_cache import filter_results
+    from core.model.workspace import Workspace
+
+    timed = functools.partial(measure, repeat=repeat, warmup=warmup)
+
+    # A new plugin per run: plugins cache the graph they loaded
+    yield "load_data", timed(lambda: plugin_class().load_data(file_path=str(path)))
+
+    plugin = plugin_class()
+    with _quiet():
+        graph = plugin.load_data(file_path=str(path))
+    nodes = [Node(n.id, dict(n.data)) for n in graph.nodes]
+    by_id = {n.id: n for n in nodes}
+    edges = {Edge(by_id[e.origin.id], by_id[e.target.id], dict(e.data)) for e in graph.edges}
+    yield "graph_construction", timed(lambda: Graph(edges=set(edges), nodes=set(nodes), directed=True))
+
+    # Closed after each run: a workspace observes the graph, and left attached every
+    # one of them would be notified by the later cases' changes
+    yield "workspace_creation", timed(lambda: Workspace(plugin, graph=graph),
+                                      teardown=lambda workspace: workspace.close())
+
+    with _quiet():
+        ws = Workspace(plugin, graph=graph)
+    # Filter results are memoized per graph; drop them so each run evaluates the filter
+    yield "add_filter", timed(lambda: ws.add_filter(dataset.filter),
+                              setup=lambda: (ws.set_filters([]), filter_results.clear()))
+    yield "remove_filter", timed(lambda: ws.remove_filter(dataset.filter),
+                                 setup=lambda: (ws.set_filters([]), ws.add_filter(dataset.filter)))
+    search = Search(value=dataset.search)
+    yield "search", timed(lambda: ws.add_search(search),
+                          setup=lambda: (ws.set_filters([]), filter_results.clear()))
+    with _quiet():
+        ws.set_filters([])
+
+    for visualizer in VISUALIZERS:
+        visualizer_class = _load(visualizer)
+        if visualizer_class is not None:
+            instance = visualizer_class()
+            yield f"display_graph[{instance.identifier()}]", timed(lambda: instance.display_graph(ws.graph))
+
+    # The payloads of graph-data/
+    def to_json():
+        return json.dumps({"nodes": [{"id": str(n.id), "data": n.data} for n in ws.graph.nodes],
+                           "edges": [{"from": str(e.origin.id), "to": str(e.target.id)} for e in ws.graph.edges]},
+                          default=str)
+    yield "encode_graph[json]", timed(to_json)
+    yield "encode_graph[binary]", timed(lambda: wire.encode(ws.graph, edge_data=False))
+
+    # Last: the commands change the graph
+    with _quiet():
+        app = Application(workspaces=[ws])
+    app.session(None).current_workspace_id = ws.id
+    anchor = next(iter(graph.nodes)).id
+    commands = []
+    for i in range(CLI_COMMANDS // 5):
+        node_id = f"bench{i}"
+        commands += [f"create node --id={node_id} --property name=Bench{i}",
+                     f"create edge --origin={node_id} --target={anchor} --property type=bench",
+                     f"edit node --id={node_id} --property name=Edited{i}",
+                     f"delete edge --origin={node_id} --target={anchor}",
+                     f"delete node --id={node_id}"]
+
+    def mutate():
+        for command in commands:
+            app.command_processor.parse_and_execute(command)
+    yield f"cli_mutations[{len(commands)}]", timed(mutate)
+
+
+def run(sizes: Iterable[int] = SIZES, data_dir: Path | None = None, repeat: int = 3,
+        datasets: Iterable[str] | None = None, progress: Callable[[str], None] | None = None,
+        warmup: int = WARMUP) -> Dict[str, Any]:
+    """
+    Run the benchmarks on generated graphs of each size.
+
+    :param sizes: Numbers of nodes of the generated graphs
+    :param data_dir: Directory where generated datasets are kept and reused (a temporary one if None)
+    :param repeat: Number of timed runs of each case
+    :param datasets: Names of the datasets to run (all if None)
+    :param progress: Called with a line describing each finished case
+    :param warmup: Number of untimed runs of each case before the timed ones
+    :return: The results, keyed by "dataset/size/case", and the environment they were measured in
+    """
+    import tempfile
+
+    meta = environment(repeat, warmup)
+    meta["calibration"] = calibrate(repeat)
+    if progress:
+        progress(f"calibration: {meta['calibration']:.4f}s")
+
+    with contextlib.ExitStack() as stack:
+        if data_dir is None:
+            data_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="sok-bench-"))
+        Path(data_dir).mkdir(parents=True, exist_ok=True)
+        results: Dict[str, Any] = {}
+        for dataset in DATASETS:
+            if datasets is not None and dataset.name not in datasets:
+                continue
+            plugin_class = _load(dataset.plugin)
+            if plugin_class is None:
+                if progress:
+                    progress(f"{dataset.name}: plugin not installed, skipped")
+                continue
+            for size in sizes:
+                path = dataset_file(dataset, size, data_dir)
+                for case, timing in _cases(dataset, plugin_class, path, repeat, warmup):
+                    key = f"{dataset.name}/{size}/{case}"
+                    results[key] = timing
+                    if progress:
+                        progress(f"{key}: {timing['median']:.4f}s")
+    return {"meta": meta, "results": results}
+
+
+def environment(repeat: int, warmup: int = WARMUP) -> Dict[str, Any]:
+    """Describe the machine and interpreter the results were measured on."""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": sys.implementation.name,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": numpy_version,
+        "repeat": repeat,
+        "warmup": warmup,
+    }
+
+
+class Comparison(NamedTuple):
+    key: str
+    # Median of the baseline, scaled to the speed of the machine the results were measured on
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+def speed_ratio(results: Dict[str, Any], baseline: Dict[str, Any]) -> float:
+    """
+    How many times slower the machine of the results is than that of the baseline,
+    from their calibration times; 1.0 if either run wasn't calibrated.
+    """
+    current, previous = results["meta"].get("calibration"), baseline["meta"].get("calibration")
+    if not current or not previous:
+        return 1.0
+    return current / previous
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = THRESHOLD,
+            min_difference: float = MIN_DIFFERENCE) -> List[Comparison]:
+    """
+    Compare results to a baseline run.
+
+    Medians are compared; cases missing from either run are ignored. Both runs must
+    have timed each case at least MIN_REPEAT times.
+
+    Absolute timings depend on the machine. When both runs hold a calibration time,
+    the baseline is scaled by the ratio of the two, so a baseline measured on another
+    machine remains usable; the scaling is approximate, so raise the threshold when
+    comparing across machines, or save a baseline on the machine that runs the comparison.
+
+    :param results: The results of run()
+    :param baseline: Results of an earlier run
+    :param threshold: Slowdown, as a fraction of the baseline time, above which a case regressed
+    :param min_difference: Seconds a case must lose before it counts as regressed
+    :raises ValueError: If either run timed its cases fewer than MIN_REPEAT times
+    :return: The regressed cases, worst first
+    """
+    for run_, name in ((results, "results"), (baseline, "baseline")):
+        if run_["meta"].get("repeat", 0) < MIN_REPEAT:
+            raise ValueError(f"The {name} were measured with repeat={run_['meta'].get('repeat')}; "
+                             f"comparing needs at least {MIN_REPEAT} runs of each case")
+    scale = speed_ratio(results, baseline)
+    regressions = []
+    current, previous = results["results"], baseline["results"]
+    for key in current.keys() & previous.keys():
+        comparison = Comparison(key, previous[key]["median"] * scale, current[key]["median"])
+        if (comparison.current > comparison.baseline * (1 + threshold)
+                and comparison.current - comparison.baseline > min_difference):
+            regressions.append(comparison)
+    return sorted(regressions, key=lambda c: -c.ratio)
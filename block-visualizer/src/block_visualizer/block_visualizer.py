@@ -3,10 +3,8 @@ from abc import ABC
 
 from api.model.graph import Graph
 from mako.template import Template
-from datetime import datetime
-import json
 
-from api.services import Visualizer
+from api.services import GRAPH_DATA_ELEMENT, Visualizer, graph_data_script
 
 
 class BlockVisualizer(Visualizer,ABC):
@@ -17,6 +15,8 @@ class BlockVisualizer(Visualizer,ABC):
         '''
 
         self.template = Template(self.load_template())
+        # the template doesn't depend on the graph, so it is rendered once
+        self._shell = self.template.render(name=str(self), data_element=GRAPH_DATA_ELEMENT)
 
     def __str__(self):
         '''
@@ -40,42 +40,18 @@ class BlockVisualizer(Visualizer,ABC):
         with open(template_path, "r", encoding="utf-8") as f:
             return f.read()
 
-    def display_graph(self, graph: Graph):
+    def shell(self) -> str:
         '''
-        "main" method of the visualizer
-        renders the in-memory graph object into the template-compatible HTML format used for visualization
+        the rendered template, which draws the graph it is given
+        (see Visualizer.shell)
         '''
 
-        nodes = [
-            {
-                "id": n.id,
-                "data": {k: convert_json_safe(v) for k, v in n.data.items()}
-            }
-            for n in graph.nodes
-        ]
+        return self._shell
 
-        edges = [
-            {
-                "source": e.origin.id,
-                "target": e.target.id
-            }
-            for e in graph.edges
-        ]
-
-        return self.template.render(
-            name=str(self),
-            nodes=nodes,
-            edges=edges,
-            directed=convert_json_safe(graph.is_directed())
-        )
+    def display_graph(self, graph: Graph):
+        '''
+        "main" method of the visualizer
+        returns the shell, preceded by the in-memory graph object as a JSON data block it reads
+        '''
 
-def convert_json_safe(value):
-    """
-    converts problematic data types to ISO strings
-    (specifically, datetime)
-    """
-    if isinstance(value, datetime):
-        return value.strftime("%d-%m-%Y")
-    if isinstance(value, bool):
-        return str(value).lower()
-    return value
\ No newline at end of file
+        return graph_data_script(graph) + self._shell
@@ -1,23 +1,83 @@
-from typing import List, Dict, Callable, Any
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Callable, Any, Tuple
 
-from api.model import Graph
+from api.model import Graph, GraphDiff
+from api.services import reporting_progress
 
 from .model.command_processor import CommandProcessor, Command
 from .model.filter import Filter
-from .model.workspace import  Workspace
-from .service import PluginService
+from .model.search import Search
+from .model.workspace import  Workspace, WorkspaceView, load_base_graph
+from .model.session import Session
+from .model.registry import WorkspaceRegistry, WorkspaceEntry
+from .service import (PluginService, WorkspaceStore, WorkspacePersistence, SourceWatcher, Job, JobQueue, JobState,
+                      ChangeFeed)
+from .memory import MemoryManager, Footprint, estimate_workspace_footprint
+from .const import SESSION_IDLE_TIMEOUT, DATASOURCE_GROUP, VISUALIZATION_GROUP
+
+# Share of a workspace creation job spent loading the data, the rest being indexing
+LOAD_SHARE = 0.8
 
 
 class Application:
 
-    def __init__(self, workspaces=None):
-        if workspaces is None:
-            workspaces = []
-        self.workspaces = workspaces
-        self.current_workspace_id = None
+    def __init__(self, workspaces=None, max_resident_workspaces: int | None = None, snapshot_dir=None,
+                 memory_budget: int | None = None, persist_dir=None, snapshot_every: int = 1000,
+                 poll_interval: float | None = None, job_workers: int = 1):
+        """
+        :param workspaces: Initial workspaces
+        :param max_resident_workspaces: Maximum number of workspaces kept in memory; the least
+                                        recently used ones are spilled to snapshot_dir (None for no limit)
+        :param snapshot_dir: Directory for snapshots of evicted workspaces (a temporary one if None)
+        :param memory_budget: Maximum estimated bytes of workspaces kept in memory, session views
+                              included; the least recently used ones are spilled beyond it (None for no limit)
+        :param persist_dir: Directory where workspaces, their graph edits and filters are kept across
+                            restarts (None to keep nothing)
+        :param snapshot_every: Number of logged graph edits after which a persisted graph is compacted
+        :param poll_interval: Seconds between checks of the data source files; changed files are
+                              reloaded into the workspaces as diffs (None to not watch them)
+        :param job_workers: Number of background jobs (see start_workspace_creation) run at once
+        """
+        # Sessions keyed by id; callers that pass no session share the default one
+        self.sessions: Dict[str, Session] = {}
+        self._default_session = Session(None)
+        # Guards the sessions; the registry and each workspace (ws.lock) guard themselves
+        self._lock = threading.RLock()
+        # Session id -> workspace id -> (filters, visualizer id) of views persisted before a restart
+        self._restored_views: Dict[str, Dict[str, tuple]] = {}
+        self.persistence = WorkspacePersistence(persist_dir, snapshot_every) if persist_dir is not None else None
+        # Data source identifier -> diffs of its reloads not yet applied to every workspace,
+        # and the number of earlier ones dropped: a workspace's source_version counts the
+        # reloads its graph includes. Guarded by _reload_lock, like the two below
+        self._source_diffs: Dict[str, List[GraphDiff]] = {}
+        self._source_trimmed: Dict[str, int] = {}
+        # Evicted workspace id -> (data source identifier, source_version)
+        self._evicted_sources: Dict[str, Tuple[str, int]] = {}
+        self._reload_lock = threading.Lock()
+        # Workspace whose graph the calling thread is changing (see _writable_graph)
+        self._writing = threading.local()
+        # Workspace id -> feed of its base graph's changes, guarded by _lock
+        self._feeds: Dict[str, ChangeFeed] = {}
         self.service_plugin = PluginService()
-        self.service_plugin.load_plugins("graph_explorer.visualizers")
-        self.service_plugin.load_plugins("sok.plugins.datasource")
+        self.service_plugin.load_plugins(VISUALIZATION_GROUP)
+        self.service_plugin.load_plugins(DATASOURCE_GROUP)
+        self.workspaces = WorkspaceRegistry(store=WorkspaceStore(snapshot_dir),
+                                            loader=self._restore_workspace,
+                                            max_resident=max_resident_workspaces,
+                                            on_evict=self._workspace_evicted,
+                                            memory=MemoryManager(memory_budget, self._workspace_footprint))
+        for ws in workspaces or []:
+            self.workspaces.add(ws)
+        if self.persistence is not None:
+            self._restore_persisted()
+        self.source_watcher = None
+        if poll_interval is not None:
+            self.source_watcher = SourceWatcher(lambda: self.service_plugin.get_plugins(DATASOURCE_GROUP),
+                                                self.reload_data_source, poll_interval)
+            self.source_watcher.start()
+        self.jobs = JobQueue(max_workers=job_workers)
         self.command_processor = CommandProcessor()
         self.command_processor.register(Command.FILTER_GRAPH,self.filter_graph)
         self.command_processor.register(Command.CREATE_WORKSPACE,self.create_workspace)
@@ -31,89 +91,401 @@ class Application:
         self.command_processor.register(Command.EDIT_EDGE, self.edit_edge)
         self.command_processor.register(Command.CLEAR_GRAPH, self.clear_graph)
         self.command_processor.register(Command.SEARCH_GRAPH, self.search_graph)
+        self.command_processor.register(Command.EXECUTE_SCRIPT, self.execute_script)
+
+    @property
+    def current_workspace_id(self):
+        """Workspace selected in the default session."""
+        return self._default_session.current_workspace_id
+
+    @current_workspace_id.setter
+    def current_workspace_id(self, value):
+        self._default_session.current_workspace_id = value
+
+    def session(self, session_id: str | None = None) -> Session:
+        """
+        Return the session with the given id, creating it on first use.
+        With no id, return the default session.
+        """
+        if session_id is None:
+            return self._default_session
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                # New sessions are rare enough to pay for dropping idle ones
+                self.prune_sessions(SESSION_IDLE_TIMEOUT)
+                session = Session(session_id)
+                for workspace_id, (filters, visualizer_id) in self._restored_views.pop(session_id, {}).items():
+                    session.restore_view(workspace_id, filters, visualizer_id)
+                self.sessions[session_id] = session
+        session.touch()
+        return session
+
+    def close_session(self, session_id: str) -> None:
+        """Forget a session and close its views."""
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def prune_sessions(self, max_idle: float) -> int:
+        """
+        Close sessions unused for more than max_idle seconds.
+
+        :return: Number of sessions closed
+        """
+        with self._lock:
+            idle = [s for s in self.sessions.values() if time.monotonic() - s.last_access > max_idle]
+            for session in idle:
+                del self.sessions[session.id]
+        for session in idle:
+            session.close()
+        return len(idle)
+
+    def current_workspace(self, session: str | None = None) -> Workspace | None:
+        """Return the workspace selected in the given session, or None."""
+        return self.get_workspace(self.session(session).current_workspace_id)
+
+    def current_view(self, session: str | None = None) -> WorkspaceView | None:
+        """
+        Return the session's view of its selected workspace, or None.
+
+        The default session works on the workspace itself, so its filters are the
+        workspace's own.
+        """
+        ws = self.current_workspace(session)
+        if ws is None or session is None:
+            return ws
+        view = self.session(session).view(ws)
+        if self.persistence is not None:
+            self.persistence.watch_view(ws.id, session, view)
+        return view
+
+    def change_feed(self, workspace_id: str) -> ChangeFeed | None:
+        """
+        Return the feed of the changes made to a workspace's base graph, by any session or
+        by data source reloads, or None if there is no such workspace. Subscribing to it
+        doesn't keep the workspace in memory: its subscriptions are closed when it is evicted.
+        """
+        ws = self.get_workspace(workspace_id)
+        if ws is None:
+            return None
+        with self._lock:
+            feed = self._feeds.get(workspace_id)
+            if feed is None or feed.graph is not ws.graph_reference:
+                feed = self._feeds[workspace_id] = ChangeFeed(ws.graph_reference)
+            return feed
 
     def filter_graph(self, **kwargs):
         name = kwargs.get("name")
         filter : Filter = kwargs.get("filter")
         if name:
-            return [ws.add_filter(filter) for ws in self.workspaces if ws.name == name]
-        return None
+            return [ws.add_filter(filter) for ws in self.workspaces.by_name(name)]
+        self._current_view(kwargs.get("session")).add_filter(filter)
+        return f"Filter applied: {filter}"
 
-    def search_graph(self, query: str, **kwargs):
-        return [ws.graph for ws in self.workspaces if query in ws.graph.name]
+    def search_graph(self, value, session=None, **kwargs):
+        self._current_view(session).add_search(Search(value=value))
+        return f"Search applied: {value}"
 
     def create_workspace(self, **kwargs):
-        data_plugins = self.service_plugin.get_plugins("sok.plugins.datasource")
-        visualizer_plugins = self.service_plugin.get_plugins("graph_explorer.visualizers")
-        data_plugin_name = kwargs.get("data_plugin")
-        visualizer_name = kwargs.get("visualizer")
-        data_plugin = next((p for p in data_plugins if p.__class__.__name__ == data_plugin_name ), None)
-        visualizer = next((p for p in visualizer_plugins if p.__class__.__name__ == visualizer_name ), None)
-
-        workspace = kwargs.get("workspace")
-        ws = Workspace(visualizer_id=visualizer.identifier(), data_source_plugin=data_plugin,name=workspace)
-        self.current_workspace_id = ws.id
-        self.workspaces.append(ws)
+        ws = self._build_workspace(kwargs.get("data_plugin"), kwargs.get("visualizer"), kwargs.get("workspace"))
+        self.session(kwargs.get("session")).current_workspace_id = ws.id
+
+    def start_workspace_creation(self, data_plugin: str, visualizer: str, workspace: str | None = None,
+                                 session: str | None = None) -> Job:
+        """
+        Create a workspace in the background, for datasets too large to load within a request.
+
+        The job goes from QUEUED to LOADING while the data source plugin loads the data,
+        reporting its progress (DataSourcePlugin.report_progress), then INDEXING while the
+        workspace is built, and ends READY with the workspace id as result, the workspace
+        being selected in the session; or FAILED with the error.
+
+        :param data_plugin: Identifier or class name of the data source plugin
+        :param visualizer: Identifier or class name of the visualizer
+        :param workspace: Name of the workspace
+        :param session: Session that gets the workspace selected, and owns the job
+        :return: The queued job, also found in `jobs`
+        """
+        def create(job: Job) -> str:
+            ws = self._build_workspace(data_plugin, visualizer, workspace, job)
+            self.session(session).current_workspace_id = ws.id
+            return ws.id
+
+        return self.jobs.submit(f"Create workspace {workspace or ''}".strip(), create, owner=session)
+
+    def _build_workspace(self, data_plugin_id: str, visualizer_id: str, name: str | None,
+                         job: Job | None = None) -> Workspace:
+        """Load a workspace from a data source and register it, reporting progress to a job if given."""
+        data_plugin = self.service_plugin.get_plugin(DATASOURCE_GROUP, data_plugin_id)
+        if data_plugin is None:
+            raise ValueError(f"Unknown data source plugin: {data_plugin_id}")
+        visualizer = self.service_plugin.get_plugin(VISUALIZATION_GROUP, visualizer_id)
+        if visualizer is None:
+            raise ValueError(f"Unknown visualizer: {visualizer_id}")
+
+        if job is None:
+            graph = load_base_graph(data_plugin)
+        else:
+            job.update(JobState.LOADING, step="Loading data")
+            with reporting_progress(lambda done, step: job.update(progress=done * LOAD_SHARE, step=step)):
+                graph = load_base_graph(data_plugin)
+            job.update(JobState.INDEXING, progress=LOAD_SHARE, step="Filtering graph")
+        ws = Workspace(visualizer_id=visualizer.identifier(), data_source_plugin=data_plugin, name=name,
+                       graph=graph)
+        with self._reload_lock:
+            # Freshly loaded data already includes every reload
+            ws.source_version = self._source_version(data_plugin.identifier())
+        if self.persistence is not None:
+            if job is not None:
+                job.update(progress=0.9, step="Saving workspace")
+            self.persistence.attach(ws)
+        self.workspaces.add(ws)
+        return ws
+
     def select_workspace(self, **kwargs):
-        self.current_workspace_id = kwargs.get("id")
+        self.session(kwargs.get("session")).current_workspace_id = kwargs.get("id")
 
     def select_visualizer(self, **kwargs):
-        ws = next((w for w in self.workspaces if w.id == self.current_workspace_id), None)
-        if ws:
-            ws.visualizer_id = kwargs.get("visualizer", ws.visualizer_id)
+        view = self.current_view(kwargs.get("session"))
+        if view:
+            view.visualizer_id = kwargs.get("visualizer", view.visualizer_id)
 
-    def _current_graph(self) -> Graph:
-        ws = next((w for w in self.workspaces if w.id == self.current_workspace_id), None)
+    def get_workspace(self, workspace_id) -> Workspace | None:
+        """Return the workspace with the given id, or None."""
+        return self.workspaces.get(workspace_id)
+
+    def _restore_workspace(self, state: Dict[str, Any]) -> Workspace:
+        """Rebuild an evicted workspace from its snapshot."""
+        data_plugin = self.service_plugin.get_plugin(DATASOURCE_GROUP, state["data_source"])
+        ws = Workspace.from_snapshot(state, data_plugin)
+        with self._reload_lock:
+            self._evicted_sources.pop(ws.id, None)
+            self._apply_source_diffs([ws])
+            self._trim_source_diffs(data_plugin.identifier())
+        if self.persistence is not None:
+            self.persistence.attach(ws)
+        return ws
+
+    def reload_data_source(self, plugin) -> int:
+        """
+        Apply the changes of a data source's files to the workspaces loaded from it.
+
+        The plugin computes a diff against its previous load (DataSourcePlugin.reload_data),
+        which is applied to every resident base graph as one batch of change events, so
+        filters are kept and only changed nodes and edges are touched. Evicted workspaces
+        get the diff when they are reloaded.
+
+        :param plugin: The data source plugin whose files changed
+        :return: Number of changed nodes and edges
+        """
+        with self._reload_lock:
+            diff = plugin.reload_data()
+            if not diff:
+                return 0
+            self._source_diffs.setdefault(plugin.identifier(), []).append(diff)
+            self._apply_source_diffs([ws for ws in self.workspaces.resident()
+                                      if ws.data_source_plugin.identifier() == plugin.identifier()])
+            self._trim_source_diffs(plugin.identifier())
+        return len(diff)
+
+    def _source_version(self, identifier: str) -> int:
+        """Number of reloads of a data source. Called with _reload_lock held."""
+        return self._source_trimmed.get(identifier, 0) + len(self._source_diffs.get(identifier, ()))
+
+    def _apply_source_diffs(self, workspaces) -> None:
+        """
+        Bring workspaces up to date with the reloads of their data source.
+        Called with _reload_lock held.
+        """
+        for ws in workspaces:
+            identifier = ws.data_source_plugin.identifier()
+            diffs = self._source_diffs.get(identifier, [])
+            missing = diffs[max(ws.source_version - self._source_trimmed.get(identifier, 0), 0):]
+            if missing:
+                with ws.lock.write():
+                    for diff in missing:
+                        ws.graph_reference.apply_diff(diff)
+            ws.source_version = self._source_version(identifier)
+
+    def _trim_source_diffs(self, identifier: str) -> None:
+        """
+        Drop the diffs of a data source that every workspace loaded from it already has.
+        Called with _reload_lock held.
+        """
+        diffs = self._source_diffs.get(identifier)
+        if not diffs:
+            return
+        trimmed = self._source_trimmed.get(identifier, 0)
+        versions = [ws.source_version for ws in self.workspaces.resident()
+                    if ws.data_source_plugin.identifier() == identifier]
+        versions.extend(version for source, version in self._evicted_sources.values() if source == identifier)
+        applied = min(min(versions, default=trimmed + len(diffs)), trimmed + len(diffs)) - trimmed
+        if applied > 0:
+            del diffs[:applied]
+            self._source_trimmed[identifier] = trimmed + applied
+
+    def _restore_persisted(self) -> None:
+        """Bring back the workspaces and session views persisted before a restart."""
+        def plugin_lookup(identifier):
+            return self.service_plugin.get_plugin(DATASOURCE_GROUP, identifier)
+
+        for ws, views in self.persistence.restore_all(plugin_lookup):
+            # Rebuilt from the data source as it is now: no reload of this process to catch up on
+            ws.source_version = 0
+            self.workspaces.add(ws)
+            for session_id, view in views.items():
+                self._restored_views.setdefault(session_id, {})[ws.id] = (view["filters"], view["visualizer_id"])
+
+    def _workspace_footprint(self, ws: Workspace) -> Footprint:
+        """Estimate the memory held by a workspace and the session views open on it."""
+        with self._lock:
+            sessions = list(self.sessions.values())
+        views = [v for v in (s.open_view(ws.id) for s in sessions) if v is not None]
+        return estimate_workspace_footprint(ws, views)
+
+    def memory_usage(self) -> List[Tuple[WorkspaceEntry, Dict[str, int] | None]]:
+        """
+        Measure each resident workspace with the session views open on it (see
+        WorkspaceView.memory_usage), largest first. Evicted workspaces follow with None.
+        """
+        with self._lock:
+            sessions = list(self.sessions.values())
+        resident = {ws.id: ws for ws in self.workspaces.resident()}
+        measured, evicted = [], []
+        for entry in self.workspaces.entries():
+            ws = resident.get(entry.id)
+            if ws is None:
+                evicted.append((entry, None))
+                continue
+            views = [v for v in (s.open_view(ws.id) for s in sessions) if v is not None]
+            measured.append((entry, ws.memory_usage(views)))
+        measured.sort(key=lambda item: item[1]["total"], reverse=True)
+        return measured + evicted
+
+    def _workspace_evicted(self, ws: Workspace) -> None:
+        """Close session views of an evicted workspace, keeping their filters for later."""
+        with self._lock:
+            sessions = list(self.sessions.values())
+            feed = self._feeds.pop(ws.id, None)
+        if feed is not None:
+            feed.close()
+        for session in sessions:
+            session.suspend_view(ws.id)
+        if self.persistence is not None:
+            self.persistence.detach(ws.id)
+        with self._reload_lock:
+            self._evicted_sources[ws.id] = (ws.data_source_plugin.identifier(), ws.source_version)
+
+    def _current_workspace(self, session=None) -> Workspace:
+        ws = self.current_workspace(session)
         if not ws:
             raise ValueError("No active workspace.")
-        return ws.graph_reference  # koristimo originalni graph, ne filtrirani
+        return ws
+
+    def _current_view(self, session=None) -> WorkspaceView:
+        view = self.current_view(session)
+        if not view:
+            raise ValueError("No active workspace.")
+        return view
+
+    def _current_graph(self, session=None) -> Graph:
+        return self._current_workspace(session).graph_reference  # koristimo originalni graph, ne filtrirani
+
+    @contextmanager
+    def _writable_graph(self, session=None):
+        """Yield the current workspace's original graph while holding its write lock."""
+        ws = getattr(self._writing, "workspace", None)
+        if ws is not None:
+            # A command of a script: it runs on the script's workspace, already locked,
+            # which is refreshed once the script is done
+            yield ws.graph_reference
+            return
+        # Kept from eviction while in use, so the change isn't made to a dropped copy
+        with self.workspaces.using(self.session(session).current_workspace_id) as ws:
+            if ws is None:
+                raise ValueError("No active workspace.")
+            try:
+                with ws.lock.write():
+                    self._writing.workspace = ws
+                    yield ws.graph_reference
+            finally:
+                self._writing.workspace = None
+                # The graph may have grown past the memory budget
+                self.workspaces.refresh(ws.id)
+
+    def create_node(self, id: str, properties=None, session=None):
+        with self._writable_graph(session) as graph:
+            from api.model import Node
 
-    def create_node(self, id: str, properties=None):
-        graph = self._current_graph()
-        from api.model import Node
+            props = properties or {}
+            props["id"] = id
 
-        props = properties or {}
-        props["id"] = id
+            node = Node(id=id, data=props)
+            graph.add_node(node)
+            return f"Node {id} created."
 
-        node = Node(id=id, data=props)
-        graph.add_node(node)
-        return f"Node {id} created."
+    def create_edge(self, origin_id: str, target_id: str, properties=None, session=None):
+        with self._writable_graph(session) as graph:
+            from api.model import Edge
+            origin = graph.get_node(origin_id)
+            target = graph.get_node(target_id)
+            if not origin or not target:
+                raise ValueError(f"Missing nodes {origin_id}, {target_id}")
+            edge = Edge(origin=origin, target=target, data=properties or {})
+            graph.add_edge(edge)
+            return f"Edge from {origin_id} to {target_id} created."
 
-    def create_edge(self, origin_id: str, target_id: str, properties=None):
-        graph = self._current_graph()
-        from api.model import Edge
-        origin = graph.get_node(origin_id)
-        target = graph.get_node(target_id)
-        if not origin or not target:
-            return f"Error: Missing nodes {origin_id}, {target_id}"
-        edge = Edge(origin=origin, target=target, data=properties or {})
-        graph.add_edge(edge)
-        return f"Edge from {origin_id} to {target_id} created."
+    def delete_node(self, id: str, session=None, **_):
+        with self._writable_graph(session) as graph:
+            graph.remove_node(id)
+            return f"Node {id} deleted."
 
-    def delete_node(self, id: str, **_):
-        graph = self._current_graph()
-        graph.remove_node(id)
-        return f"Node {id} deleted."
+    def delete_edge(self, origin_id: str, target_id: str, session=None, **_):
+        with self._writable_graph(session) as graph:
+            graph.remove_edge(origin_id, target_id)
+            return f"Edge from {origin_id} to {target_id} deleted."
 
-    def delete_edge(self, origin_id: str, target_id: str, **_):
-        graph = self._current_graph()
-        graph.remove_edge(origin_id, target_id)
-        return f"Edge from {origin_id} to {target_id} deleted."
+    def edit_node(self, id: str, properties=None, session=None):
+        with self._writable_graph(session) as graph:
+            graph.update_node(id, properties or {})
+            return f"Node {id} updated."
 
-    def edit_node(self, id: str, properties=None):
-        graph = self._current_graph()
-        graph.update_node(id, properties or {})
-        return f"Node {id} updated."
+    def edit_edge(self, origin_id: str, target_id: str, properties=None, session=None):
+        with self._writable_graph(session) as graph:
+            graph.update_edge(origin_id, target_id, properties or {})
+            return f"Edge from {origin_id} to {target_id} updated."
 
-    def edit_edge(self, origin_id: str, target_id: str, properties=None):
-        graph = self._current_graph()
-        graph.update_edge(origin_id, target_id, properties or {})
-        return f"Edge from {origin_id} to {target_id} updated."
+    def clear_graph(self, session=None):
+        with self._writable_graph(session) as graph:
+            graph.clear()
+            return "Graph cleared."
 
-    def clear_graph(self):
-        graph = self._current_graph()
-        graph.clear()
-        return "Graph cleared."
+    def execute_script(self, script, session=None, **_):
+        """
+        Parse a multi-line script (or list of commands) up front and run it against the
+        current graph as one transaction, so observers are notified and the workspace is
+        refiltered only once. Returns one result per command.
 
+        If a command fails, the script stops and the graph changes of the commands before
+        it are undone (Graph.transaction): their results are marked "rolled_back", and the
+        commands after it are reported as not executed.
+        """
+        parsed = self.command_processor.parse_script(script)
+        results = []
+        try:
+            with self._writable_graph(session) as graph, graph.transaction():
+                results = self.command_processor.execute_batch(parsed, stop_on_error=True, session=session)
+                if results and not results[-1]["success"]:
+                    raise _ScriptFailed()
+        except _ScriptFailed:
+            for result in results[:-1]:
+                result.update(success=False, rolled_back=True)
+            results.extend({"command": line, "success": False, "output": "Not executed"}
+                           for line, _, _ in parsed[len(results):])
+        return results
 
 
+class _ScriptFailed(Exception):
+    """Raised to roll back a script whose last command failed."""
@@ -0,0 +1,119 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+class ReadWriteLock(object):
+    """
+    Writer-preferring reader/writer lock.
+
+    Any number of threads may hold the lock for reading at the same time; a writer
+    gets exclusive access. Waiting writers block new readers, so a steady stream of
+    reads can't starve writes.
+
+    The lock is reentrant: a thread holding it for writing may acquire it again for
+    writing or reading, and a reader may nest reads. Upgrading a read to a write is
+    not supported and raises RuntimeError, since two upgrading readers would deadlock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def _read_depth(self) -> int:
+        return getattr(self._local, "reads", 0)
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and not self._read_depth():
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+            self._local.reads = self._read_depth() + 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            self._local.reads = self._read_depth() - 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if self._read_depth():
+                raise RuntimeError("Cannot upgrade a read lock to a write lock.")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def try_acquire_write(self) -> bool:
+        """
+        Acquire the lock for writing only if no thread, the calling one included, holds
+        or waits for it.
+
+        :return: True if the lock was acquired, to be released with release_write()
+        """
+        with self._cond:
+            if self._writer is not None or self._readers or self._waiting_writers:
+                return False
+            self._writer = threading.get_ident()
+            self._write_depth = 1
+            return True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Hold the lock for reading for the duration of the block."""
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively for the duration of the block."""
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+
+_locks = weakref.WeakKeyDictionary()
+_locks_guard = threading.Lock()
+
+
+def lock_for(obj) -> ReadWriteLock:
+    """
+    Get the ReadWriteLock associated with an object, creating it on first use.
+
+    The lock lives as long as the object does. Used to give every base graph one
+    lock, shared by all workspaces built on it.
+    """
+    with _locks_guard:
+        lock = _locks.get(obj)
+        if lock is None:
+            lock = ReadWriteLock()
+            _locks[obj] = lock
+        return lock
@@ -1,2 +1,5 @@
 DATASOURCE_GROUP='sok.plugins.datasource'
-VISUALIZATION_GROUP='graph_explorer.visualizers'
\ No newline at end of file
+VISUALIZATION_GROUP='graph_explorer.visualizers'
+
+# Sessions unused for this many seconds are closed when new sessions arrive
+SESSION_IDLE_TIMEOUT = 60 * 60
@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Default number of worker threads, and of jobs admitted at once (running or queued)
+MAX_WORKERS = 4
+MAX_PENDING = 64
+
+# Prefix of the worker thread names
+THREAD_PREFIX = "graph-worker"
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised when the executor already holds its maximum of pending jobs."""
+
+
+def _call(context: contextvars.Context, func: Callable, args: tuple, kwargs: dict) -> Any:
+    """Run a job in its caller's context, e.g. to record its spans in the request's trace."""
+    return context.run(func, *args, **kwargs)
+
+
+class GraphExecutor(object):
+    """
+    Bounded thread pool running the CPU-heavy graph work of async views (filtering,
+    rendering, plugin loading) off the event loop, so slow requests don't hold up cheap ones.
+
+    Threads rather than processes: graphs live in this process and are shared by all
+    workspaces, so they can't be shipped to other processes cheaply.
+
+    At most max_pending jobs are admitted; beyond that run() raises ExecutorBusy instead
+    of queueing without bound. Cancelling the awaiting task, as the ASGI handler does when
+    the client disconnects, drops a job that hasn't started; a running job completes and
+    its result is discarded.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING):
+        """
+        :param max_workers: Number of worker threads
+        :param max_pending: Number of jobs admitted at once, running or queued
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=THREAD_PREFIX)
+        # A thread semaphore: under WSGI every async request runs in its own event loop
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a function in the pool and wait for its result.
+
+        :raises ExecutorBusy: If max_pending jobs are already admitted
+        :return: The function's result
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorBusy(f"{self.max_pending} graph jobs already pending")
+        try:
+            future = self._pool.submit(_call, contextvars.copy_context(), func, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Cancelled futures are done too, so the slot is freed either way
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers, dropping the jobs that haven't started."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,154 @@
+import sys
+import threading
+from itertools import islice
+from typing import Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from api.model import Graph
+
+# Number of nodes and edges measured to estimate the average element size of a graph
+SAMPLE_SIZE = 64
+
+
+def _element_size(element) -> int:
+    """Approximate size of a node or edge: the object, its attributes and its data values."""
+    size = sys.getsizeof(element)
+    attributes = getattr(element, "__dict__", None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+    data = element.data
+    size += sys.getsizeof(data)
+    for value in data.values():
+        size += sys.getsizeof(value)
+    return size
+
+
+def _sampled_size(elements, sample_size: int) -> int:
+    """Estimate the total size of a collection's elements from a sample of them."""
+    count = len(elements)
+    if not count:
+        return 0
+    sample = list(islice(iter(elements), sample_size))
+    return sum(_element_size(e) for e in sample) * count // len(sample)
+
+
+def estimate_graph_size(graph: Graph, sample_size: int = SAMPLE_SIZE) -> int:
+    """
+    Estimate the memory held by a graph, in bytes.
+
+    The average node and edge size is measured on a sample, so the cost does not grow
+    with the graph. Keys shared by all nodes and interned strings are counted per value,
+    which makes the estimate err on the high side.
+
+    :param graph: The graph to measure
+    :param sample_size: Number of nodes and edges measured
+    :return: Estimated size in bytes
+    """
+    return (sys.getsizeof(graph.nodes) + sys.getsizeof(graph.edges)
+            + _sampled_size(graph.nodes, sample_size)
+            + _sampled_size(graph.edges, sample_size))
+
+
+def estimate_view_size(graph: Graph) -> int:
+    """
+    Estimate the memory held by a filtered graph that shares its nodes and edges with
+    a base graph: only its own node and edge sets.
+    """
+    return sys.getsizeof(graph) + sys.getsizeof(graph.nodes) + sys.getsizeof(graph.edges)
+
+
+class Footprint(NamedTuple):
+    """Estimated memory of a workspace, split into what it shares and what it owns."""
+    # Key of the base graph, which may be shared by several workspaces
+    shared_key: Hashable
+    # Size of the base graph, counted once per shared_key
+    shared: int
+    # Size of everything only this workspace holds (filtered graphs, views)
+    own: int
+
+
+def estimate_workspace_footprint(workspace, views: Iterable = ()) -> Footprint:
+    """
+    Estimate the memory held by a workspace.
+
+    :param workspace: The workspace to measure
+    :param views: Further views of the workspace (e.g. session views) to count as its own
+    :return: The workspace footprint
+    """
+    base = workspace.graph_reference
+    own = estimate_view_size(workspace.graph)
+    for view in views:
+        own += estimate_view_size(view.graph)
+    return Footprint(id(base), estimate_graph_size(base), own)
+
+
+class MemoryManager(object):
+    """
+    Tracks the estimated memory footprint of resident workspaces against a byte budget.
+
+    Base graphs shared by several workspaces are counted once; workspaces built by the
+    application each own theirs (see load_base_graph). Footprints are estimates refreshed by measure(); the manager never frees
+    anything itself, it tells the WorkspaceRegistry when to evict.
+    """
+
+    def __init__(self,
+                 budget: Optional[int] = None,
+                 estimator: Callable[[object], Footprint] = estimate_workspace_footprint):
+        """
+        :param budget: Maximum estimated bytes of resident workspaces (None for no limit)
+        :param estimator: Computes the Footprint of a workspace
+        """
+        self._budget = budget
+        self._estimator = estimator
+        self._footprints: Dict[str, Footprint] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def budget(self) -> Optional[int]:
+        """Maximum estimated bytes of resident workspaces, or None for no limit."""
+        return self._budget
+
+    def measure(self, workspace) -> int:
+        """
+        Estimate and record the footprint of a workspace.
+
+        A workspace whose graph is being changed by another thread keeps its previous
+        estimate; measuring never waits for the workspace lock.
+
+        :return: The estimated bytes of the workspace, shared part included
+        """
+        try:
+            footprint = self._estimator(workspace)
+        except RuntimeError:
+            # The base graph changed size while it was being sampled
+            footprint = self._footprints.get(workspace.id)
+            if footprint is None:
+                return 0
+        with self._lock:
+            self._footprints[workspace.id] = footprint
+        return footprint.shared + footprint.own
+
+    def forget(self, workspace_id: str) -> None:
+        """Stop tracking a workspace that was evicted or removed."""
+        with self._lock:
+            self._footprints.pop(workspace_id, None)
+
+    def footprint(self, workspace_id: str) -> Optional[Footprint]:
+        """The last recorded footprint of a workspace, or None."""
+        with self._lock:
+            return self._footprints.get(workspace_id)
+
+    def footprints(self) -> List[Tuple[str, Footprint]]:
+        """Recorded footprints of all tracked workspaces, largest first."""
+        with self._lock:
+            items = list(self._footprints.items())
+        return sorted(items, key=lambda item: item[1].shared + item[1].own, reverse=True)
+
+    def total(self) -> int:
+        """Estimated bytes of all tracked workspaces, counting each shared base graph once."""
+        with self._lock:
+            shared = {f.shared_key: f.shared for f in self._footprints.values()}
+            return sum(shared.values()) + sum(f.own for f in self._footprints.values())
+
+    def over_budget(self) -> bool:
+        """Whether the tracked workspaces exceed the budget."""
+        return self._budget is not None and self.total() > self._budget
@@ -1,7 +1,12 @@
 from .base_filter import BaseFilter
 from .filter import Filter
+from .edge_filter import EdgeFilter
 from .search import Search
-from .workspace import Workspace
+from .filter_expression import CompositeFilter, And, Or, Not, SelectivityEstimator, parse_filter_expression, plan, split_targets
+from .filter_cache import FilterResultCache
+from .workspace import Workspace, WorkspaceView
+from .session import Session
+from .registry import WorkspaceRegistry, WorkspaceEntry
 from .command_processor import *
 
-__all__ = ['BaseFilter', 'Filter', 'Search', 'Workspace']
+__all__ = ['BaseFilter', 'Filter', 'EdgeFilter', 'Search', 'CompositeFilter', 'And', 'Or', 'Not', 'SelectivityEstimator', 'parse_filter_expression', 'plan', 'split_targets', 'FilterResultCache', 'Workspace', 'WorkspaceView', 'Session', 'WorkspaceRegistry', 'WorkspaceEntry']
@@ -0,0 +1,127 @@
+import operator
+import threading
+from datetime import date
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from api.model import Edge, Node
+
+from .filter import Filter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; filters are then evaluated node by node
+    np = None
+
+# Column dtype of each attribute value type; other types are kept in object arrays
+_DTYPES = {int: "int64", float: "float64", bool: "bool", date: "datetime64[D]"}
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def available() -> bool:
+    """Whether NumPy is installed, i.e. whether filters can be evaluated on columns."""
+    return np is not None
+
+
+class Column(NamedTuple):
+    """Values of one attribute, for the items where it has one type."""
+    values: Any
+    # True where the item has the attribute with exactly this type
+    valid: Any
+
+
+class AttributeColumns(object):
+    """
+    Typed NumPy columns of the attributes of a fixed sequence of nodes or edges, built on
+    demand, and whole-column evaluation of filters on them.
+
+    Filter.apply only matches values of exactly the filter value's type, so columns are
+    keyed by attribute and type: the `rating` column for floats is valid where the rating
+    is a float and invalid where it is missing or has another type.
+    """
+
+    def __init__(self, items: Sequence[Node | Edge]):
+        """
+        :param items: The items, in the order of the column rows
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for column evaluation")
+        self._items = items
+        self._columns: Dict[Tuple[str, type], Column] = {}
+        self._lock = threading.Lock()
+
+    def column(self, attribute: str, value_type: type) -> Column:
+        """
+        Get the column of an attribute's values of one type, building it on first use.
+
+        :param attribute: The attribute name
+        :param value_type: The value type the column holds
+        :return: The values and their validity mask
+        """
+        key = (attribute, value_type)
+        with self._lock:
+            column = self._columns.get(key)
+            if column is None:
+                column = self._columns[key] = self._build(attribute, value_type)
+            return column
+
+    def _build(self, attribute: str, value_type: type) -> Column:
+        raw = [item.data.get(attribute) for item in self._items]
+        valid = np.fromiter((type(v) is value_type for v in raw), dtype=bool, count=len(raw))
+        # Invalid rows hold a value of the right type so that comparisons never fail
+        fill = next((v for v in raw if type(v) is value_type), None)
+        if fill is None:
+            return Column(np.empty(0), valid)
+        rows = [v if type(v) is value_type else fill for v in raw]
+        dtype = _DTYPES.get(value_type, object)
+        try:
+            values = np.array(rows, dtype=dtype)
+        except OverflowError:
+            # Python ints beyond 64 bits
+            values = np.array(rows, dtype=object)
+        if values.ndim != 1:
+            # Sequences (e.g. tuples) would become extra dimensions; keep them whole
+            values = np.empty(len(rows), dtype=object)
+            values[:] = rows
+        return Column(values, valid)
+
+    def mask(self, filter_: Filter) -> Optional[Any]:
+        """
+        Evaluate a filter on the whole column at once.
+
+        :param filter_: The filter to evaluate
+        :return: Boolean array, True for the items the filter matches, or None if the
+                 filter's value can't be compared as a column
+        """
+        value = filter_.value
+        if value is None:
+            return np.zeros(len(self._items), dtype=bool)
+        column = self.column(filter_.attribute, type(value))
+        if not column.valid.any():
+            return column.valid
+        if column.values.dtype.kind == "M":
+            value = np.datetime64(value, "D")
+        try:
+            result = _OPERATORS[filter_.operator](column.values, value)
+        except (TypeError, OverflowError):
+            return None
+        if not isinstance(result, np.ndarray) or result.shape != column.valid.shape:
+            return None
+        return result.astype(bool, copy=False) & column.valid
+
+    def memory_usage(self) -> int:
+        """Bytes held by the column arrays built so far."""
+        with self._lock:
+            return sum(c.values.nbytes + c.valid.nbytes for c in self._columns.values())
+
+
+def to_bitset(mask) -> int:
+    """Turn a boolean array into an int with bit i set where mask[i] is True."""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
@@ -0,0 +1,19 @@
+from enum import Enum, auto
+
+
+class Command(Enum):
+    CLEAR_GRAPH = auto()
+    EDIT_NODE = auto()
+    EDIT_EDGE = auto()
+    SELECT_VISUALIZER = auto()
+    FILTER_GRAPH = auto()
+    SEARCH_GRAPH = auto()
+    REMOVE_FILTER = auto()
+    CLEAR_SEARCH = auto()
+    CREATE_NODE = auto()
+    CREATE_EDGE = auto()
+    DELETE_EDGE = auto()
+    DELETE_NODE = auto()
+    SELECT_WORKSPACE = auto()
+    CREATE_WORKSPACE = auto()
+    EXECUTE_SCRIPT = auto()
@@ -0,0 +1,242 @@
+import re
+import shlex
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .command import Command
+
+
+class CommandSpec(NamedTuple):
+    """Grammar entry describing how the arguments of a command are compiled."""
+    command: Command
+    # If True, --origin/--target become origin_id/target_id kwargs instead of properties
+    edge_mode: bool = False
+    # Kwarg that receives the rest of the line verbatim (e.g. a filter query)
+    rest: Optional[str] = None
+    # If True, the rest of the line is converted with parse_value
+    convert_rest: bool = False
+    # Error message when the rest of the line is required but missing
+    rest_error: Optional[str] = None
+
+
+class Parameter(NamedTuple):
+    """
+    Placeholder for a value bound when a prepared command is executed, written as {name}.
+    Left unbound, it is the literal text {name}.
+    """
+    name: str
+
+    @property
+    def literal(self) -> str:
+        return "{" + self.name + "}"
+
+
+# Slot targets: a keyword argument of the command, or an entry of its "properties" dict
+KWARG = "kwarg"
+PROPERTY = "property"
+
+# Commands are looked up by their first one or two words
+GRAMMAR: Dict[Tuple[str, ...], CommandSpec] = {
+    ("create", "node"): CommandSpec(Command.CREATE_NODE),
+    ("create", "edge"): CommandSpec(Command.CREATE_EDGE, edge_mode=True),
+    ("delete", "node"): CommandSpec(Command.DELETE_NODE),
+    ("delete", "edge"): CommandSpec(Command.DELETE_EDGE, edge_mode=True),
+    ("edit", "node"): CommandSpec(Command.EDIT_NODE),
+    ("edit", "edge"): CommandSpec(Command.EDIT_EDGE, edge_mode=True),
+    ("clear",): CommandSpec(Command.CLEAR_GRAPH),
+    ("filter",): CommandSpec(Command.FILTER_GRAPH, rest="filter",
+                             rest_error="Missing field/operator/value for filter"),
+    ("search",): CommandSpec(Command.SEARCH_GRAPH, rest="value", convert_rest=True,
+                             rest_error="Missing search value"),
+}
+
+# Option -> (slot in node mode, slot in edge mode)
+OPTIONS: Dict[str, Tuple[Tuple[str, str], Tuple[str, str]]] = {
+    "--id": ((KWARG, "id"), (KWARG, "id")),
+    "--origin": ((PROPERTY, "origin"), (KWARG, "origin_id")),
+    "--target": ((PROPERTY, "target"), (KWARG, "target_id")),
+}
+
+_PARAMETER_RE = re.compile(r"^\{(\w+)\}$")
+# {{name}} is the literal text {name}, even when a parameter called name is bound
+_ESCAPED_RE = re.compile(r"^\{(\{\w+\})\}$")
+_NEEDS_SHLEX_RE = re.compile(r"[\"'\\]")
+
+
+@lru_cache(maxsize=4096)
+def parse_value(val: str):
+    """Convert string to int, float, or bool if possible; fallback to string."""
+    if val.isdigit() or (val.startswith('-') and val[1:].isdigit()):
+        return int(val)
+    elif '.' in val:
+        try:
+            return float(val)
+        except ValueError:
+            return val
+    elif val.lower() in ['true', 'false']:
+        return val.lower() == 'true'
+    return val
+
+
+def tokenize(command_str: str) -> List[str]:
+    """
+    Split a command line into tokens.
+
+    Plain lines are split on whitespace; shlex is only needed when the line
+    contains quotes or escapes.
+    """
+    if _NEEDS_SHLEX_RE.search(command_str):
+        return shlex.split(command_str)
+    return command_str.split()
+
+
+def _compile_value(raw: str, convert: bool = True) -> Any:
+    """Turn a raw token value into a Parameter placeholder or a (converted) constant."""
+    match = _PARAMETER_RE.match(raw)
+    if match:
+        return Parameter(match.group(1))
+    match = _ESCAPED_RE.match(raw)
+    if match:
+        return match.group(1)
+    return parse_value(raw) if convert else raw
+
+
+class PreparedCommand(object):
+    """
+    A compiled CLI command that can be executed many times.
+
+    Values written as {name} are parameters, supplied to bind() on every execution;
+    write {{name}} for the literal text {name}.
+    """
+
+    def __init__(self, text: str, command: Command, slots: Tuple[Tuple[str, str], ...], values: Tuple[Any, ...]):
+        self._text = text
+        self._command = command
+        self._slots = slots
+        self._values = values
+
+    @property
+    def text(self) -> str:
+        """The command line this command was compiled from."""
+        return self._text
+
+    @property
+    def command(self) -> Command:
+        """The Command literal this command dispatches to."""
+        return self._command
+
+    @property
+    def parameters(self) -> Tuple[str, ...]:
+        """Names of the parameters that can be bound at execution."""
+        return tuple(v.name for v in self._values if isinstance(v, Parameter))
+
+    def bind(self, **params) -> Dict[str, Any]:
+        """
+        Build the kwargs for executing the command.
+
+        Bound values are used as given, without string conversion. Only the parameters
+        given are placeholders: the others keep their literal text, so values that merely
+        look like {name} are not lost. A fresh kwargs dict is built on every call, so
+        handlers may mutate it.
+
+        :param params: Values for the command's parameters
+        :return: The kwargs to execute the command with
+        :rtype: Dict[str, Any]
+        """
+        kwargs = {}
+        props = {}
+        for (target, key), value in zip(self._slots, self._values):
+            if isinstance(value, Parameter):
+                value = params.get(value.name, value.literal)
+            if target == KWARG:
+                kwargs[key] = value
+            else:
+                props[key] = value
+        if props:
+            kwargs["properties"] = props
+        return kwargs
+
+    def __repr__(self) -> str:
+        return f"PreparedCommand(command={self._command.name}, text={self._text!r})"
+
+
+class CommandCompiler(object):
+    """
+    Compiles CLI command lines into PreparedCommand objects.
+
+    Commands are resolved through the GRAMMAR and OPTIONS tables. Compiled
+    commands are kept in an LRU cache keyed by the command line, and the slot
+    layout of each command shape (command plus option names) in a second LRU
+    cache, so lines that differ only in their values share one layout.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        """
+        :param cache_size: Maximum number of compiled commands and shapes kept in each cache
+        :type cache_size: int
+        """
+        self.compile = lru_cache(maxsize=cache_size)(self._compile)
+        self._compile_shape = lru_cache(maxsize=cache_size)(self._compile_shape_uncached)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the command and shape caches."""
+        return {"commands": self.compile.cache_info()._asdict(),
+                "shapes": self._compile_shape.cache_info()._asdict()}
+
+    def _compile(self, command_str: str) -> PreparedCommand:
+        """
+        Compile a command line; exposed as the cached `compile` method.
+
+        :raises ValueError: If the command is empty, unknown or incomplete
+        """
+        tokens = tokenize(command_str)
+        if not tokens:
+            raise ValueError("No command given.")
+
+        head = tuple(t.lower() for t in tokens[:2])
+        spec = GRAMMAR.get(head)
+        if spec is None:
+            head = head[:1]
+            spec = GRAMMAR.get(head)
+        if spec is None:
+            raise ValueError(f"Unknown command: {command_str}")
+
+        args = tokens[len(head):]
+
+        if spec.rest is not None:
+            if not args:
+                raise ValueError(spec.rest_error or f"Missing arguments for {' '.join(head)}")
+            value = _compile_value(" ".join(args), convert=spec.convert_rest)
+            return PreparedCommand(command_str, spec.command, ((KWARG, spec.rest),), (value,))
+
+        shape = []
+        values = []
+        i = 0
+        while i < len(args):
+            token = args[i]
+            if token.startswith("--property"):
+                if i + 1 < len(args) and "=" in args[i + 1]:
+                    key, val = args[i + 1].split("=", 1)
+                    shape.append(("--property", key))
+                    values.append(_compile_value(val))
+                    i += 1
+            elif token.startswith("--") and "=" in token:
+                option, val = token.split("=", 1)
+                if option in OPTIONS:
+                    shape.append((option, None))
+                    values.append(_compile_value(val))
+            i += 1
+
+        slots = self._compile_shape(head, tuple(shape))
+        return PreparedCommand(command_str, spec.command, slots, tuple(values))
+
+    def _compile_shape_uncached(self, head: Tuple[str, ...], shape: Tuple[Tuple[str, Optional[str]], ...]) -> Tuple[Tuple[str, str], ...]:
+        """Resolve the slot each option of a command shape is written to."""
+        edge_mode = GRAMMAR[head].edge_mode
+        slots = []
+        for option, key in shape:
+            if option == "--property":
+                slots.append((PROPERTY, key))
+            else:
+                slots.append(OPTIONS[option][1 if edge_mode else 0])
+        return tuple(slots)
@@ -1,31 +1,17 @@
-from enum import Enum, auto
-from typing import Dict, Callable, Any
-import shlex
+from typing import Dict, Callable, Any, List, Tuple, Union
+
+from api.tracing import span
 
 from core.model.filter import Filter
 from core.model.search import Search
-
-
-class Command(Enum):
-    CLEAR_GRAPH = auto()
-    EDIT_NODE = auto()
-    EDIT_EDGE = auto()
-    SELECT_VISUALIZER = auto()
-    FILTER_GRAPH = auto()
-    SEARCH_GRAPH = auto()
-    REMOVE_FILTER = auto()
-    CLEAR_SEARCH = auto()
-    CREATE_NODE = auto()
-    CREATE_EDGE = auto()
-    DELETE_EDGE = auto()
-    DELETE_NODE = auto()
-    SELECT_WORKSPACE = auto()
-    CREATE_WORKSPACE = auto()
+from core.model.command import Command
+from core.model.command_compiler import CommandCompiler, PreparedCommand
 
 class CommandProcessor:
-    def __init__(self):
-        """initializing list of commands"""
+    def __init__(self, cache_size: int = 1024):
+        """initializing list of commands and the compiler with its cache of parsed commands"""
         self.commands: Dict[Command, Callable[..., Any]] = {}
+        self.compiler = CommandCompiler(cache_size)
 
     def register(self, command: Command, func: Callable[..., Any]):
         """This functions serves as to register/bind Command enum literal to actual given function
@@ -38,7 +24,8 @@ class CommandProcessor:
         where calling the command would be self.app.command_processor.execute(COMMAND_NAME,arg1 = some_arg,arg2=....)"""
         if command not in self.commands:
             raise ValueError(f"Unknown command: {command}")
-        return self.commands[command](**kwargs)
+        with span("command_processor.execute", command=command.name.lower()):
+            return self.commands[command](**kwargs)
 
     def parse_and_execute(self, command_str: str) -> Any:
         """
@@ -47,92 +34,111 @@ class CommandProcessor:
         "create edge --origin=1 --target=2 --property type=knows"
         "delete edge --origin=1 --target=2"
         "edit edge --origin=1 --target=2 --property weight=5"
+        "filter rating >= 8"
+        "search Tom"
+        """
+        try:
+            prepared = self.prepare(command_str)
+        except ValueError as e:
+            return str(e)
+        return self.execute_prepared(prepared)
+
+    def prepare(self, command_str: str) -> PreparedCommand:
+        """
+        Compile a command line into a reusable PreparedCommand.
+
+        Values written as {name} become parameters bound at execution time, e.g.
+        prepare("create node --id={id} --property Name={name}").
+
+        :param command_str: The command line
+        :type command_str: str
+        :raises ValueError: If the command is empty, unknown or incomplete
+        :return: The compiled command
+        :rtype: PreparedCommand
+        """
+        return self.compiler.compile(command_str)
+
+    def execute_prepared(self, prepared: PreparedCommand, **params) -> Any:
+        """
+        Execute a PreparedCommand with the given parameter values.
+
+        :param prepared: The compiled command
+        :type prepared: PreparedCommand
+        :param params: Values for the command's parameters
+        :return: The result of the command handler
         """
-        tokens = shlex.split(command_str)
-        if not tokens:
-            return "No command given."
-
-        cmd = tokens[0].lower()
-        entity = tokens[1].lower() if len(tokens) > 1 else None
-
-        if cmd == "create":
-            if entity == "node":
-                kwargs = self._parse_properties(tokens[2:], edge_mode=False)
-                return self.execute(Command.CREATE_NODE, **kwargs)
-            elif entity == "edge":
-                kwargs = self._parse_properties(tokens[2:], edge_mode=True)
-                return self.execute(Command.CREATE_EDGE, **kwargs)
-
-        elif cmd == "delete":
-            if entity == "node":
-                kwargs = self._parse_properties(tokens[2:], edge_mode=False)
-                return self.execute(Command.DELETE_NODE, **kwargs)
-            elif entity == "edge":
-                kwargs = self._parse_properties(tokens[2:], edge_mode=True)
-                return self.execute(Command.DELETE_EDGE, **kwargs)
-
-        elif cmd == "edit":
-            if entity == "node":
-                kwargs = self._parse_properties(tokens[2:], edge_mode=False)
-                return self.execute(Command.EDIT_NODE, **kwargs)
-            elif entity == "edge":
-                kwargs = self._parse_properties(tokens[2:], edge_mode=True)
-                return self.execute(Command.EDIT_EDGE, **kwargs)
-
-        elif cmd == "clear":
-            return self.execute(Command.CLEAR_GRAPH)
-
-        else:
-            return f"Unknown command: {command_str}"
-
-    def _parse_value(self, val: str):
-        """Convert string to int, float, or bool if possible; fallback to string."""
-        if val.isdigit() or (val.startswith('-') and val[1:].isdigit()):
-            return int(val)
-        elif '.' in val:
+        return self.execute(prepared.command, **prepared.bind(**params))
+
+    def parse(self, command_str: str) -> Tuple[Command, Dict[str, Any]]:
+        """
+        Parse a single CLI command into a Command literal and its kwargs without executing it.
+
+        :param command_str: The command line, e.g. "create node --id=1 --property Name=Alice"
+        :type command_str: str
+        :raises ValueError: If the command is empty or not recognized
+        :return: The Command literal and the kwargs to execute it with
+        :rtype: Tuple[Command, Dict[str, Any]]
+        """
+        prepared = self.prepare(command_str)
+        return prepared.command, prepared.bind()
+
+    def parse_script(self, script: Union[str, List[str]]) -> List[Tuple[str, Command, Dict[str, Any]]]:
+        """
+        Parse a batch of commands up front.
+
+        A script is either a multi-line string with one command per line, or a list of
+        command strings. Blank lines and lines starting with '#' are skipped.
+
+        :param script: The commands to parse
+        :type script: str | List[str]
+        :raises ValueError: If any command can't be parsed; the message lists every failing line
+        :return: A list of (command string, Command literal, kwargs) tuples in script order
+        :rtype: List[Tuple[str, Command, Dict[str, Any]]]
+        """
+        lines = script.splitlines() if isinstance(script, str) else list(script)
+
+        parsed = []
+        errors = []
+        for line_no, line in enumerate(lines, start=1):
+            if not isinstance(line, str):
+                errors.append(f"line {line_no}: expected a command string, got {type(line).__name__}")
+                continue
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
             try:
-                return float(val)
-            except ValueError:
-                return val
-        elif val.lower() in ['true', 'false']:
-            return val.lower() == 'true'
-        return val
-
-    def _parse_properties(self, tokens, edge_mode=False):
+                command, kwargs = self.parse(line)
+            except ValueError as e:
+                errors.append(f"line {line_no}: {e}")
+                continue
+            parsed.append((line, command, kwargs))
+
+        if errors:
+            raise ValueError("Script not executed, could not parse:\n" + "\n".join(errors))
+        return parsed
+
+    def execute_batch(self, parsed: List[Tuple[str, Command, Dict[str, Any]]], stop_on_error: bool = False,
+                      **context) -> List[Dict[str, Any]]:
         """
-        Parse CLI tokens into kwargs for node or edge creation/edit.
-        If edge_mode=True, --origin and --target go in kwargs separately.
+        Execute commands returned by parse_script, in order.
+
+        A command fails when its handler raises; its error is reported in its result.
+
+        :param parsed: Commands as returned by parse_script
+        :type parsed: List[Tuple[str, Command, Dict[str, Any]]]
+        :param stop_on_error: Stop at the first failing command, its result being the last one;
+                              otherwise the batch goes on
+        :param context: Extra kwargs passed to every command (e.g. session)
+        :return: One result per command run: {"command": str, "success": bool, "output": Any}
+        :rtype: List[Dict[str, Any]]
         """
-        kwargs = {}
-        props = {}
-        i = 0
-
-        while i < len(tokens):
-            token = tokens[i]
-
-            if token.startswith("--id="):
-                kwargs["id"] = self._parse_value(token.split("=", 1)[1])
-            elif token.startswith("--origin="):
-                val = self._parse_value(token.split("=", 1)[1])
-                if edge_mode:
-                    kwargs["origin_id"] = val
-                else:
-                    props["origin"] = val
-            elif token.startswith("--target="):
-                val = self._parse_value(token.split("=", 1)[1])
-                if edge_mode:
-                    kwargs["target_id"] = val
-                else:
-                    props["target"] = val
-            elif token.startswith("--property"):
-                if i + 1 < len(tokens):
-                    key_val = tokens[i + 1]
-                    if "=" in key_val:
-                        key, val = key_val.split("=", 1)
-                        props[key] = self._parse_value(val)
-                        i += 1
-            i += 1
-
-        if props:
-            kwargs["properties"] = props
-        return kwargs
\ No newline at end of file
+        results = []
+        for line, command, kwargs in parsed:
+            try:
+                output = self.execute(command, **kwargs, **context)
+                results.append({"command": line, "success": True, "output": output})
+            except Exception as e:
+                results.append({"command": line, "success": False, "output": str(e)})
+                if stop_on_error:
+                    break
+        return results
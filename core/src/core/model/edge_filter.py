@@ -0,0 +1,44 @@
+from api.model import Graph
+from api.model.attribute_catalog import AttributeCatalog
+
+from .filter import Filter
+
+
+class EdgeFilter(Filter):
+
+    """
+    Filter on the attributes of edges instead of nodes.
+
+    Views keep the edges matching all their edge filters, e.g. `edge.type == acted_in`,
+    among the edges between the nodes matching their node filters.
+    """
+
+    # Prefix of edge attributes in filter expressions
+    PREFIX = "edge."
+
+    @staticmethod
+    def _catalog(graph: Graph) -> AttributeCatalog:
+        """
+        Get the catalog of the attributes this filter applies to.
+        :return: The graph's edge attribute catalog
+        :rtype: AttributeCatalog
+        """
+        return graph.edge_catalog
+
+    def __hash__(self) -> int:
+        """
+        Hash function for the EdgeFilter instance, distinct from a node Filter on the same attribute.
+
+        :return: Hash value based on attribute, operator, and value
+        :rtype: int
+        """
+        return hash((self.PREFIX, self.attribute, self.operator, self.value))
+
+    def __str__(self) -> str:
+        """
+        String representation of the EdgeFilter instance.
+
+        :return: String representation of the edge filter
+        :rtype: str
+        """
+        return f"EdgeFilter(attribute={self.attribute}, operator={self.operator}, value={self.value})"
@@ -1,7 +1,8 @@
 from api.model.const import DataValue
 from api.model import Edge, Node, Graph
+from api.model.attribute_catalog import AttributeCatalog
 from .base_filter import BaseFilter
-from typing import Optional, Union
+from typing import Optional
 
 class Filter(BaseFilter):
 
@@ -43,21 +44,24 @@ class Filter(BaseFilter):
         if value is not None and not isinstance(value, DataValue):
             raise TypeError(f"Value must be of type DataValue, got {type(value)} instead.")
 
-        # Type validation using graph's attribute type information
-        if graph is not None and attribute in graph.attribute_types:
-            expected_type = graph.get_attribute_type(attribute)
-            if not isinstance(value, expected_type):
-                # Handle Union types (when an attribute can have multiple types)
-                if hasattr(expected_type, '__origin__') and expected_type.__origin__ is Union:
-                    # Check if the value type is one of the union types
-                    union_types = expected_type.__args__
-                    if not any(isinstance(value, t) for t in union_types):
-                        raise TypeError(f"Value type {type(value).__name__} does not match expected type(s) {expected_type.__name__} for attribute '{attribute}'")
-                else:
-                    raise TypeError(f"Value type {type(value).__name__} does not match expected type {expected_type.__name__} for attribute '{attribute}'")
+        # Type validation against the value types observed in the graph, without scanning it
+        if graph is not None and value is not None:
+            types = self._catalog(graph).types(attribute)
+            if types and not any(isinstance(value, t) for t in types):
+                names = ", ".join(t.__name__ for t in types)
+                raise TypeError(f"Value type {type(value).__name__} does not match expected type(s) {names} for attribute '{attribute}'")
 
         self.__key = self.OPERATORS[operator]
 
+    @staticmethod
+    def _catalog(graph: Graph) -> AttributeCatalog:
+        """
+        Get the catalog of the attributes this filter applies to.
+        :return: The graph's node attribute catalog
+        :rtype: AttributeCatalog
+        """
+        return graph.catalog
+
     @property
     def attribute(self) -> str:
         """
@@ -85,6 +89,16 @@ class Filter(BaseFilter):
         """
         return self._value
 
+    @property
+    def expression(self) -> str:
+        """
+        Get the filter written in the filter expression language, e.g. `rating >= 8.0`.
+        :return: The filter expression
+        :rtype: str
+        """
+        from .filter_expression import to_expression
+        return to_expression(self)
+
     def apply(self, comparable: Node | Edge) -> bool:
         """
         Call the filter to process data.
@@ -112,7 +126,7 @@ class Filter(BaseFilter):
         :return: True if both filters have the same attribute, operator, and value, False otherwise
         :rtype: bool
         """
-        if not isinstance(other, Filter):
+        if type(other) is not type(self):
             return False
         return (self._attribute == other._attribute and 
                 self._operator == other._operator and 
@@ -127,6 +141,13 @@ class Filter(BaseFilter):
         """
         return hash((self._attribute, self._operator, self._value))
 
+    def __reduce__(self):
+        """
+        Support pickling (e.g. in workspace snapshots) by rebuilding the filter from its
+        attribute, value and operator; the operator function itself can't be pickled.
+        """
+        return self.__class__, (self._attribute, self._value, self._operator)
+
     def __str__(self) -> str:
         """
         String representation of the Filter instance.
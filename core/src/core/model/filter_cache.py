@@ -0,0 +1,259 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from api.model import Edge, Graph, Node
+from api.model.attribute_catalog import AttributeCatalog
+from api.model.sizing import deep_size
+
+from . import columns
+from .base_filter import BaseFilter
+from .filter import Filter
+from .filter_expression import SAMPLE_SIZE, And, CompositeFilter, Not, Or, SelectivityEstimator, plan, test
+
+# Number of filter results kept per graph
+MAX_FILTERS = 256
+
+
+class _Results(object):
+    """Filter results on a fixed sequence of nodes or edges."""
+
+    def __init__(self, items: Sequence[Node | Edge], catalog: AttributeCatalog):
+        # Bit i of a result is set when items[i] matches the filter
+        self.items = items
+        self.catalog = catalog
+        self.full = (1 << len(items)) - 1
+        self.results: OrderedDict[Tuple[BaseFilter, str], int] = OrderedDict()
+        # Attribute columns, built on the first vectorized evaluation
+        self.columns: columns.AttributeColumns | None = None
+        # Equality index: attribute -> (value type, value) -> positions of the items
+        # holding it, and attribute -> value type -> positions of the items of that type
+        self.values: Dict[str, Dict[tuple, List[int]]] = {}
+        self.types: Dict[str, Dict[type, List[int]]] = {}
+
+    def bits(self, positions: Iterable[int]) -> int:
+        packed = bytearray((len(self.items) + 7) // 8)
+        for i in positions:
+            packed[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(packed, "little")
+
+    def index(self, attribute: str) -> bool:
+        """Build the equality index of an attribute; False if its values can't be hashed."""
+        if attribute in self.values:
+            return True
+        values: Dict[tuple, List[int]] = {}
+        types: Dict[type, List[int]] = {}
+        try:
+            for i, item in enumerate(self.items):
+                value = item.data.get(attribute)
+                if value is not None:
+                    values.setdefault((type(value), value), []).append(i)
+                    types.setdefault(type(value), []).append(i)
+        except TypeError:
+            return False
+        self.values[attribute], self.types[attribute] = values, types
+        return True
+
+
+class _GraphResults(object):
+    """Filter results computed on one version of a graph."""
+
+    def __init__(self, graph: Graph):
+        self.lock = threading.Lock()
+        self.version = graph.version
+        self.nodes = _Results(tuple(graph.nodes), graph.catalog)
+        self._graph = weakref.ref(graph)
+        self._edges: _Results | None = None
+
+    @property
+    def edges(self) -> _Results:
+        """Results on the edges, set up on first use since most views only filter nodes."""
+        if self._edges is None:
+            graph = self._graph()
+            self._edges = _Results(tuple(graph.edges), graph.edge_catalog)
+        return self._edges
+
+
+def _key(filter_: BaseFilter) -> Tuple[BaseFilter, str]:
+    """
+    Cache key of a filter. Filters compare values with ==, so `rating >= 8` equals
+    `rating >= 8.0` although only one of them matches float ratings; the repr tells them apart.
+    """
+    return filter_, repr(filter_)
+
+
+class FilterResultCache(object):
+    """
+    Memo of the nodes and edges each filter matches, stored as bitsets and keyed by
+    graph and filter.
+
+    Results are valid for one graph version (see Graph.version) and are dropped when the
+    graph changes. Combining filters only ANDs bitsets, so adding or removing one filter
+    evaluates at most that filter. The cache holds graphs weakly; one cache is shared by
+    all views on a dataset, so workspaces built on the same base graph reuse each other's
+    results.
+
+    Equality filters are answered from a per-attribute index of the values, built on
+    first use. When NumPy is installed, other comparison filters are evaluated on typed
+    attribute columns (see AttributeColumns) as whole-array operations instead of item
+    by item.
+    """
+
+    def __init__(self, max_filters: int = MAX_FILTERS, vectorized: bool | None = None):
+        """
+        :param max_filters: Number of filter results kept per graph, least recently used first out
+        :param vectorized: Evaluate filters on NumPy columns; defaults to whether NumPy is installed
+        """
+        if vectorized and not columns.available():
+            raise RuntimeError("Vectorized filter evaluation requires NumPy")
+        self._max_filters = max_filters
+        self._vectorized = columns.available() if vectorized is None else vectorized
+        self._graphs: weakref.WeakKeyDictionary[Graph, _GraphResults] = weakref.WeakKeyDictionary()
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _state(self, graph: Graph) -> _GraphResults:
+        with self._guard:
+            state = self._graphs.get(graph)
+            if state is None or state.version != graph.version:
+                state = self._graphs[graph] = _GraphResults(graph)
+            return state
+
+    def matching(self, graph: Graph, filters: Iterable[BaseFilter]) -> Set[Node]:
+        """
+        Get the nodes of a graph matching all filters.
+
+        Cached results are combined first; the missing ones are then evaluated, the
+        cheapest and most selective first (see plan), stopping as soon as no node is left.
+
+        :param graph: The graph to filter
+        :param filters: The filters nodes must all match
+        :return: The matching nodes
+        """
+        state = self._state(graph)
+        with state.lock:
+            return self._matching(state.nodes, filters)
+
+    def matching_edges(self, graph: Graph, filters: Iterable[BaseFilter]) -> Set[Edge]:
+        """
+        Get the edges of a graph matching all filters, like matching() does for nodes.
+
+        :param graph: The graph to filter
+        :param filters: The filters edges must all match
+        :return: The matching edges
+        """
+        state = self._state(graph)
+        with state.lock:
+            return self._matching(state.edges, filters)
+
+    def memory_usage(self, graph: Graph, seen: Set[int] | None = None) -> int:
+        """
+        Measure the memory held by the results cached for a graph: bitsets, attribute
+        columns and equality indexes.
+
+        :param graph: The graph whose results to measure
+        :param seen: Ids of objects already counted (e.g. the graph's nodes), updated with the ones counted here
+        :return: Size in bytes
+        """
+        seen = set() if seen is None else seen
+        with self._guard:
+            state = self._graphs.get(graph)
+        if state is None or state.version != graph.version:
+            return 0
+        with state.lock:
+            return sum(deep_size(vars(results), seen) for results in (state.nodes, state._edges)
+                       if results is not None)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._guard:
+            self._graphs.clear()
+
+    def _matching(self, results: _Results, filters: Iterable[BaseFilter]) -> Set:
+        bits = results.full
+        missing = []
+        for filter_ in filters:
+            cached = self._cached(results, filter_)
+            if cached is None:
+                missing.append(filter_)
+            else:
+                bits &= cached
+        if bits and missing:
+            # A lone composite still has children to order
+            if len(missing) > 1 or isinstance(missing[0], CompositeFilter):
+                estimator = SelectivityEstimator(results.items[:SAMPLE_SIZE], results.catalog)
+                missing = plan(And(missing), estimator).children
+            for filter_ in missing:
+                bits &= self._bits(results, filter_)
+                if not bits:
+                    break
+        return self._members(results, bits)
+
+    def _cached(self, results: _Results, filter_: BaseFilter) -> int | None:
+        key = _key(filter_)
+        bits = results.results.get(key)
+        if bits is not None:
+            results.results.move_to_end(key)
+            self.hits += 1
+        return bits
+
+    def _bits(self, results: _Results, filter_: BaseFilter) -> int:
+        """Bitset of the items matching a filter, computed from the children's results for composites."""
+        bits = self._cached(results, filter_)
+        if bits is not None:
+            return bits
+        self.misses += 1
+        if isinstance(filter_, And):
+            bits = results.full
+            for child in filter_.children:
+                bits &= self._bits(results, child)
+                if not bits:
+                    break
+        elif isinstance(filter_, Or):
+            bits = 0
+            for child in filter_.children:
+                bits |= self._bits(results, child)
+                if bits == results.full:
+                    break
+        elif isinstance(filter_, Not):
+            bits = results.full ^ self._bits(results, filter_.child)
+        else:
+            bits = self._evaluate(results, filter_)
+        results.results[_key(filter_)] = bits
+        if len(results.results) > self._max_filters:
+            results.results.popitem(last=False)
+        return bits
+
+    def _evaluate(self, results: _Results, filter_: BaseFilter) -> int:
+        """Evaluate a leaf filter on all items, from the index or columns when possible."""
+        if isinstance(filter_, Filter):
+            value = filter_.value
+            if value is None:
+                return 0
+            if filter_.operator in ("==", "!=") and results.index(filter_.attribute):
+                equal = results.bits(results.values[filter_.attribute].get((type(value), value), ()))
+                if filter_.operator == "==":
+                    return equal
+                # Filter.apply only compares values of the same type
+                return results.bits(results.types[filter_.attribute].get(type(value), ())) & ~equal
+            if self._vectorized:
+                if results.columns is None:
+                    results.columns = columns.AttributeColumns(results.items)
+                mask = results.columns.mask(filter_)
+                if mask is not None:
+                    return columns.to_bitset(mask)
+        return results.bits(i for i, item in enumerate(results.items) if test(filter_, item))
+
+    @staticmethod
+    def _members(results: _Results, bits: int) -> Set:
+        if bits == results.full:
+            return set(results.items)
+        items = results.items
+        # Bits from the least significant one, i.e. in item order
+        return {items[i] for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"}
+
+
+# Shared by all workspace views, so views on the same base graph share results
+filter_results = FilterResultCache()
@@ -0,0 +1,473 @@
+import ast
+import json
+import re
+from abc import abstractmethod
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from api.model import Edge, Graph, Node
+from api.model.attribute_catalog import AttributeCatalog
+
+from .base_filter import BaseFilter
+from .edge_filter import EdgeFilter
+from .filter import Filter
+from .search import Search
+
+KEYWORDS = ("and", "or", "not")
+
+# Parentheses, comparison operators, quoted strings and bare words
+_TOKEN_RE = re.compile(r"""\s*(?:(?P<paren>[()])
+                              |(?P<op>==|!=|<=|>=|<|>)
+                              |(?P<quoted>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+                              |(?P<word>[^\s()=!<>"']+))""", re.VERBOSE)
+_WORD_RE = re.compile(r"""[^\s()=!<>"']+""")
+
+# Number of nodes sampled to estimate the selectivity of a filter
+SAMPLE_SIZE = 256
+
+# Relative cost of evaluating one filter on one node
+FILTER_COST = 1.0
+SEARCH_COST = 4.0
+
+
+def convert_value(value: str):
+    """
+    Convert an unquoted filter value to int, float, bool or date if it looks like one;
+    otherwise keep the string.
+    """
+    if value.isdigit() or (value.startswith('-') and value[1:].isdigit()):
+        return int(value)
+    if '.' in value and value.replace('.', '').replace('-', '').isdigit():
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    if value.lower() in ['true', 'false']:
+        return value.lower() == 'true'
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def _coerce_to_attribute_type(attribute: str, value, catalog: AttributeCatalog):
+    """Compare ints with float attributes as floats, e.g. `rating >= 8` on 8.3."""
+    if type(value) is not int:
+        return value
+    types = catalog.types(attribute)
+    if float in types and int not in types:
+        return float(value)
+    return value
+
+
+def test(filter_: BaseFilter, item: Node | Edge) -> bool:
+    """Apply a filter, treating a filter that can't be applied (e.g. type mismatch) as not matching."""
+    try:
+        return filter_.apply(item)
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
+def format_value(value) -> str:
+    """Write a value so that parsing it gives the same value back."""
+    if isinstance(value, str):
+        return value if _reads_back_bare(value) else json.dumps(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def _reads_back_bare(value: str) -> bool:
+    """Whether an unquoted string parses back to itself."""
+    return (all(_WORD_RE.fullmatch(word) and word.lower() not in KEYWORDS for word in value.split(" "))
+            and convert_value(value) == value)
+
+
+def to_expression(filter_: BaseFilter) -> str:
+    """Write a filter in the expression language."""
+    if isinstance(filter_, CompositeFilter):
+        return filter_.expression
+    if isinstance(filter_, Filter):
+        prefix = EdgeFilter.PREFIX if isinstance(filter_, EdgeFilter) else ""
+        return f"{prefix}{filter_.attribute} {filter_.operator} {format_value(filter_.value)}"
+    raise TypeError(f"{type(filter_).__name__} can't be written as a filter expression")
+
+
+class CompositeFilter(BaseFilter):
+    """Base class of the filters combining other filters."""
+
+    def __init__(self, children: Sequence[BaseFilter]):
+        self._children: Tuple[BaseFilter, ...] = tuple(children)
+
+    @property
+    def children(self) -> Tuple[BaseFilter, ...]:
+        """The combined filters, in evaluation order."""
+        return self._children
+
+    @property
+    @abstractmethod
+    def expression(self) -> str:
+        """The filter written in the expression language."""
+        pass
+
+    def _child_expression(self, child: BaseFilter) -> str:
+        text = to_expression(child)
+        return f"({text})" if isinstance(child, CompositeFilter) and not isinstance(child, Not) else text
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self._children == other._children
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__, self._children))
+
+    def __reduce__(self):
+        return self.__class__, (self._children,)
+
+    def __str__(self) -> str:
+        return self.expression
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.expression})"
+
+
+class And(CompositeFilter):
+    """Matches items all children match; stops at the first child that doesn't."""
+
+    def apply(self, comparable: Node | Edge) -> bool:
+        for child in self._children:
+            if not test(child, comparable):
+                return False
+        return True
+
+    @property
+    def expression(self) -> str:
+        return " and ".join(self._child_expression(c) for c in self._children)
+
+
+class Or(CompositeFilter):
+    """Matches items any child matches; stops at the first child that does."""
+
+    def apply(self, comparable: Node | Edge) -> bool:
+        for child in self._children:
+            if test(child, comparable):
+                return True
+        return False
+
+    @property
+    def expression(self) -> str:
+        return " or ".join(self._child_expression(c) for c in self._children)
+
+
+class Not(CompositeFilter):
+    """Matches items its only child doesn't match."""
+
+    def __init__(self, children: Union[BaseFilter, Sequence[BaseFilter]]):
+        super().__init__((children,) if isinstance(children, BaseFilter) else children)
+        if len(self._children) != 1:
+            raise ValueError("Not takes exactly one filter")
+
+    @property
+    def child(self) -> BaseFilter:
+        return self._children[0]
+
+    def apply(self, comparable: Node | Edge) -> bool:
+        return not test(self._children[0], comparable)
+
+    @property
+    def expression(self) -> str:
+        child = self._children[0]
+        text = to_expression(child)
+        return f"not ({text})" if isinstance(child, CompositeFilter) and not isinstance(child, Not) else f"not {text}"
+
+
+class _Parser(object):
+    """Recursive descent parser of the filter expression language."""
+
+    def __init__(self, text: str, graph: Optional[Graph]):
+        self._text = text
+        self._graph = graph
+        self._tokens = self._tokenize(text)
+        self._pos = 0
+
+    @staticmethod
+    def _tokenize(text: str) -> List[Tuple[str, str]]:
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if match is None or match.end() == pos:
+                raise ValueError(f"Unexpected character at position {pos}: {text[pos:]!r}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "word" and value.lower() in KEYWORDS:
+                kind, value = "keyword", value.lower()
+            elif kind == "quoted":
+                value = ast.literal_eval(value)
+            tokens.append((kind, value))
+            pos = match.end()
+        return tokens
+
+    def _peek(self) -> Tuple[Optional[str], Optional[str]]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else (None, None)
+
+    def _next(self) -> Tuple[Optional[str], Optional[str]]:
+        token = self._peek()
+        self._pos += 1
+        return token
+
+    def _accept(self, kind: str, value: str) -> bool:
+        if self._peek() == (kind, value):
+            self._pos += 1
+            return True
+        return False
+
+    def parse(self) -> BaseFilter:
+        if not self._tokens:
+            raise ValueError("Empty filter expression")
+        result = self._or()
+        if self._pos < len(self._tokens):
+            raise ValueError(f"Unexpected '{self._peek()[1]}' in filter expression: {self._text}")
+        split_targets([result])
+        return result
+
+    def _or(self) -> BaseFilter:
+        children = [self._and()]
+        while self._accept("keyword", "or"):
+            children.append(self._and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _and(self) -> BaseFilter:
+        children = [self._not()]
+        while self._accept("keyword", "and"):
+            children.append(self._not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _not(self) -> BaseFilter:
+        if self._accept("keyword", "not"):
+            return Not(self._not())
+        if self._accept("paren", "("):
+            inner = self._or()
+            if not self._accept("paren", ")"):
+                raise ValueError(f"Missing ')' in filter expression: {self._text}")
+            return inner
+        return self._term()
+
+    def _term(self) -> Filter:
+        kind, attribute = self._next()
+        if kind != "word":
+            raise ValueError(f"Expected an attribute name, got '{attribute}' in filter expression: {self._text}")
+        kind, operator = self._next()
+        if kind != "op":
+            raise ValueError(f"Expected an operator after '{attribute}', valid operators are: {list(Filter.OPERATORS)}")
+        kind, value = self._peek()
+        if kind == "quoted":
+            self._pos += 1
+        elif kind == "word":
+            # Bare values run until the next keyword or parenthesis, e.g. genre == Science Fiction
+            words = []
+            while self._peek()[0] == "word":
+                words.append(self._next()[1])
+            value = convert_value(" ".join(words))
+        else:
+            raise ValueError(f"Missing value for '{attribute} {operator}' in filter expression: {self._text}")
+        cls = Filter
+        if attribute.startswith(EdgeFilter.PREFIX):
+            cls, attribute = EdgeFilter, attribute[len(EdgeFilter.PREFIX):]
+        if self._graph is not None:
+            value = _coerce_to_attribute_type(attribute, value, cls._catalog(self._graph))
+        return cls(attribute=attribute, operator=operator, value=value, graph=self._graph)
+
+
+def parse_filter_expression(text: str, graph: Optional[Graph] = None) -> BaseFilter:
+    """
+    Parse a filter expression such as `rating >= 8 and (genre == Drama or year < 1990)`.
+
+    Terms are `attribute operator value` with the operators of Filter, combined with
+    `and`, `or` (lower precedence), `not` and parentheses. Attributes prefixed with
+    `edge.` give EdgeFilters, e.g. `edge.type == acted_in`; they can be combined with
+    node terms by `and` only. Values are converted like
+    numbers, booleans and dates where possible; quote them to keep strings, or when they
+    contain a keyword or parenthesis.
+
+    :param text: The expression
+    :param graph: Graph used to validate the value types, if given
+    :raises ValueError: If the expression is malformed
+    :raises TypeError: If a value doesn't match the attribute's type in the graph
+    :return: A Filter for a single term, otherwise an And, Or or Not tree of filters
+    """
+    return _Parser(text, graph).parse()
+
+
+def split_targets(filters: Iterable[BaseFilter]) -> Tuple[List[BaseFilter], List[BaseFilter]]:
+    """
+    Split filters that must all match into the ones on nodes and the ones on edges.
+
+    And filters mixing both are split into their children.
+
+    :param filters: The filters
+    :raises ValueError: If an `or` or `not` combines node and edge filters
+    :return: The node filters and the edge filters
+    """
+    node_filters, edge_filters = [], []
+    for filter_ in filters:
+        on_edges = _on_edges(filter_)
+        if on_edges is None:
+            nodes, edges = split_targets(filter_.children)
+            node_filters.extend(nodes)
+            edge_filters.extend(edges)
+        elif on_edges:
+            edge_filters.append(filter_)
+        else:
+            node_filters.append(filter_)
+    return node_filters, edge_filters
+
+
+def _on_edges(filter_: BaseFilter) -> Optional[bool]:
+    """Whether a filter applies to edges; None for an And mixing node and edge filters."""
+    if not isinstance(filter_, CompositeFilter):
+        return isinstance(filter_, EdgeFilter)
+    targets = {_on_edges(child) for child in filter_.children}
+    if len(targets) == 1 and None not in targets:
+        return targets.pop()
+    if isinstance(filter_, And):
+        return None
+    raise ValueError(f"Node and edge conditions can only be combined with 'and': {filter_.expression}")
+
+
+def complete(text: str, graph: Graph, limit: int = 10) -> Dict[str, object]:
+    """
+    Suggest how to continue a partial filter expression, from the graph's attribute
+    catalogs: attribute names, then operators, then the most frequent values of the
+    attribute, then `and`/`or`.
+
+    :param text: The expression typed so far
+    :param graph: The graph the expression will filter
+    :param limit: Maximum number of suggestions
+    :return: {"kind": "attribute"|"operator"|"value"|"keyword", "prefix": the text the
+             suggestions replace, "suggestions": [...]}; no suggestions for malformed text
+    """
+    # A lone '=' or '!' is the start of an operator
+    partial = text[-1] if text[-1:] in ("=", "!") and text[-2:-1] not in ("=", "!", "<", ">") else ""
+    try:
+        tokens = _Parser._tokenize(text[:len(text) - len(partial)])
+    except ValueError:
+        return {"kind": None, "prefix": "", "suggestions": []}
+    ended = not text or text[-1].isspace() or text.endswith("(")
+    start = max((i + 1 for i, (kind, _) in enumerate(tokens) if kind in ("keyword", "paren")), default=0)
+    term = tokens[start:]
+    if partial:
+        term.append(("op", partial))
+
+    if not term or (len(term) == 1 and not ended):
+        prefix = term[0][1] if term else ""
+        names = sorted(graph.catalog.attributes()) + \
+            sorted(EdgeFilter.PREFIX + name for name in graph.edge_catalog.attributes())
+        return {"kind": "attribute", "prefix": prefix,
+                "suggestions": [n for n in names if n.startswith(prefix)][:limit]}
+    if len(term) == 1 or (len(term) == 2 and term[1][0] == "op" and not ended):
+        prefix = term[1][1] if len(term) == 2 else ""
+        return {"kind": "operator", "prefix": prefix,
+                "suggestions": [op for op in Filter.OPERATORS if op.startswith(prefix)][:limit]}
+    if term[0][0] != "word" or term[1][0] != "op":
+        return {"kind": None, "prefix": "", "suggestions": []}
+    values = term[2:]
+    if values and ended:
+        return {"kind": "keyword", "prefix": "", "suggestions": ["and", "or"]}
+    prefix = " ".join(value for _, value in values)
+    attribute = term[0][1]
+    catalog = graph.catalog
+    if attribute.startswith(EdgeFilter.PREFIX):
+        attribute, catalog = attribute[len(EdgeFilter.PREFIX):], graph.edge_catalog
+    return {"kind": "value", "prefix": prefix,
+            "suggestions": [format_value(v) for v in catalog.suggest(attribute, prefix, limit)]}
+
+
+class SelectivityEstimator(object):
+    """
+    Estimates the fraction of items a filter lets through.
+
+    Comparisons are estimated from the attribute catalog when one is given (see
+    AttributeCatalog.selectivity); and/or/not combine their children's estimates as if
+    independent; anything else is applied to a sample of the items.
+
+    Estimates are cached per filter, so one estimator should be used per planning pass.
+    """
+
+    def __init__(self, sample: Sequence[Node | Edge], catalog: Optional[AttributeCatalog] = None):
+        """
+        :param sample: Items to apply filters the catalog can't estimate to
+        :param catalog: Statistics of the items' attributes
+        """
+        self._sample = sample
+        self._catalog = catalog
+        self._cache: Dict[BaseFilter, float] = {}
+
+    @classmethod
+    def from_graph(cls, graph: Graph, sample_size: int = SAMPLE_SIZE) -> 'SelectivityEstimator':
+        """Estimate on the nodes of a graph, from its catalog and a sample."""
+        return cls(list(islice(iter(graph.nodes), sample_size)), graph.catalog)
+
+    def selectivity(self, filter_: BaseFilter) -> float:
+        """Estimated fraction of items matching, kept strictly between 0 and 1."""
+        cached = self._cache.get(filter_)
+        if cached is None:
+            cached = self._cache[filter_] = self._estimate(filter_)
+        return cached
+
+    def _estimate(self, filter_: BaseFilter) -> float:
+        if isinstance(filter_, And):
+            result = 1.0
+            for child in filter_.children:
+                result *= self.selectivity(child)
+            return result
+        if isinstance(filter_, Or):
+            miss = 1.0
+            for child in filter_.children:
+                miss *= 1.0 - self.selectivity(child)
+            return 1.0 - miss
+        if isinstance(filter_, Not):
+            return 1.0 - self.selectivity(filter_.child)
+        if isinstance(filter_, Filter) and self._catalog is not None:
+            estimate = self._catalog.selectivity(filter_.attribute, filter_.operator, filter_.value)
+            if estimate is not None:
+                # Keep unseen outcomes possible, like the smoothing of sampled estimates
+                margin = 1.0 / (self._catalog.size + 2)
+                return min(max(estimate, margin), 1.0 - margin)
+        matched = sum(1 for item in self._sample if test(filter_, item))
+        # Laplace smoothing keeps unseen outcomes possible
+        return (matched + 1) / (len(self._sample) + 2)
+
+
+def cost(filter_: BaseFilter) -> float:
+    """Relative worst-case cost of evaluating a filter on one item."""
+    if isinstance(filter_, CompositeFilter):
+        return sum(cost(c) for c in filter_.children)
+    return SEARCH_COST if isinstance(filter_, Search) else FILTER_COST
+
+
+def plan(filter_: BaseFilter, estimator: SelectivityEstimator) -> BaseFilter:
+    """
+    Reorder the children of And and Or filters so that evaluation short-circuits early.
+
+    And evaluates first the children that are cheap and reject the most items
+    (lowest cost / (1 - selectivity)); Or the ones that are cheap and accept the most
+    (lowest cost / selectivity). The result matches exactly the same items.
+
+    :param filter_: The filter to plan
+    :param estimator: Estimates the selectivity of the children
+    :return: An equivalent filter with reordered children
+    """
+    if isinstance(filter_, Not):
+        return Not(plan(filter_.child, estimator))
+    if not isinstance(filter_, (And, Or)):
+        return filter_
+    children = [plan(c, estimator) for c in filter_.children]
+    if isinstance(filter_, And):
+        def rank(c):
+            return cost(c) / (1.0 - estimator.selectivity(c))
+    else:
+        def rank(c):
+            return cost(c) / estimator.selectivity(c)
+    return type(filter_)(sorted(children, key=rank))
@@ -0,0 +1,268 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from core.memory import MemoryManager
+from .workspace import Workspace
+
+
+class WorkspaceEntry(NamedTuple):
+    """Lightweight listing entry for a workspace, resident or evicted."""
+    id: str
+    name: str
+    resident: bool
+
+
+class WorkspaceRegistry(object):
+    """
+    Workspaces indexed by id and by name, kept in least-recently-used order.
+
+    Lookups by id are O(1) and mark the workspace as recently used. When a store and a
+    resident limit are configured, the least recently used workspaces beyond the limit
+    are snapshotted to the store and dropped from memory; get() transparently reloads
+    them. Listing with entries() never reloads anything.
+
+    The limit is a number of workspaces, a memory budget enforced through a
+    MemoryManager, or both. Footprints are re-measured whenever a workspace is accessed
+    through get() or refresh().
+
+    Only idle workspaces are evicted: none used through using(), and none whose lock is
+    held or awaited. A workspace returned by get() and then changed without using() or
+    its lock may still be evicted, and those changes are not kept.
+    """
+
+    def __init__(self,
+                 store=None,
+                 loader: Optional[Callable[[Dict[str, Any]], Workspace]] = None,
+                 max_resident: Optional[int] = None,
+                 on_evict: Optional[Callable[[Workspace], None]] = None,
+                 memory: Optional[MemoryManager] = None):
+        """
+        :param store: WorkspaceStore receiving snapshots of evicted workspaces
+        :param loader: Rebuilds a workspace from a snapshot (see Workspace.from_snapshot)
+        :param max_resident: Maximum number of workspaces kept in memory (None for no limit)
+        :param on_evict: Called with each evicted workspace, before it is closed
+        :param memory: Tracks workspace footprints against a memory budget
+        """
+        self._store = store
+        self._loader = loader
+        self._max_resident = max_resident
+        self._on_evict = on_evict
+        self._memory = memory
+        self._resident: "OrderedDict[str, Workspace]" = OrderedDict()
+        self._evicted: Set[str] = set()
+        self._names: Dict[str, str] = {}
+        self._ids_by_name: Dict[str, Dict[str, None]] = {}
+        self._lock = threading.RLock()
+        # Per-workspace locks serializing snapshot writes and reloads
+        self._io_locks: Dict[str, threading.Lock] = {}
+        # Workspace id -> number of using() blocks running on it
+        self._in_use: Dict[str, int] = {}
+
+    @property
+    def max_resident(self) -> Optional[int]:
+        """Maximum number of workspaces kept in memory, or None for no limit."""
+        return self._max_resident
+
+    @property
+    def memory(self) -> Optional[MemoryManager]:
+        """The memory manager tracking workspace footprints, if any."""
+        return self._memory
+
+    def add(self, workspace: Workspace) -> None:
+        """Register a workspace as the most recently used one."""
+        with self._lock:
+            self._resident[workspace.id] = workspace
+            self._evicted.discard(workspace.id)
+            self._names[workspace.id] = workspace.name
+            self._ids_by_name.setdefault(workspace.name, {})[workspace.id] = None
+        self.refresh(workspace.id)
+
+    def remove(self, workspace_id: str) -> Optional[Workspace]:
+        """Forget a workspace and delete its snapshot, if any. Returns it if it was resident."""
+        with self._lock:
+            workspace = self._resident.pop(workspace_id, None)
+            self._evicted.discard(workspace_id)
+            name = self._names.pop(workspace_id, None)
+            if name is not None:
+                ids = self._ids_by_name.get(name, {})
+                ids.pop(workspace_id, None)
+                if not ids:
+                    self._ids_by_name.pop(name, None)
+            self._io_locks.pop(workspace_id, None)
+        if self._memory is not None:
+            self._memory.forget(workspace_id)
+        if self._store is not None:
+            self._store.delete(workspace_id)
+        return workspace
+
+    def get(self, workspace_id: Optional[str]) -> Optional[Workspace]:
+        """
+        Return the workspace with the given id, reloading it if it was evicted.
+
+        :return: The workspace, or None if there is no such workspace
+        """
+        with self._lock:
+            workspace = self._resident.get(workspace_id)
+            if workspace is not None:
+                self._resident.move_to_end(workspace_id)
+            elif workspace_id not in self._evicted:
+                return None
+            else:
+                io_lock = self._io_locks.setdefault(workspace_id, threading.Lock())
+        if workspace is not None:
+            # Also evicts the workspaces that were busy when the limit was last enforced
+            self.refresh(workspace_id)
+            return workspace
+
+        with io_lock:
+            with self._lock:
+                workspace = self._resident.get(workspace_id)
+                if workspace is not None:
+                    # Reloaded by another thread meanwhile
+                    self._resident.move_to_end(workspace_id)
+                    return workspace
+                if workspace_id not in self._evicted:
+                    return None
+            workspace = self._loader(self._store.load(workspace_id))
+            with self._lock:
+                self._evicted.discard(workspace_id)
+                self._resident[workspace_id] = workspace
+            self._store.delete(workspace_id)
+
+        self.refresh(workspace_id)
+        return workspace
+
+    @contextmanager
+    def using(self, workspace_id: Optional[str]):
+        """
+        Get a workspace like get(), and keep it from being evicted until the block ends.
+
+        :return: The workspace, or None if there is no such workspace
+        """
+        while True:
+            workspace = self.get(workspace_id)
+            if workspace is None:
+                yield None
+                return
+            with self._lock:
+                # Evicted between get() and here: reload it
+                if self._resident.get(workspace_id) is workspace:
+                    self._in_use[workspace_id] = self._in_use.get(workspace_id, 0) + 1
+                    break
+        try:
+            yield workspace
+        finally:
+            with self._lock:
+                count = self._in_use.pop(workspace_id) - 1
+                if count:
+                    self._in_use[workspace_id] = count
+
+    def refresh(self, workspace_id: str) -> None:
+        """
+        Re-measure a resident workspace after it changed, then evict least recently used
+        workspaces other than it until the registry is within its limits.
+        """
+        if self._memory is not None:
+            with self._lock:
+                workspace = self._resident.get(workspace_id)
+            if workspace is not None:
+                self._memory.measure(workspace)
+        self._enforce_limit(keep=workspace_id)
+
+    def by_name(self, name: str) -> List[Workspace]:
+        """Return all workspaces with the given name, reloading evicted ones."""
+        with self._lock:
+            ids = list(self._ids_by_name.get(name, ()))
+        return [ws for ws in (self.get(i) for i in ids) if ws is not None]
+
+    def entries(self) -> List[WorkspaceEntry]:
+        """List all workspaces in creation order, without reloading evicted ones."""
+        with self._lock:
+            return [WorkspaceEntry(i, name, i in self._resident) for i, name in self._names.items()]
+
+    def resident(self) -> List[Workspace]:
+        """Workspaces currently in memory, least recently used first."""
+        with self._lock:
+            return list(self._resident.values())
+
+    def evict(self, workspace_id: str) -> bool:
+        """
+        Snapshot a resident, idle workspace to the store and drop it from memory.
+
+        The snapshot is taken and the workspace dropped while holding its write lock, so
+        no change can land in between.
+
+        :return: True if the workspace was evicted, False if it is not resident or in use
+        """
+        if self._store is None or self._loader is None:
+            return False
+        with self._lock:
+            workspace = self._resident.get(workspace_id)
+            if workspace is None or workspace_id in self._in_use:
+                return False
+            io_lock = self._io_locks.setdefault(workspace_id, threading.Lock())
+
+        with io_lock:
+            if not workspace.lock.try_acquire_write():
+                return False
+            try:
+                self._store.save(workspace_id, workspace.snapshot())
+                with self._lock:
+                    if self._resident.get(workspace_id) is not workspace or workspace_id in self._in_use:
+                        # The snapshot is only read back once the workspace is evicted
+                        return False
+                    del self._resident[workspace_id]
+                    self._evicted.add(workspace_id)
+            finally:
+                workspace.lock.release_write()
+            if self._memory is not None:
+                self._memory.forget(workspace_id)
+
+        if self._on_evict is not None:
+            self._on_evict(workspace)
+        workspace.close()
+        return True
+
+    def _over_limit(self) -> bool:
+        """
+        Whether more workspaces are resident than allowed, or their estimated memory
+        exceeds the budget. Called with the lock held.
+        """
+        if self._max_resident is not None and len(self._resident) > self._max_resident:
+            return True
+        return self._memory is not None and self._memory.over_budget()
+
+    def _enforce_limit(self, keep: Optional[str] = None) -> None:
+        """
+        Evict least recently used idle workspaces, except `keep`, until within the limit.
+        Busy ones are skipped; the limit is enforced again on the next access.
+        """
+        busy = set() if keep is None else {keep}
+        while True:
+            with self._lock:
+                if not self._over_limit():
+                    return
+                victim = next((i for i in self._resident if i not in busy), None)
+            if victim is None:
+                return
+            if not self.evict(victim):
+                busy.add(victim)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._names)
+
+    def __contains__(self, workspace_id) -> bool:
+        with self._lock:
+            return workspace_id in self._names
+
+    def __iter__(self) -> Iterator[Workspace]:
+        """Iterate over all workspaces, reloading evicted ones. Prefer entries() for listing."""
+        with self._lock:
+            ids = list(self._names)
+        for workspace_id in ids:
+            workspace = self.get(workspace_id)
+            if workspace is not None:
+                yield workspace
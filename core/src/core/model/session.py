@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Dict, Set, Tuple
+
+from .base_filter import BaseFilter
+from .workspace import Workspace, WorkspaceView
+
+
+class Session(object):
+    """
+    Per-user state on top of the shared workspaces: the selected workspace and one
+    WorkspaceView (filters, searches, visualizer) per workspace the user has opened.
+
+    Workspaces and their base graphs are shared by all sessions; only the views are
+    per session.
+    """
+
+    def __init__(self, session_id: str | None):
+        """
+        Initialize an empty session.
+
+        :param session_id: Identifier of the session (None for the default session)
+        :type session_id: str | None
+        """
+        self.id = session_id
+        self.current_workspace_id: str | None = None
+        self.last_access = time.monotonic()
+        self._views: Dict[str, WorkspaceView] = {}
+        # (filters, visualizer id) of views closed while their workspace was evicted
+        self._suspended: Dict[str, Tuple[Set[BaseFilter], str | None]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self) -> None:
+        """Record that the session was just used."""
+        self.last_access = time.monotonic()
+
+    def view(self, workspace: Workspace) -> WorkspaceView:
+        """
+        Get this session's view of a workspace, creating it on first access.
+
+        :param workspace: The workspace to view
+        :type workspace: Workspace
+        :return: The session's view of the workspace
+        :rtype: WorkspaceView
+        """
+        with self._lock:
+            view = self._views.get(workspace.id)
+            if view is None:
+                view = workspace.create_view()
+                suspended = self._suspended.pop(workspace.id, None)
+                if suspended is not None:
+                    filters, view.visualizer_id = suspended
+                    view.set_filters(filters)
+                self._views[workspace.id] = view
+            return view
+
+    def open_view(self, workspace_id: str) -> WorkspaceView | None:
+        """Get this session's open view of a workspace without creating one, or None."""
+        with self._lock:
+            return self._views.get(workspace_id)
+
+    def restore_view(self, workspace_id: str, filters: Set[BaseFilter], visualizer_id: str | None) -> None:
+        """
+        Remember filters and a visualizer for this session's view of a workspace, applied
+        when view() first opens it. Used to bring back views persisted before a restart.
+        """
+        with self._lock:
+            if workspace_id not in self._views:
+                self._suspended[workspace_id] = (set(filters), visualizer_id)
+
+    def suspend_view(self, workspace_id: str) -> None:
+        """
+        Close this session's view of a workspace but remember its filters and visualizer,
+        so view() restores them. Used when the workspace is evicted from memory.
+        """
+        with self._lock:
+            view = self._views.pop(workspace_id, None)
+            if view is None:
+                return
+            self._suspended[workspace_id] = (set(view.filters), view.visualizer_id)
+        view.close()
+
+    def drop_view(self, workspace_id: str) -> None:
+        """Close and forget this session's view of a workspace, if any."""
+        with self._lock:
+            view = self._views.pop(workspace_id, None)
+            self._suspended.pop(workspace_id, None)
+        if view is not None:
+            view.close()
+
+    def close(self) -> None:
+        """Close all views so they stop following graph changes."""
+        with self._lock:
+            views, self._views = list(self._views.values()), {}
+        for view in views:
+            view.close()
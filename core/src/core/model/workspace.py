@@ -3,15 +3,22 @@ from functools import wraps
 
 from .base_filter import BaseFilter
 from .filter import Filter
+from .filter_cache import FilterResultCache, filter_results
+from .filter_expression import parse_filter_expression, split_targets
 from .search import Search
 
 from api.model import Graph
 from api.services import DataSourcePlugin
-from api.interface.observer import Observer
+from api.interface.observer import Observer, Observable
+from api.log import get_logger, sampled
+from api.tracing import traced
+from core.concurrency import ReadWriteLock, lock_for
 
-from typing import Set, Union
-from copy import deepcopy
-from datetime import date
+from typing import Set, Union, Dict, Any
+
+_log = get_logger(__name__)
+# Views are refiltered on every graph change; log 1 in N
+_updates = sampled(_log)
 
 
 def parse_filter(func):
@@ -19,7 +26,8 @@ def parse_filter(func):
     A decorator for the add and remove filter methods to parse a filter string into a Filter object.
     
     This decorator allows the methods to accept either a Filter object or a filter string.
-    If a string is provided, it will be parsed into a Filter object.
+    If a string is provided, it will be parsed as a filter expression (see
+    parse_filter_expression): a single term gives a Filter, `and`/`or`/`not` give a tree.
     Note: Search objects should NOT use this decorator - they should use dedicated search methods.
     
     :param func: The function to decorate
@@ -37,8 +45,8 @@ def parse_filter(func):
         
         # If filter_ is a string, parse it into a Filter object
         if isinstance(filter_, str):
-            print("Parsing filter string:", filter_)
-            parsed_filter = _parse_filter_string(filter_, self._graph)
+            _log.debug("Parsing filter string: %s", filter_)
+            parsed_filter = parse_filter_expression(filter_, self._graph)
             return func(self, parsed_filter)
         
         # If filter_ is neither BaseFilter nor string, raise an error
@@ -47,72 +55,58 @@ def parse_filter(func):
     return wrapper
 
 
-def _parse_filter_string(filter_string: str, graph: Graph) -> Filter:
-    """
-    Parse a filter string into a Filter object.
-
-    :param filter_string: The filter string to parse (format: "attribute operator value")
-    :type filter_string: str
-    :param graph: The graph reference for type validation
-    :type graph: Graph
-    :return: The parsed Filter object
-    :rtype: Filter
-    """
-    # Example filter string format: "attribute operator value"
-    try:
-        attribute, operator, value = filter_string.split(" ", 2)
-    except ValueError:
-        raise ValueError("Filter string must be in the format 'attribute operator value'")
-
-    # Convert value to appropriate type (int, float, str)
-    original_value = value
-    
-    # Try to convert to int first
-    if value.isdigit() or (value.startswith('-') and value[1:].isdigit()):
-        value = int(value)
-    # Try to convert to float
-    elif '.' in value and value.replace('.', '').replace('-', '').isdigit():
-        try:
-            value = float(value)
-        except ValueError:
-            value = original_value  # Keep as string if conversion fails
-    # Check for boolean values
-    elif value.lower() in ['true', 'false']:
-        value = value.lower() == 'true'
-    else:
-        # Try to parse as date
-        try:
-            value = date.fromisoformat(value)
-        except ValueError:
-            # Keep as string if not a date
-            pass
-
-    return Filter(attribute=attribute, operator=operator, value=value, graph=graph)
-
-
-class Workspace(Observer):
+class WorkspaceView(Observer, Observable):
 
     """
-    Workspace class that holds a collection of filters, the graph, and the data_source_plugin.
+    A set of filters and searches over a base graph, with the filtered graph they produce.
+
+    Views share the base graph instead of copying it, so every session can keep its own
+    filters on one in-memory dataset. The view observes the base graph and refilters
+    when it changes.
+
+    The view is itself observable: observers are notified with action="filters_changed"
+    when its filters or searches change, and action="select_visualizer" when its
+    visualizer changes.
+
+    Concurrency: the filtered graph is a snapshot. It is rebuilt on every change and
+    swapped in whole, so a reader holding `graph` keeps a consistent version. Nodes are
+    shared with the base graph though, so readers that walk node data should hold
+    `lock.read()`, and everything that mutates the base graph or the filters holds
+    `lock.write()`.
     """
 
-    def __init__(self,
-                 data_source_plugin: DataSourcePlugin,
-                 name: str = "New Workspace",
-                 visualizer_id: str|None = None):
+    def __init__(self, graph: Graph, lock: ReadWriteLock | None = None, visualizer_id: str | None = None,
+                 results: FilterResultCache | None = None, workspace_id: str | None = None):
         """
-        Initialize the workspace with an empty list of filters.
+        Initialize the view with an empty set of filters.
+
+        :param graph: The base graph to filter
+        :type graph: Graph
+        :param lock: Lock guarding the base graph; defaults to the graph's shared lock
+        :type lock: ReadWriteLock | None
+        :param visualizer_id: Identifier of the visualizer used to display this view
+        :type visualizer_id: str | None
+        :param results: Memo of filter results; defaults to the one shared by all views
+        :type results: FilterResultCache | None
+        :param workspace_id: Identifier of the workspace the view belongs to, if any
+        :type workspace_id: str | None
         """
-        self.id = str(uuid.uuid4())
+        Observable.__init__(self)
+        self.workspace_id = workspace_id
         self._filters: Set[BaseFilter] = set()
-        self._data_source_plugin: DataSourcePlugin = data_source_plugin
-        self._graph: Graph = self._data_source_plugin.load_data()
-        self.visualizer_id = visualizer_id
+        self._graph: Graph = graph
+        self._visualizer_id = visualizer_id
+        self._results: FilterResultCache = results if results is not None else filter_results
+        self._lock: ReadWriteLock = lock if lock is not None else lock_for(self._graph)
         self._graph.attach(self)
         # Initialize the rendered graph (no filters applied initially)
         self.__filtered_graph: Graph = self.__filter_graph()
-        self.name = name
 
+    def close(self) -> None:
+        """
+        Stop observing the base graph. A closed view no longer follows graph changes.
+        """
+        self._graph.detach(self)
 
     @property
     def filters(self) -> Set[BaseFilter]:
@@ -124,6 +118,39 @@ class Workspace(Observer):
         """
         return self._filters
 
+    @property
+    def visualizer_id(self) -> str | None:
+        """
+        Get the identifier of the visualizer used to display this view.
+
+        :return: The visualizer identifier
+        :rtype: str | None
+        """
+        return self._visualizer_id
+
+    @visualizer_id.setter
+    def visualizer_id(self, value: str | None):
+        """
+        Set the visualizer used to display this view and notify observers.
+
+        :param value: The visualizer identifier
+        """
+        self._visualizer_id = value
+        self.notify(action="select_visualizer", visualizer_id=value)
+
+    @property
+    def lock(self) -> ReadWriteLock:
+        """
+        Get the reader/writer lock guarding this view.
+
+        The lock belongs to the base graph, so views and workspaces built on the same
+        graph share it: a write to that graph refilters all of them.
+
+        :return: The lock
+        :rtype: ReadWriteLock
+        """
+        return self._lock
+
     @property
     def graph(self) -> Graph:
         """
@@ -143,6 +170,28 @@ class Workspace(Observer):
         """
         return self._graph
 
+    def memory_usage(self, views=()) -> Dict[str, int]:
+        """
+        Measure the memory held by the view, object by object.
+
+        The breakdown is the base graph's (see Graph.memory_usage), plus:
+        - filtered: the filtered graph snapshots, of this view and of `views`, which share
+          their nodes and edges with the base graph
+        - filter_cache: the memoized filter results on the base graph
+
+        :param views: Further views on the same base graph to count, e.g. session views
+        :return: Bytes per part, with their "total"
+        :rtype: Dict[str, int]
+        """
+        seen = set()
+        with self._lock.read():
+            usage = self._graph.memory_usage(seen)
+            del usage["total"]
+            usage["filtered"] = sum(view.graph.memory_usage(seen)["total"] for view in (self, *views))
+            usage["filter_cache"] = self._results.memory_usage(self._graph, seen)
+        usage["total"] = sum(usage.values())
+        return usage
+
     @parse_filter
     def add_filter(self, filter_) -> Set[BaseFilter]:
         """
@@ -157,10 +206,12 @@ class Workspace(Observer):
         :rtype: Set[BaseFilter]
         Returns the updated set of filters so that the caller can chain calls or check the current filters.
         """
-        self._filters.add(filter_)
-        # Update the rendered graph with the new filter applied
-        self.__filtered_graph = self.__filter_graph()
+        with self._lock.write():
+            self._filters.add(filter_)
+            # Update the rendered graph with the new filter applied
+            self.__filtered_graph = self.__filter_graph()
 
+        self.notify(action="filters_changed")
         return self._filters
 
     @parse_filter
@@ -177,13 +228,15 @@ class Workspace(Observer):
         :rtype: Set[BaseFilter]
         Returns the updated set of filters so that the caller can chain calls or check the current filters.
         """
-        if filter_ in self._filters:
-            self._filters.remove(filter_)
-            # Update the rendered graph after removing the filter
-            self.__filtered_graph = self.__filter_graph()
-        else:
-            raise ValueError("Filter not found in workspace.")
-
+        with self._lock.write():
+            if filter_ in self._filters:
+                self._filters.remove(filter_)
+                # Update the rendered graph after removing the filter
+                self.__filtered_graph = self.__filter_graph()
+            else:
+                raise ValueError("Filter not found in workspace.")
+
+        self.notify(action="filters_changed")
         return self._filters
 
     def add_search(self, search: Search) -> Set[BaseFilter]:
@@ -200,10 +253,12 @@ class Workspace(Observer):
         if not isinstance(search, Search):
             raise TypeError(f"Expected Search instance, got {type(search).__name__}")
         
-        self._filters.add(search)
-        # Update the rendered graph with the new search applied
-        self.__filtered_graph = self.__filter_graph()
+        with self._lock.write():
+            self._filters.add(search)
+            # Update the rendered graph with the new search applied
+            self.__filtered_graph = self.__filter_graph()
 
+        self.notify(action="filters_changed")
         return self._filters
 
     def remove_search(self, search: Search) -> Set[BaseFilter]:
@@ -221,13 +276,33 @@ class Workspace(Observer):
         if not isinstance(search, Search):
             raise TypeError(f"Expected Search instance, got {type(search).__name__}")
             
-        if search in self._filters:
-            self._filters.remove(search)
-            # Update the rendered graph after removing the search
-            self.__filtered_graph = self.__filter_graph()
-        else:
-            raise ValueError("Search not found in workspace.")
+        with self._lock.write():
+            if search in self._filters:
+                self._filters.remove(search)
+                # Update the rendered graph after removing the search
+                self.__filtered_graph = self.__filter_graph()
+            else:
+                raise ValueError("Search not found in workspace.")
+
+        self.notify(action="filters_changed")
+        return self._filters
 
+    def set_filters(self, filters) -> Set[BaseFilter]:
+        """
+        Replace all filters and searches at once, refiltering the graph a single time.
+
+        :param filters: The filters and searches to apply
+        :type filters: Iterable[BaseFilter]
+        :return: The updated set of filters
+        :rtype: Set[BaseFilter]
+        """
+        filters = set(filters)
+        if not all(isinstance(f, BaseFilter) for f in filters):
+            raise TypeError("Expected only Filter or Search instances")
+        with self._lock.write():
+            self._filters = filters
+            self.__filtered_graph = self.__filter_graph()
+        self.notify(action="filters_changed")
         return self._filters
 
     def update(self, observable=None, *args, **kwargs) -> None:
@@ -240,10 +315,13 @@ class Workspace(Observer):
         :param kwargs: Additional keyword arguments
         """
         # When the underlying graph changes, update the filtered graph
-        print("Workspace received update from observable:", observable)
+        _updates.debug("%s received update from %s: %s",
+                       type(self).__name__, type(observable).__name__, kwargs.get("action"))
         if observable is self._graph:
-            self.__filtered_graph = self.__filter_graph()
+            with self._lock.write():
+                self.__filtered_graph = self.__filter_graph()
 
+    @traced("workspace.filter_graph")
     def __filter_graph(self) -> Graph:
         """
         Apply all filters to the graph and return the filtered graph.
@@ -252,43 +330,141 @@ class Workspace(Observer):
         :return: The filtered graph
         :rtype: Graph
         """
-        # If no filters are applied, return a deep copy of the original graph
+        # If no filters are applied, return a snapshot sharing the original nodes and edges
         if not self._filters:
-            return deepcopy(self._graph)
-        
-        # Start with all nodes and edges from the original graph
-        filtered_nodes = set()
-        filtered_edges = set()
-        
-        # Apply filters to nodes
-        for node in self._graph.nodes:
-            # A node passes if it satisfies ALL filters
-            node_passes = True
-            for filter_ in self._filters:
-                try:
-                    if not filter_.apply(node):
-                        node_passes = False
-                        break
-                except (KeyError, TypeError, AttributeError):
-                    # If filter can't be applied to this node (missing attribute, type mismatch, etc.)
-                    # consider the node as not passing the filter
-                    node_passes = False
-                    break
-            
-            if node_passes:
-                filtered_nodes.add(node)
-        
-        # Filter edges: include only edges where both origin and target nodes are in filtered nodes
-        for edge in self._graph.edges:
-            # An edge is included if both its origin and target nodes are in the filtered nodes set
-            if edge.origin in filtered_nodes and edge.target in filtered_nodes:
-                filtered_edges.add(edge)
+            return Graph(
+                edges=set(self._graph.edges),
+                nodes=set(self._graph.nodes),
+                directed=self._graph.is_directed()
+            )
         
+        # A node passes if it satisfies ALL node filters, an edge if it satisfies ALL edge
+        # filters and both its ends pass. Per-filter results are memoized, so only filters
+        # not seen on this version of the graph are evaluated
+        node_filters, edge_filters = split_targets(self._filters)
+        filtered_nodes = (self._results.matching(self._graph, node_filters)
+                          if node_filters else set(self._graph.nodes))
+        if not edge_filters:
+            # Only walks the edges leaving the filtered nodes
+            return self._graph.induced_subgraph(filtered_nodes)
+
+        filtered_edges = self._results.matching_edges(self._graph, edge_filters)
+        if node_filters:
+            node_ids = {node.id for node in filtered_nodes}
+            filtered_edges = {edge for edge in filtered_edges
+                              if edge.origin.id in node_ids and edge.target.id in node_ids}
+
         # Create and return the filtered graph
         filtered_graph = Graph(
-            edges=filtered_edges, 
-            nodes=filtered_nodes, 
+            edges=filtered_edges,
+            nodes=filtered_nodes,
             directed=self._graph.is_directed()
         )
-        
+
         return filtered_graph
+
+
+def load_base_graph(data_source_plugin: DataSourcePlugin) -> Graph:
+    """
+    Load the graph of a data source for a new workspace, as a private copy.
+
+    Data sources may cache the graph they load and hand it to every caller. A workspace
+    owns its base graph, so the edits, eviction and restore of one never show in another.
+
+    :param data_source_plugin: The data source to load
+    :return: A graph no other workspace holds
+    :rtype: Graph
+    """
+    return data_source_plugin.load_data().deep_copy()
+
+
+class Workspace(WorkspaceView):
+
+    """
+    Workspace class that holds a collection of filters, the graph, and the data_source_plugin.
+
+    The workspace's own filters form its default view; sessions open further views on
+    the same base graph with create_view(). The base graph belongs to the workspace
+    alone (see load_base_graph).
+    """
+
+    def __init__(self,
+                 data_source_plugin: DataSourcePlugin,
+                 name: str = "New Workspace",
+                 visualizer_id: str|None = None,
+                 graph: Graph | None = None,
+                 workspace_id: str | None = None):
+        """
+        Initialize the workspace with an empty list of filters.
+
+        :param graph: Base graph to use instead of loading it from the data source plugin;
+                      the workspace takes it over, so it must not be given to another one
+        :param workspace_id: Identifier to use instead of a new one (e.g. when restoring)
+        """
+        self.id = workspace_id or str(uuid.uuid4())
+        self._data_source_plugin: DataSourcePlugin = data_source_plugin
+        # Number of data source reloads (see Application.reload_data_source) applied to the graph
+        self.source_version = 0
+        super().__init__(graph if graph is not None else load_base_graph(self._data_source_plugin),
+                         visualizer_id=visualizer_id, workspace_id=self.id)
+        self.name = name
+
+    @property
+    def data_source_plugin(self) -> DataSourcePlugin:
+        """
+        Get the data source plugin the workspace was loaded from.
+
+        :return: The data source plugin
+        :rtype: DataSourcePlugin
+        """
+        return self._data_source_plugin
+
+    def create_view(self) -> WorkspaceView:
+        """
+        Create a view with its own filters over this workspace's base graph.
+
+        :return: A new view sharing the base graph and lock of this workspace
+        :rtype: WorkspaceView
+        """
+        return WorkspaceView(self._graph, lock=self._lock, visualizer_id=self.visualizer_id,
+                             workspace_id=self.id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Capture the workspace state as picklable plain data.
+
+        :return: Dict with id, name, visualizer id, data source identifier, base graph and filters
+        :rtype: Dict[str, Any]
+        """
+        with self._lock.read():
+            return {
+                "id": self.id,
+                "name": self.name,
+                "visualizer_id": self.visualizer_id,
+                "data_source": self._data_source_plugin.identifier(),
+                "graph": self._graph.to_dict(),
+                "filters": list(self._filters),
+                "source_version": self.source_version,
+            }
+
+    @classmethod
+    def from_snapshot(cls, state: Dict[str, Any], data_source_plugin: DataSourcePlugin) -> 'Workspace':
+        """
+        Rebuild a workspace from the output of snapshot().
+
+        :param state: Dict produced by snapshot()
+        :type state: Dict[str, Any]
+        :param data_source_plugin: The plugin identified by state["data_source"]
+        :type data_source_plugin: DataSourcePlugin
+        :return: The restored workspace
+        :rtype: Workspace
+        """
+        ws = cls(data_source_plugin,
+                 name=state["name"],
+                 visualizer_id=state["visualizer_id"],
+                 graph=Graph.from_dict(state["graph"]),
+                 workspace_id=state["id"])
+        ws.source_version = state.get("source_version", 0)
+        if state["filters"]:
+            ws.set_filters(state["filters"])
+        return ws
@@ -0,0 +1,151 @@
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Callable, Dict, List, Optional
+
+from . import executor as _executor
+from .model import workspace as _workspace
+
+# Seconds between samples
+INTERVAL = 0.005
+# Longest profile, in seconds
+MAX_SECONDS = 60.0
+
+# Frames are listed outermost first
+Frames = List[FrameType]
+
+_WORKSPACE_FILE = _workspace.__file__
+# Fragment of the path of Django's request handlers, on the stack of every request thread
+_REQUEST_HANDLERS = os.path.join("django", "core", "handlers")
+# Async views run their graph work in the executor's threads
+_EXECUTOR_FILE = _executor.__file__
+
+# Only one profile runs at a time
+_running = threading.Lock()
+
+
+def workspace_annotation(frames: Frames) -> Optional[str]:
+    """
+    Label of the innermost workspace view on a stack: its workspace id and the size of its
+    base graph, so hot paths can be pinned to a dataset.
+    """
+    for frame in reversed(frames):
+        if frame.f_code.co_filename == _WORKSPACE_FILE:
+            view = frame.f_locals.get("self")
+            if isinstance(view, _workspace.WorkspaceView):
+                graph = view.graph_reference
+                return (f"workspace {view.workspace_id or '-'} "
+                        f"({len(graph.nodes)} nodes, {len(graph.edges)} edges)")
+    return None
+
+
+def request_thread(frames: Frames) -> bool:
+    """Whether a stack is a thread handling a Django request, or an executor job of one."""
+    return any(_REQUEST_HANDLERS in frame.f_code.co_filename or frame.f_code.co_filename == _EXECUTOR_FILE
+               for frame in frames)
+
+
+class StackSampler(object):
+    """
+    Statistical profiler that periodically records the stacks of the other threads
+    (sys._current_frames) from the thread calling run().
+
+    Nothing is hooked into the profiled code, so threads pay nothing but the GIL held
+    while a sample is taken; sys.setprofile and signals are not used, so it runs from any
+    thread of a live server. Stacks are counted in the collapsed format of flamegraph.pl
+    and speedscope: frames outermost first, separated by semicolons.
+    """
+
+    def __init__(self,
+                 interval: float = INTERVAL,
+                 annotate: Optional[Callable[[Frames], Optional[str]]] = workspace_annotation,
+                 include: Optional[Callable[[Frames], bool]] = None):
+        """
+        :param interval: Seconds between samples
+        :param annotate: Gives a label put as the root frame of a stack, or None for no label
+        :param include: Tells which stacks to record; all of them if None
+        """
+        self.interval = interval
+        self.annotate = annotate
+        self.include = include
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._names: Dict[CodeType, str] = {}
+
+    def _name(self, code: CodeType) -> str:
+        name = self._names.get(code)
+        if name is None:
+            path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)
+            name = self._names[code] = f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+        return name
+
+    def sample(self) -> None:
+        """Record the current stack of every other thread."""
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            frames.reverse()
+            if self.include is not None and not self.include(frames):
+                continue
+            names = [self._name(f.f_code) for f in frames]
+            label = self.annotate(frames) if self.annotate is not None else None
+            if label:
+                names.insert(0, label.replace(";", ","))
+            self.counts[";".join(names)] += 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> None:
+        """Sample for the given number of seconds, blocking the calling thread."""
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_sample = start
+        while True:
+            self.sample()
+            next_sample += self.interval
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # Sampling took longer than the interval: skip the missed samples
+            if next_sample < now:
+                next_sample = now
+            time.sleep(min(next_sample, deadline) - now)
+
+    def collapsed(self) -> str:
+        """The recorded stacks, one `frame;frame;... count` line each, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def profile(seconds: float, interval: float = INTERVAL, requests_only: bool = True) -> str:
+    """
+    Sample the running threads and return their stacks in the collapsed format.
+
+    :param seconds: How long to sample, clamped to [0, MAX_SECONDS]
+    :param interval: Seconds between samples
+    :param requests_only: Record only the threads handling Django requests
+    :raises ValueError: If seconds is NaN, or interval is not a positive finite number
+    :raises RuntimeError: If a profile is already running
+    :return: The collapsed stacks, annotated with the workspace they run in
+    """
+    # NaN would never reach the deadline, and compares false with everything: check first
+    if math.isnan(seconds):
+        raise ValueError("seconds must be a number")
+    if not (math.isfinite(interval) and interval > 0):
+        raise ValueError("interval must be a positive number")
+    seconds = min(max(seconds, 0.0), MAX_SECONDS)
+    if not _running.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        sampler = StackSampler(interval, include=request_thread if requests_only else None)
+        sampler.run(seconds)
+        return sampler.collapsed()
+    finally:
+        _running.release()
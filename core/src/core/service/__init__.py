@@ -1,3 +1,9 @@
 from .plugin_service import PluginService
+from .workspace_store import WorkspaceStore
+from .persistence import WorkspacePersistence
+from .source_watcher import SourceWatcher
+from .jobs import Job, JobQueue, JobState
+from .change_feed import ChangeFeed, Subscription
 
-__all__ = ["PluginService"]
\ No newline at end of file
+__all__ = ["PluginService", "WorkspaceStore", "WorkspacePersistence", "SourceWatcher", "Job", "JobQueue", "JobState",
+           "ChangeFeed", "Subscription"]
\ No newline at end of file
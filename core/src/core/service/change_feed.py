@@ -0,0 +1,194 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from api.interface.observer import Observer
+from api.model import Graph
+
+# Default number of coalesced changes a subscription holds before it needs a resync
+MAX_PENDING = 1000
+
+# Changes that make a node or edge appear or disappear; the others update it
+_EXISTENCE = ("add_node", "remove_node", "add_edge", "remove_edge")
+
+# Key of a clear: it outdates every change before it
+_CLEAR = ("clear",)
+
+
+def _compact(event: Dict[str, Any]) -> Iterator[Tuple[tuple, Dict[str, Any]]]:
+    """
+    Turn a graph notification into compact, JSON-ready changes keyed by the node or edge
+    they touch. Batches are flattened.
+    """
+    action = event.get("action")
+    if action == "batch":
+        for inner in event.get("events", ()):
+            yield from _compact(inner)
+    elif action in ("add_node", "remove_node", "update_node"):
+        node = event["node"]
+        key = ("node", str(node.id))
+        change: Dict[str, Any] = {"op": action, "id": key[1]}
+        if action == "add_node":
+            change["data"] = dict(node.data)
+        elif action == "update_node":
+            change["set"] = dict(event.get("properties") or {})
+            change["unset"] = list(event.get("removed", ()))
+        yield key, change
+    elif action in ("add_edge", "remove_edge", "update_edge"):
+        edge = event["edge"]
+        key = ("edge", str(edge.origin.id), str(edge.target.id))
+        change = {"op": action, "from": key[1], "to": key[2]}
+        if action == "add_edge":
+            change["data"] = dict(edge.data)
+        elif action == "update_edge":
+            change["set"] = dict(event.get("properties") or {})
+            change["unset"] = list(event.get("removed", ()))
+        yield key, change
+    elif action == "clear_graph":
+        yield _CLEAR, {"op": "clear"}
+
+
+def _merge(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold an update into an earlier change of the same node or edge."""
+    if old["op"].startswith("add_"):
+        data = {k: v for k, v in old["data"].items() if k not in new["unset"]}
+        data.update(new["set"])
+        return dict(old, data=data)
+    if old["op"].startswith("update_"):
+        values = {k: v for k, v in old["set"].items() if k not in new["unset"]}
+        values.update(new["set"])
+        unset = [k for k in old["unset"] if k not in new["set"]]
+        unset.extend(k for k in new["unset"] if k not in unset)
+        return dict(old, set=values, unset=unset)
+    return new
+
+
+class Subscription(object):
+    """
+    The changes of a graph not yet taken by one subscriber, coalesced: each node or edge
+    has at most one pending change, so a slow subscriber gets the net effect of what it
+    missed rather than every step.
+
+    Backpressure: the graph never waits for subscribers. When more than max_pending nodes
+    and edges have pending changes, they are dropped and the subscriber is told to resync,
+    i.e. to fetch the whole graph again.
+    """
+
+    def __init__(self, feed: "ChangeFeed", version: int, max_pending: int = MAX_PENDING):
+        """
+        :param feed: The feed the subscription belongs to
+        :param version: Version of the graph when subscribing
+        :param max_pending: Number of coalesced changes held before asking for a resync
+        """
+        self._feed = feed
+        self._max_pending = max_pending
+        self._pending: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = version
+        self.overflowed = False
+        self.closed = False
+
+    def push(self, version: int, changes: List[Tuple[tuple, Dict[str, Any]]]) -> None:
+        """Add the changes made to the graph up to the given version."""
+        with self._lock:
+            self.version = version
+            if self.overflowed:
+                return
+            for key, change in changes:
+                if key is _CLEAR:
+                    self._pending.clear()
+                    self._pending[key] = change
+                    continue
+                old = self._pending.get(key)
+                if old is None or change["op"] in _EXISTENCE:
+                    self._pending[key] = change
+                    # Keeps the order nodes and edges appear and disappear in, so edges
+                    # come after their nodes
+                    self._pending.move_to_end(key)
+                else:
+                    self._pending[key] = _merge(old, change)
+            if len(self._pending) > self._max_pending:
+                self._pending.clear()
+                self.overflowed = True
+
+    def drain(self) -> Tuple[int, List[Dict[str, Any]], bool]:
+        """
+        Take the pending changes.
+
+        :return: The graph version they bring the subscriber to, the changes in the order
+                 to apply them, and whether the subscriber must resync instead
+        """
+        with self._lock:
+            changes = list(self._pending.values())
+            self._pending.clear()
+            resync, self.overflowed = self.overflowed, False
+            return self.version, changes, resync
+
+    def close(self) -> None:
+        """Stop receiving changes."""
+        self.closed = True
+        self._feed.unsubscribe(self)
+
+
+class ChangeFeed(Observer):
+    """
+    Fans out the change notifications of a graph to subscribers as compact changes
+    (see Subscription), tagged with the version of the graph.
+
+    The feed observes the graph only while it has subscribers.
+    """
+
+    def __init__(self, graph: Graph, max_pending: int = MAX_PENDING):
+        """
+        :param graph: The graph to follow
+        :param max_pending: Number of coalesced changes a subscription holds before it needs a resync
+        """
+        self._graph = graph
+        self._max_pending = max_pending
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def graph(self) -> Graph:
+        return self._graph
+
+    def subscribe(self) -> Subscription:
+        """Start receiving the changes made to the graph from now on."""
+        with self._lock:
+            subscription = Subscription(self, self._graph.version, self._max_pending)
+            if not self._subscriptions:
+                self._graph.attach(self)
+            self._subscriptions.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                if not self._subscriptions:
+                    self._graph.detach(self)
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def close(self) -> None:
+        """Close every subscription, e.g. when the graph is dropped from memory."""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+            self._graph.detach(self)
+        for subscription in subscriptions:
+            subscription.closed = True
+
+    def update(self, observable=None, *args, **kwargs) -> None:
+        if observable is not self._graph:
+            return
+        changes = list(_compact(kwargs))
+        if not changes:
+            return
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        version = self._graph.version
+        for subscription in subscriptions:
+            subscription.push(version, changes)
@@ -0,0 +1,170 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from api.log import get_logger
+
+_log = get_logger(__name__)
+
+# Default number of jobs run at once, and of finished jobs kept for their status
+MAX_WORKERS = 1
+KEEP_FINISHED = 50
+
+
+class JobState(Enum):
+    QUEUED = "queued"
+    LOADING = "loading"
+    INDEXING = "indexing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class Job(object):
+    """
+    A background task and how far it got: its state, the fraction done and the current
+    step. Each change bumps `version`, so pollers can tell whether anything happened since
+    they last looked, and wakes the threads blocked in wait().
+    """
+
+    def __init__(self, name: str, owner: Optional[str] = None):
+        """
+        :param name: What the job does, shown to users
+        :param owner: Identifier of the session that started the job, if any
+        """
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.owner = owner
+        self.state = JobState.QUEUED
+        self.progress = 0.0
+        self.step: Optional[str] = None
+        self.error: Optional[str] = None
+        self.result: Any = None
+        self.created = time.time()
+        self.updated = self.created
+        self.version = 0
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.READY, JobState.FAILED)
+
+    def update(self, state: Optional[JobState] = None, progress: Optional[float] = None,
+               step: Optional[str] = None) -> None:
+        """
+        Record the progress of the job. A new state resets the step; the progress is the
+        fraction of the whole job done, from 0 to 1, and never goes back.
+        """
+        with self._changed:
+            if state is not None and state != self.state:
+                self.state = state
+                self.step = None
+            if progress is not None:
+                self.progress = max(self.progress, min(progress, 1.0))
+            if step is not None:
+                self.step = step
+            self.updated = time.time()
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait(self, version: int, timeout: Optional[float] = None) -> int:
+        """
+        Block until the job changes past the given version, finishes, or the timeout expires.
+
+        :return: The current version
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self.finished, timeout)
+            return self.version
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The job's status as JSON-serializable data."""
+        with self._changed:
+            return {
+                "id": self.id,
+                "name": self.name,
+                "state": self.state.value,
+                "progress": round(self.progress, 3),
+                "step": self.step,
+                "error": self.error,
+                "result": self.result,
+                "finished": self.finished,
+                "version": self.version,
+            }
+
+
+class JobQueue(object):
+    """
+    Runs jobs in background threads, max_workers at a time, so requests starting them
+    return at once. Finished jobs are kept, up to keep_finished of them, so their
+    status can still be asked for.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, keep_finished: int = KEEP_FINISHED):
+        """
+        :param max_workers: Number of jobs run at once; the others wait in the queue
+        :param keep_finished: Number of finished jobs kept, the oldest being dropped first
+        """
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="job-worker")
+        self._keep_finished = keep_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable[[Job], Any], owner: Optional[str] = None) -> Job:
+        """
+        Queue a job.
+
+        The function gets the job, to report its progress with Job.update; its return
+        value becomes the job's result and the job READY. An exception makes it FAILED.
+
+        :param name: What the job does, shown to users
+        :param func: The work to run
+        :param owner: Identifier of the session starting the job, if any
+        :return: The queued job
+        """
+        job = Job(name, owner)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job, func)
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Any]) -> None:
+        try:
+            job.result = func(job)
+        except Exception as e:
+            _log.exception("Job %s (%s) failed", job.id, job.name)
+            job.error = str(e) or type(e).__name__
+            job.update(JobState.FAILED)
+        else:
+            job.update(JobState.READY, progress=1.0)
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond keep_finished. Called with _lock held."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self._keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given id, or None if unknown or dropped."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: Optional[str] = None, pending: bool = False) -> List[Job]:
+        """
+        The jobs kept, oldest first.
+
+        :param owner: Only the jobs of this session, if given
+        :param pending: Only the jobs that haven't finished
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs
+                if (owner is None or job.owner == owner) and not (pending and job.finished)]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers, dropping the jobs that haven't started."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,455 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from api.interface.observer import Observer
+from api.model import Edge, Graph, Node
+
+from ..model.base_filter import BaseFilter
+from ..model.edge_filter import EdgeFilter
+from ..model.filter import Filter
+from ..model.filter_expression import CompositeFilter, parse_filter_expression
+from ..model.search import Search
+from ..model.workspace import Workspace, WorkspaceView, load_base_graph
+
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "log.jsonl"
+
+
+def _encode(value):
+    """json default hook for the data values JSON has no type for."""
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: Dict[str, Any]):
+    """json object hook reversing _encode."""
+    if len(obj) == 1:
+        if "$datetime" in obj:
+            return datetime.fromisoformat(obj["$datetime"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+    return obj
+
+
+def dumps(obj) -> str:
+    """Serialize to a single line of JSON, keeping dates and datetimes."""
+    return json.dumps(obj, default=_encode, separators=(",", ":"))
+
+
+def loads(text: str):
+    """Reverse dumps()."""
+    return json.loads(text, object_hook=_decode)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Replace a file's content so readers see either the old or the new version."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def filter_to_dict(filter_: BaseFilter) -> Dict[str, Any]:
+    """Describe a Filter, Search or filter expression tree as plain data."""
+    if isinstance(filter_, CompositeFilter):
+        return {"kind": "expression", "text": filter_.expression}
+    if isinstance(filter_, Search):
+        return {"kind": "search", "value": filter_.value}
+    if isinstance(filter_, Filter):
+        return {"kind": "edge_filter" if isinstance(filter_, EdgeFilter) else "filter",
+                "attribute": filter_.attribute,
+                "operator": filter_.operator, "value": filter_.value}
+    raise TypeError(f"Cannot persist filter of type {type(filter_).__name__}")
+
+
+def filter_from_dict(data: Dict[str, Any]) -> BaseFilter:
+    """Reverse filter_to_dict()."""
+    if data["kind"] == "search":
+        return Search(value=data["value"])
+    if data["kind"] == "expression":
+        return parse_filter_expression(data["text"])
+    cls = EdgeFilter if data["kind"] == "edge_filter" else Filter
+    return cls(attribute=data["attribute"], value=data["value"], operator=data["operator"])
+
+
+def event_to_record(action: str, **kwargs) -> List[Dict[str, Any]]:
+    """
+    Turn a Graph change event into log records. Batches are flattened.
+
+    :param action: The action the graph notified observers with
+    :return: Records to append to the log, empty for events that are not mutations
+    """
+    if action == "batch":
+        return [r for event in kwargs.get("events", []) for r in event_to_record(**event)]
+    if action in ("add_node", "remove_node"):
+        node = kwargs["node"]
+        record = {"action": action, "id": node.id}
+        if action == "add_node":
+            record["data"] = node.data
+        return [record]
+    if action == "add_edge":
+        edge = kwargs["edge"]
+        return [{"action": action,
+                 "origin": {"id": edge.origin.id, "data": edge.origin.data},
+                 "target": {"id": edge.target.id, "data": edge.target.data},
+                 "data": edge.data}]
+    if action == "remove_edge":
+        edge = kwargs["edge"]
+        return [{"action": action, "origin": edge.origin.id, "target": edge.target.id}]
+    if action == "update_node":
+        return [{"action": action, "id": kwargs["node"].id, "properties": kwargs["properties"],
+                 "removed": kwargs.get("removed", [])}]
+    if action == "update_edge":
+        edge = kwargs["edge"]
+        return [{"action": action, "origin": edge.origin.id, "target": edge.target.id,
+                 "properties": kwargs["properties"], "removed": kwargs.get("removed", [])}]
+    if action == "clear_graph":
+        return [{"action": action}]
+    return []
+
+
+def replay(graph: Graph, records) -> int:
+    """
+    Apply log records to a graph, in order.
+
+    Nodes and edges are looked up through dicts built once, so replaying a long log
+    does not scan the graph for every record. Records that no longer apply, e.g.
+    because the data source file changed while the server was down, are skipped.
+
+    :return: Number of records applied
+    """
+    nodes: Dict[str, Node] = {n.id: n for n in graph.nodes}
+    edges: Optional[Dict[Tuple[str, str], Edge]] = None
+    count = 0
+    with graph.batch():
+        for record in records:
+            action = record["action"]
+            try:
+                if action == "add_node":
+                    node = Node(id=record["id"], data=record["data"])
+                    graph.add_node(node)
+                    nodes[node.id] = node
+                elif action == "add_edge":
+                    ends = []
+                    for end in (record["origin"], record["target"]):
+                        node = nodes.get(end["id"])
+                        if node is None:
+                            node = nodes[end["id"]] = Node(id=end["id"], data=end["data"])
+                        ends.append(node)
+                    edge = Edge(ends[0], ends[1], data=record["data"])
+                    graph.add_edge(edge)
+                    if edges is not None:
+                        if graph.is_directed():
+                            edges.setdefault((edge.origin.id, edge.target.id), edge)
+                        else:
+                            # Undirected graphs store a reversed copy; rebuild the index when needed
+                            edges = None
+                elif action == "remove_node":
+                    graph.remove_node(record["id"])
+                    nodes.pop(record["id"], None)
+                elif action == "remove_edge":
+                    graph.remove_edge(record["origin"], record["target"])
+                    if edges is not None:
+                        edges.pop((record["origin"], record["target"]), None)
+                elif action in ("update_node", "update_edge"):
+                    if action == "update_node":
+                        item = nodes[record["id"]]
+                    else:
+                        if edges is None:
+                            edges = {(e.origin.id, e.target.id): e for e in graph.edges}
+                        item = edges[(record["origin"], record["target"])]
+                    item.update_properties(record["properties"])
+                    for key in record.get("removed", ()):
+                        item.data.pop(key, None)
+                elif action == "clear_graph":
+                    graph.clear()
+                    nodes.clear()
+                    edges = None
+            except (KeyError, ValueError):
+                continue
+            count += 1
+    return count
+
+
+class WorkspaceJournal(Observer):
+    """
+    Persists one workspace as files in its own directory:
+
+    - manifest.json: name, visualizer, data source identifier, filters of the workspace
+      and of every session view opened on it;
+    - log.jsonl: append-only log of the Graph change events, one JSON record per line,
+      numbered by "seq";
+    - snapshot.json: the compacted graph and the seq of the last record it includes.
+
+    Without a snapshot the graph is the data source's dataset, so a workspace nobody
+    edited is stored as little more than a reference to its data source.
+    """
+
+    def __init__(self, directory: Path, snapshot_every: int = 1000, fsync: bool = False):
+        """
+        :param directory: Directory of this workspace's files
+        :param snapshot_every: Number of log records after which the graph is compacted into a snapshot
+        :param fsync: Whether every log record is flushed to disk before the change completes
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._snapshot_every = snapshot_every
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._workspace: Optional[Workspace] = None
+        self._log = None
+        self._seq = 0
+        self._since_snapshot = 0
+        self._manifest: Dict[str, Any] = {}
+        # Session id -> view watched for filter and visualizer changes
+        self._views: Dict[str, WorkspaceView] = {}
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """The last written manifest."""
+        return self._manifest
+
+    def read(self) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Read the persisted state.
+
+        :return: The manifest, the snapshot (or None) and the log records newer than the snapshot
+        """
+        manifest = loads((self.directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        snapshot = loads(snapshot_path.read_text(encoding="utf-8")) if snapshot_path.exists() else None
+        since = snapshot["seq"] if snapshot else 0
+        tail = [r for r in self._read_log() if r["seq"] > since]
+        self._manifest = manifest
+        self._seq = max([since] + [r["seq"] for r in tail])
+        self._since_snapshot = len(tail)
+        return manifest, snapshot, tail
+
+    def _read_log(self) -> Iterator[Dict[str, Any]]:
+        path = self.directory / LOG_FILE
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield loads(line)
+                except ValueError:
+                    # A record torn by a crash can only be the last one
+                    return
+
+    def attach(self, workspace: Workspace) -> None:
+        """Start recording a workspace's graph changes and filter changes."""
+        with self._lock:
+            self._workspace = workspace
+            if self._log is None:
+                self._log = open(self.directory / LOG_FILE, "a", encoding="utf-8")
+        workspace.graph_reference.attach(self)
+        workspace.attach(self)
+        self.write_manifest()
+
+    def detach(self) -> None:
+        """Stop recording, e.g. because the workspace was evicted from memory."""
+        with self._lock:
+            workspace, self._workspace = self._workspace, None
+            views, self._views = list(self._views.values()), {}
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+        if workspace is not None:
+            workspace.graph_reference.detach(self)
+            workspace.detach(self)
+        for view in views:
+            view.detach(self)
+
+    def watch_view(self, session_id: str, view: WorkspaceView) -> None:
+        """Persist the filters and visualizer of a session's view of the workspace."""
+        with self._lock:
+            if self._views.get(session_id) is view:
+                return
+            self._views[session_id] = view
+        view.attach(self)
+
+    def update(self, observable=None, *args, **kwargs) -> None:
+        """Append graph changes to the log; rewrite the manifest when filters change."""
+        action = kwargs.get("action")
+        if action in ("filters_changed", "select_visualizer"):
+            self.write_manifest()
+            return
+        workspace = self._workspace
+        if workspace is None or observable is not workspace.graph_reference:
+            return
+        records = event_to_record(**kwargs)
+        if not records:
+            return
+        with self._lock:
+            if self._log is None:
+                return
+            for record in records:
+                self._seq += 1
+                record["seq"] = self._seq
+                self._log.write(dumps(record) + "\n")
+            self._log.flush()
+            if self._fsync:
+                os.fsync(self._log.fileno())
+            self._since_snapshot += len(records)
+            compact = self._since_snapshot >= self._snapshot_every
+        if compact:
+            # Graph observers run while the mutation holds the workspace write lock
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Write the current graph as a snapshot and truncate the log.
+
+        Records are numbered, so a crash between the two steps only leaves records the
+        snapshot already includes, and those are skipped on restore.
+        """
+        workspace = self._workspace
+        if workspace is None:
+            return
+        with workspace.lock.read():
+            graph = workspace.graph_reference.to_dict()
+        with self._lock:
+            _write_atomic(self.directory / SNAPSHOT_FILE, dumps({"seq": self._seq, "graph": graph}))
+            if self._log is not None:
+                self._log.close()
+            self._log = open(self.directory / LOG_FILE, "w", encoding="utf-8")
+            self._since_snapshot = 0
+
+    def write_manifest(self) -> None:
+        """Write the workspace's name, visualizer and filters, and those of the watched views."""
+        workspace = self._workspace
+        if workspace is None:
+            return
+        with self._lock:
+            views = dict(self._manifest.get("views", {}))
+            for session_id, view in self._views.items():
+                if view.filters or view.visualizer_id != workspace.visualizer_id:
+                    views[session_id] = {"visualizer_id": view.visualizer_id,
+                                         "filters": [filter_to_dict(f) for f in list(view.filters)]}
+                else:
+                    views.pop(session_id, None)
+            self._manifest = {
+                "id": workspace.id,
+                "name": workspace.name,
+                "created": self._manifest.get("created", time.time()),
+                "data_source": workspace.data_source_plugin.identifier(),
+                "visualizer_id": workspace.visualizer_id,
+                "filters": [filter_to_dict(f) for f in list(workspace.filters)],
+                "views": views,
+            }
+            _write_atomic(self.directory / MANIFEST_FILE, dumps(self._manifest))
+
+
+class WorkspacePersistence(object):
+    """
+    Keeps workspaces across restarts, one WorkspaceJournal directory per workspace.
+
+    restore_all() rebuilds every persisted workspace from its data source (or its last
+    snapshot) and replays only the log records written since.
+    """
+
+    def __init__(self, directory: str | os.PathLike, snapshot_every: int = 1000, fsync: bool = False):
+        """
+        :param directory: Directory holding one subdirectory per workspace
+        :param snapshot_every: Number of log records after which a workspace graph is compacted
+        :param fsync: Whether every log record is flushed to disk before the change completes
+        """
+        self._directory = Path(directory)
+        self._snapshot_every = snapshot_every
+        self._fsync = fsync
+        self._journals: Dict[str, WorkspaceJournal] = {}
+        self._lock = threading.Lock()
+
+    def _journal(self, workspace_id: str) -> WorkspaceJournal:
+        with self._lock:
+            journal = self._journals.get(workspace_id)
+            if journal is None:
+                journal = WorkspaceJournal(self._directory / workspace_id, self._snapshot_every, self._fsync)
+                self._journals[workspace_id] = journal
+            return journal
+
+    def attach(self, workspace: Workspace) -> WorkspaceJournal:
+        """Start persisting a new or reloaded workspace."""
+        journal = self._journal(workspace.id)
+        journal.attach(workspace)
+        return journal
+
+    def detach(self, workspace_id: str) -> None:
+        """Stop persisting changes of a workspace that is leaving memory; its files are kept."""
+        with self._lock:
+            journal = self._journals.get(workspace_id)
+        if journal is not None:
+            journal.detach()
+
+    def watch_view(self, workspace_id: str, session_id: str, view: WorkspaceView) -> None:
+        """Persist the filters and visualizer of a session's view of a workspace."""
+        with self._lock:
+            journal = self._journals.get(workspace_id)
+        if journal is not None:
+            journal.watch_view(session_id, view)
+
+    def delete(self, workspace_id: str) -> None:
+        """Stop persisting a workspace and remove its files."""
+        self.detach(workspace_id)
+        with self._lock:
+            self._journals.pop(workspace_id, None)
+        shutil.rmtree(self._directory / workspace_id, ignore_errors=True)
+
+    def restore_all(self, plugin_lookup: Callable[[str], Any]) -> List[Tuple[Workspace, Dict[str, Any]]]:
+        """
+        Rebuild all persisted workspaces, oldest first, and start persisting them again.
+
+        Workspaces whose data source plugin is no longer installed are skipped.
+
+        :param plugin_lookup: Returns the data source plugin for an identifier, or None
+        :return: (workspace, persisted session views) pairs; views map session ids to
+                 {"visualizer_id", "filters"} with filters already rebuilt
+        """
+        if not self._directory.is_dir():
+            return []
+        restored = []
+        for path in self._directory.iterdir():
+            if not (path / MANIFEST_FILE).is_file():
+                continue
+            journal = self._journal(path.name)
+            manifest, snapshot, tail = journal.read()
+            plugin = plugin_lookup(manifest["data_source"])
+            if plugin is None:
+                continue
+            if snapshot is not None:
+                graph = Graph.from_dict(snapshot["graph"])
+            else:
+                graph = load_base_graph(plugin)
+            replay(graph, tail)
+            ws = Workspace(plugin, name=manifest["name"], visualizer_id=manifest["visualizer_id"],
+                           graph=graph, workspace_id=manifest["id"])
+            if manifest["filters"]:
+                ws.set_filters(filter_from_dict(f) for f in manifest["filters"])
+            views = {session_id: {"visualizer_id": v["visualizer_id"],
+                                  "filters": {filter_from_dict(f) for f in v["filters"]}}
+                     for session_id, v in manifest.get("views", {}).items()}
+            restored.append((manifest.get("created", 0), ws, views))
+        restored.sort(key=lambda item: item[0])
+        for _, ws, _ in restored:
+            self.attach(ws)
+        return [(ws, views) for _, ws, views in restored]
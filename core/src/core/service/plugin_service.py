@@ -1,26 +1,141 @@
-from importlib.metadata import entry_points
-from typing import List
-
-from api.services import DataSourcePlugin
+import re
+import threading
+import time
+from importlib.metadata import EntryPoint, entry_points
+from typing import Any, Dict, List
 
 from api.services import Plugin
 
+_CAMEL_CASE_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+class PluginProxy(object):
+    """
+    Stand-in for a plugin that imports and constructs it on first use.
+
+    The identifier and class name come from the entry point (its name and its object
+    reference), so listing and looking up plugins imports nothing. Any other attribute
+    access loads the plugin and is forwarded to it.
+    """
+
+    def __init__(self, entry_point: EntryPoint):
+        """
+        :param entry_point: Entry point whose name is the plugin identifier
+        """
+        self._entry_point = entry_point
+        self._plugin: Plugin | None = None
+        self._lock = threading.Lock()
+        self.import_seconds: float | None = None
+        self.init_seconds: float | None = None
+
+    @property
+    def class_name(self) -> str:
+        """Name of the plugin class, read from the entry point."""
+        return self._entry_point.attr.rsplit(".", 1)[-1]
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the plugin was imported and constructed."""
+        return self._plugin is not None
+
+    def identifier(self) -> str:
+        """The plugin identifier, which is the entry point name."""
+        return self._entry_point.name
+
+    def name(self) -> str:
+        """
+        The plugin's display name. Until the plugin is loaded it is derived from the
+        class name (e.g. "SimpleVisualizer" -> "Simple Visualizer").
+        """
+        if self._plugin is not None:
+            return self._plugin.name()
+        return _CAMEL_CASE_RE.sub(" ", self.class_name)
+
+    def load(self) -> Plugin:
+        """Import and construct the plugin if that did not happen yet, and return it."""
+        if self._plugin is None:
+            with self._lock:
+                if self._plugin is None:
+                    start = time.perf_counter()
+                    plugin_class = self._entry_point.load()
+                    loaded = time.perf_counter()
+                    plugin = plugin_class()
+                    self.import_seconds = loaded - start
+                    self.init_seconds = time.perf_counter() - loaded
+                    self._plugin = plugin
+        return self._plugin
+
+    def __getattr__(self, item: str) -> Any:
+        # Only called for attributes the proxy doesn't have itself
+        if item.startswith("__"):
+            raise AttributeError(item)
+        return getattr(self.load(), item)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"PluginProxy({self._entry_point.value!r}, {state})"
+
 
 class PluginService(object):
 
     def __init__(self):
-        self.plugins: dict[str,List[Plugin]] = {}
+        self.plugins: dict[str,List[PluginProxy]] = {}
+        # group -> identifier or class name -> plugin
+        self._index: dict[str, dict[str, PluginProxy]] = {}
 
     def load_plugins(self, group: str):
         """
-        Dynamically loads plugins based on entrypoint group.
+        Registers the plugins of an entrypoint group.
+
+        Plugins are registered as PluginProxy objects; a plugin is only imported and
+        constructed when it is first used.
         """
         self.plugins[group] = []
+        self._index[group] = {}
         for ep in entry_points(group=group):
-            p = ep.load()
-            plugin: DataSourcePlugin = p()
+            plugin = PluginProxy(ep)
             self.plugins[group].append(plugin)
+            self._index[group].setdefault(plugin.class_name, plugin)
+            self._index[group].setdefault(plugin.identifier(), plugin)
 
     def get_plugins(self, group: str):
         "Gets plugins based on entrypoint group."
-        return self.plugins.get(group, [])
\ No newline at end of file
+        return self.plugins.get(group, [])
+
+    def get_plugin(self, group: str, key: str):
+        """
+        Gets a plugin of the entrypoint group by its identifier or class name.
+        Returns None if there is no such plugin.
+        """
+        return self._index.get(group, {}).get(key)
+
+    def preload(self, group: str | None = None) -> None:
+        """
+        Imports and constructs the plugins of a group, or of all groups, ahead of use.
+        """
+        groups = [group] if group is not None else list(self.plugins)
+        for g in groups:
+            for plugin in self.get_plugins(g):
+                plugin.load()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Import and construction cost of every registered plugin, most expensive first.
+
+        Times are None for plugins that were not loaded yet.
+
+        :return: Dicts with group, identifier, class_name, loaded, import_ms and init_ms
+        """
+        rows = []
+        for group, plugins in self.plugins.items():
+            for plugin in plugins:
+                rows.append({
+                    "group": group,
+                    "identifier": plugin.identifier(),
+                    "class_name": plugin.class_name,
+                    "loaded": plugin.loaded,
+                    "import_ms": None if plugin.import_seconds is None else plugin.import_seconds * 1000,
+                    "init_ms": None if plugin.init_seconds is None else plugin.init_seconds * 1000,
+                })
+        rows.sort(key=lambda r: (r["import_ms"] or 0) + (r["init_ms"] or 0), reverse=True)
+        return rows
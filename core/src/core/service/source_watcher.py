@@ -0,0 +1,85 @@
+import os
+import threading
+from typing import Callable, Dict, Iterable, Tuple
+
+from api.log import get_logger
+from api.services import DataSourcePlugin
+
+_log = get_logger(__name__)
+
+
+class SourceWatcher(object):
+    """
+    Polls the modification times of the files data source plugins loaded from, and
+    reports plugins whose files changed.
+
+    Only plugins that were already loaded are polled, so watching never imports one.
+    """
+
+    def __init__(self,
+                 plugins: Callable[[], Iterable[DataSourcePlugin]],
+                 on_change: Callable[[DataSourcePlugin], None],
+                 interval: float = 2.0):
+        """
+        :param plugins: Returns the data source plugins to watch
+        :param on_change: Called with a plugin whose source files changed
+        :param interval: Seconds between two polls
+        """
+        self._plugins = plugins
+        self._on_change = on_change
+        self._interval = interval
+        # (plugin identifier, path) -> last seen modification time
+        self._mtimes: Dict[Tuple[str, str], int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def poll(self) -> int:
+        """
+        Check all source files once and report the plugins whose files changed.
+
+        Files are recorded the first time they are seen, without a report.
+
+        :return: Number of plugins reported
+        """
+        changed = 0
+        for plugin in self._plugins():
+            if not getattr(plugin, "loaded", True):
+                continue
+            modified = False
+            for path in plugin.source_files():
+                key = (plugin.identifier(), path)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                previous = self._mtimes.get(key)
+                self._mtimes[key] = mtime
+                if previous is not None and previous != mtime:
+                    modified = True
+            if modified:
+                changed += 1
+                try:
+                    self._on_change(plugin)
+                except Exception:
+                    # A broken file must not stop the watcher; the next change retries
+                    _log.exception("Reloading %s failed", plugin.identifier())
+        return changed
+
+    def start(self) -> None:
+        """Poll in a daemon thread until stop() is called."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="source-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and wait for the thread to end."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.poll()
@@ -0,0 +1,62 @@
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+
+class WorkspaceStore(object):
+    """
+    Stores workspace snapshots (see Workspace.snapshot) as pickle files in a local
+    directory, one file per workspace id.
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None):
+        """
+        :param directory: Directory for the snapshot files; a temporary directory if None
+        """
+        self._directory = Path(directory) if directory is not None else None
+
+    @property
+    def directory(self) -> Path:
+        """Directory holding the snapshot files, created on first use."""
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="sok-workspaces-"))
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return self._directory
+
+    def _path(self, workspace_id: str) -> Path:
+        return self.directory / f"{workspace_id}.pickle"
+
+    def save(self, workspace_id: str, state: Dict[str, Any]) -> int:
+        """
+        Write a snapshot atomically, replacing any previous one.
+
+        :return: Size of the snapshot file in bytes
+        """
+        path = self._path(workspace_id)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path.stat().st_size
+
+    def load(self, workspace_id: str) -> Dict[str, Any]:
+        """
+        Read a snapshot.
+
+        :raises FileNotFoundError: If there is no snapshot for the workspace
+        """
+        with open(self._path(workspace_id), "rb") as f:
+            return pickle.load(f)
+
+    def delete(self, workspace_id: str) -> None:
+        """Remove a snapshot if it exists."""
+        try:
+            self._path(workspace_id).unlink()
+        except FileNotFoundError:
+            pass
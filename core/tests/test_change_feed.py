@@ -0,0 +1,57 @@
+from api.model import Node
+from core.service import ChangeFeed
+
+
+def test_changes_to_one_node_are_coalesced(graph):
+    subscription = ChangeFeed(graph).subscribe()
+
+    graph.update_node("a", {"rating": 2})
+    graph.update_node("a", {"rating": 3, "year": 1999})
+    graph.add_node(Node("c", {"rating": 4}))
+    graph.update_node("c", {"rating": 5})
+
+    version, changes, resync = subscription.drain()
+    assert version == graph.version
+    assert not resync
+    assert changes == [{"op": "update_node", "id": "a", "set": {"rating": 3, "year": 1999}, "unset": []},
+                       {"op": "add_node", "id": "c", "data": {"rating": 5}}]
+    assert subscription.drain()[1] == []
+
+
+def test_removal_replaces_the_earlier_changes(graph):
+    subscription = ChangeFeed(graph).subscribe()
+
+    graph.add_node(Node("c", {}))
+    graph.update_node("a", {"rating": 2})
+    graph.remove_edge("a", "b")
+    graph.remove_node("a")
+
+    assert subscription.drain()[1] == [{"op": "add_node", "id": "c", "data": {}},
+                                       {"op": "remove_edge", "from": "a", "to": "b"},
+                                       {"op": "remove_node", "id": "a"}]
+
+
+def test_overflowing_subscription_asks_for_a_resync(graph):
+    feed = ChangeFeed(graph, max_pending=2)
+    slow, fast = feed.subscribe(), feed.subscribe()
+
+    graph.add_node(Node("c", {}))
+    assert fast.drain()[1] == [{"op": "add_node", "id": "c", "data": {}}]
+    graph.add_node(Node("d", {}))
+    graph.add_node(Node("e", {}))
+
+    version, changes, resync = slow.drain()
+    assert (version, changes, resync) == (graph.version, [], True)
+    assert not fast.drain()[2]
+    # Back to normal once the subscriber resynced
+    graph.update_node("a", {"rating": 2})
+    assert slow.drain()[1:] == ([{"op": "update_node", "id": "a", "set": {"rating": 2}, "unset": []}], False)
+
+
+def test_feed_observes_the_graph_only_while_subscribed(graph):
+    feed = ChangeFeed(graph)
+    subscription = feed.subscribe()
+    subscription.close()
+
+    assert feed.subscribers == 0
+    assert feed not in graph._observers
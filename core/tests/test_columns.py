@@ -0,0 +1,52 @@
+from datetime import date, datetime
+from itertools import product
+
+import pytest
+
+from api.model import Node
+from core.model.filter import Filter
+from core.model.filter_expression import test as apply_or_exclude
+
+np = pytest.importorskip("numpy")
+from core.model.columns import AttributeColumns  # noqa: E402
+
+VALUES = [None, 0, 5, -7, 2 ** 62, 2 ** 70, -2 ** 70, 5.0, 2.5, float("nan"), float("inf"), -0.0,
+          True, False, "a", "b", "", datetime(2020, 1, 1), datetime(1999, 12, 31, 23, 59),
+          date(2020, 1, 1), (1, 2), [1, 2]]
+
+FILTER_VALUES = [5, 0, 2 ** 70, -2 ** 70, 5.0, float("nan"), float("inf"), True, False, "b",
+                 datetime(2020, 1, 1)]
+
+
+def _items():
+    items = [Node(str(i), {"v": value} if value is not None else {}) for i, value in enumerate(VALUES)]
+    # Missing and mixed rows first, so columns don't start with the filter's type
+    return items + [Node("missing", {"other": 1})]
+
+
+@pytest.mark.parametrize("operator, value", list(product(Filter.OPERATORS, FILTER_VALUES)))
+def test_mask_agrees_with_apply(operator, value):
+    items = _items()
+    filter_ = Filter("v", value, operator)
+
+    mask = AttributeColumns(items).mask(filter_)
+
+    assert mask is not None
+    # A type mismatch (TypeError) excludes the item, as when filters are applied one by one
+    assert [bool(m) for m in mask] == [apply_or_exclude(filter_, item) for item in items]
+
+
+def test_only_values_of_the_filter_type_match():
+    items = [Node("int", {"v": 1}), Node("bool", {"v": True}), Node("float", {"v": 1.0})]
+
+    assert list(AttributeColumns(items).mask(Filter("v", 1, "=="))) == [True, False, False]
+    assert list(AttributeColumns(items).mask(Filter("v", True, "=="))) == [False, True, False]
+    assert list(AttributeColumns(items).mask(Filter("v", 1.0, "=="))) == [False, False, True]
+
+
+def test_int_columns_beyond_64_bits_are_compared_exactly():
+    items = [Node(str(i), {"v": v}) for i, v in enumerate([2 ** 64 + 1, 2 ** 64, 1])]
+
+    mask = AttributeColumns(items).mask(Filter("v", 2 ** 64, ">"))
+
+    assert mask is None or list(mask) == [True, False, False]
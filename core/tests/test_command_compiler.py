@@ -0,0 +1,27 @@
+from core.model.command import Command
+from core.model.command_compiler import CommandCompiler
+
+
+def test_parameters_are_bound_without_conversion():
+    prepared = CommandCompiler().compile("create node --id={id} --property rating={rating}")
+    assert prepared.parameters == ("id", "rating")
+    assert prepared.bind(id="7", rating="8") == {"id": "7", "properties": {"rating": "8"}}
+
+
+def test_unbound_placeholders_are_literal():
+    prepared = CommandCompiler().compile("create node --id=1 --property tag={x}")
+    assert prepared.command is Command.CREATE_NODE
+    assert prepared.bind() == {"id": 1, "properties": {"tag": "{x}"}}
+
+
+def test_escaped_placeholder_stays_literal_when_bound():
+    prepared = CommandCompiler().compile("edit node --id={id} --property tag={{id}}")
+    assert prepared.parameters == ("id",)
+    assert prepared.bind(id="a") == {"id": "a", "properties": {"tag": "{id}"}}
+
+
+def test_commands_differing_in_values_share_a_shape():
+    compiler = CommandCompiler()
+    compiler.compile("create edge --origin=1 --target=2")
+    compiler.compile("create edge --origin=3 --target=4")
+    assert compiler.cache_info()["shapes"]["hits"] == 1
@@ -0,0 +1,44 @@
+from api.model import Graph, Node
+from core.application import Application
+from core.model.workspace import Workspace
+from movies_json.plugin import MoviesDataSourcePlugin
+
+
+def _application():
+    app = Application()
+    ws = Workspace(MoviesDataSourcePlugin(), graph=Graph(nodes={Node("a", {}), Node("b", {})}))
+    app.workspaces.add(ws)
+    app.select_workspace(id=ws.id)
+    return app, ws
+
+
+def test_script_runs_as_one_update():
+    app, ws = _application()
+    results = app.execute_script("create node --id=c\ncreate edge --origin=a --target=c")
+    assert all(r["success"] for r in results)
+    assert ws.graph_reference.get_edge("a", "c") is not None
+
+
+def test_failing_command_rolls_the_script_back():
+    app, ws = _application()
+    results = app.execute_script(["create node --id=c", "create edge --origin=a --target=x", "create node --id=d"])
+
+    assert [r["success"] for r in results] == [False, False, False]
+    assert results[0]["rolled_back"]
+    assert "Missing nodes" in results[1]["output"]
+    assert results[2]["output"] == "Not executed"
+    assert ws.graph_reference.get_node("c") is None
+
+
+def test_script_refreshes_the_registry_after_the_batch(monkeypatch):
+    app, ws = _application()
+    refresh = app.workspaces.refresh
+    during_batch = []
+
+    def refreshing(workspace_id):
+        during_batch.append(ws.graph_reference._batch_depth > 0)
+        refresh(workspace_id)
+
+    monkeypatch.setattr(app.workspaces, "refresh", refreshing)
+    app.execute_script(["create node --id=c", "create node --id=d", "create node --id=e"])
+    assert during_batch and not any(during_batch)
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from core.concurrency import ReadWriteLock
+
+
+def _blocks(action, timeout=0.2):
+    """Whether action, run in another thread, is still waiting after timeout seconds."""
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (action(), done.set()), daemon=True)
+    thread.start()
+    return not done.wait(timeout), thread
+
+
+def test_writer_may_reenter_for_writing_and_reading():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+        # Still held after the nested blocks
+        blocked, thread = _blocks(lambda: (lock.acquire_read(), lock.release_read()))
+        assert blocked
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+def test_reader_may_nest_reads_while_a_writer_waits():
+    lock = ReadWriteLock()
+    with lock.read():
+        blocked, writer = _blocks(lambda: (lock.acquire_write(), lock.release_write()))
+        assert blocked
+        # A waiting writer blocks new readers, but not a thread that already reads
+        with lock.read():
+            pass
+    writer.join(1)
+    assert not writer.is_alive()
+
+
+def test_upgrading_a_read_raises():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    # The failed upgrade left the lock usable
+    with lock.write():
+        pass
+
+
+def test_try_acquire_write_fails_while_the_lock_is_held():
+    lock = ReadWriteLock()
+    with lock.read():
+        assert not lock.try_acquire_write()
+    with lock.write():
+        # Not even by the thread holding it
+        assert not lock.try_acquire_write()
+    assert lock.try_acquire_write()
+    lock.release_write()
+    with lock.read():
+        pass
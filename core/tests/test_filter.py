@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+
+from core.model.edge_filter import EdgeFilter
+from core.model.filter import Filter
+from core.model.filter_expression import parse_filter_expression
+
+
+@pytest.fixture
+def graph(make_graph):
+    return make_graph({"a": {"rating": 8, "title": "Alien", "released": date(1979, 5, 25)},
+                       "b": {"rating": 7, "title": "Aliens"}},
+                      {("a", "b"): {"weight": 0.5}})
+
+
+@pytest.mark.parametrize("value", [5, True, False, 0])
+def test_int_attribute_accepts_int_and_bool_values(value, graph):
+    filter_ = Filter("rating", value, ">=", graph)
+
+    assert filter_.value == value
+
+
+@pytest.mark.parametrize("attribute, value", [("rating", "8"), ("rating", 8.5),
+                                              ("title", 1), ("released", "1979-05-25")])
+def test_mismatched_value_type_is_rejected(attribute, value, graph):
+    with pytest.raises(TypeError, match=f"attribute '{attribute}'"):
+        Filter(attribute, value, "==", graph)
+
+
+def test_attributes_without_values_are_not_checked(graph):
+    assert Filter("unknown", "x", "==", graph).value == "x"
+    assert Filter("rating", None, "==", graph).value is None
+
+
+def test_check_follows_the_catalog_as_the_graph_changes(graph):
+    graph.update_node("a", {"rating": "high"})
+    graph.update_node("b", {"rating": "low"})
+
+    assert Filter("rating", "high", "==", graph).value == "high"
+    with pytest.raises(TypeError):
+        Filter("rating", 8, "==", graph)
+
+
+def test_edge_filters_check_the_edge_catalog(graph):
+    assert EdgeFilter("weight", 0.7, "<", graph).value == 0.7
+    with pytest.raises(TypeError):
+        EdgeFilter("weight", "heavy", "==", graph)
+    # Node attributes don't constrain edge filters
+    assert EdgeFilter("rating", "x", "==", graph).value == "x"
+
+
+def test_parsed_int_compares_with_float_attribute(graph):
+    filter_ = parse_filter_expression("edge.weight <= 1", graph)
+
+    assert filter_.value == 1.0 and type(filter_.value) is float
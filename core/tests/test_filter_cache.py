@@ -0,0 +1,55 @@
+import pytest
+
+from core.model.filter_cache import FilterResultCache
+from core.model.filter_expression import And, CompositeFilter, Or, parse_filter_expression
+
+
+@pytest.fixture
+def graph(make_graph):
+    # rating >= 8 keeps 1 node in 10; year < 1990 keeps 9 in 10; Drama 1 in 10
+    return make_graph({str(i): {"rating": 9 if i % 10 == 0 else 5,
+                                "year": 2000 if i % 10 == 1 else 1980,
+                                "genre": "Drama" if i % 10 == 2 else "Comedy"}
+                       for i in range(200)})
+
+
+def _stored(cache, graph):
+    return [key for key, _ in cache._graphs[graph].nodes.results]
+
+
+def test_single_composite_filter_is_planned(graph):
+    cache = FilterResultCache()
+    filter_ = parse_filter_expression("(genre == Drama or year < 1990) and rating >= 8", graph)
+
+    matched = cache.matching(graph, [filter_])
+
+    assert {n.id for n in matched} == {n.id for n in graph.nodes if filter_.apply(n)}
+    planned = [key for key in _stored(cache, graph) if isinstance(key, And)]
+    assert len(planned) == 1
+    first, second = planned[0].children
+    # The And rejects with the selective comparison first, the Or accepts with the broad one first
+    assert first.expression == "rating >= 8"
+    assert isinstance(second, Or)
+    assert [c.expression for c in second.children] == ["year < 1990", "genre == Drama"]
+
+
+def test_results_are_dropped_when_the_graph_changes(graph):
+    cache = FilterResultCache()
+    filter_ = parse_filter_expression("rating >= 8", graph)
+    assert len(cache.matching(graph, [filter_])) == 20
+
+    graph.update_node("1", {"rating": 10})
+
+    assert len(cache.matching(graph, [filter_])) == 21
+    hits = cache.hits
+    cache.matching(graph, [filter_])
+    assert cache.hits == hits + 1
+
+
+def test_composite_filters_must_define_expression():
+    class Xor(CompositeFilter):
+        def apply(self, comparable):
+            return sum(c.apply(comparable) for c in self.children) == 1
+
+    with pytest.raises(TypeError):
+        Xor([])
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from api.model import Edge, Node
+from core.service.persistence import dumps, event_to_record, loads, replay
+
+
+def _logged(recorder):
+    """The records of the recorded events, read back from JSON the way WorkspaceJournal logs them."""
+    return [loads(dumps(record)) for event in recorder.events for record in event_to_record(**event)]
+
+
+def _state(graph):
+    return ({n.id: n.data for n in graph.nodes},
+            {(e.origin.id, e.target.id): e.data for e in graph.edges})
+
+
+def test_replayed_log_reproduces_the_edits(graph, recorder, make_graph):
+    graph.add_node(Node("c", {"seen": datetime(2024, 5, 1, 12, 30)}))
+    graph.add_edge(Edge(graph.get_node("c"), Node("d", {"new": True}), {"kind": "x"}))
+    graph.update_node("a", {"rating": 2})
+    graph.update_edge("a", "b", {"w": 3})
+    with graph.batch():
+        graph.remove_edge("a", "b")
+        graph.remove_node("b")
+
+    copy, records = make_graph(), _logged(recorder)
+    count = replay(copy, records)
+
+    assert count == len(records)
+    assert _state(copy) == _state(graph)
+    assert copy.get_node("c").data["seen"] == datetime(2024, 5, 1, 12, 30)
+
+
+def test_clear_is_replayed(graph, recorder, make_graph):
+    graph.clear()
+    graph.add_node(Node("z", {}))
+
+    copy = make_graph()
+    replay(copy, _logged(recorder))
+
+    assert _state(copy) == ({"z": {}}, {})
+
+
+def test_records_that_no_longer_apply_are_skipped(graph):
+    records = [{"action": "update_node", "id": "gone", "properties": {"rating": 5}, "removed": []},
+               {"action": "add_node", "id": "c", "data": {}}]
+
+    assert replay(graph, records) == 1
+    assert graph.get_node("c") is not None
+
+
+def test_events_that_are_not_mutations_give_no_record():
+    assert event_to_record("select") == []
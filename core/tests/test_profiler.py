@@ -0,0 +1,17 @@
+import pytest
+
+from core import profiler
+
+
+@pytest.mark.parametrize("seconds, interval", [(float("nan"), 0.01), (0.05, float("nan")),
+                                               (0.05, float("inf")), (0.05, 0.0)])
+def test_bad_durations_are_rejected(seconds, interval):
+    with pytest.raises(ValueError):
+        profiler.profile(seconds, interval)
+
+
+def test_rejected_profile_leaves_the_profiler_usable():
+    with pytest.raises(ValueError):
+        profiler.profile(float("nan"), 0.01)
+    # A negative duration is clamped to a single sample
+    assert isinstance(profiler.profile(-1.0, 0.01, requests_only=False), str)
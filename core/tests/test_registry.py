@@ -0,0 +1,94 @@
+import threading
+
+from api.model import Graph, Node
+from core.model.registry import WorkspaceRegistry
+from core.model.workspace import Workspace
+from core.service import WorkspaceStore
+from movies_json.plugin import MoviesDataSourcePlugin
+
+
+def _workspace(plugin, name):
+    graph = Graph(nodes={Node(f"{name}-{i}", {"rating": i}) for i in range(10)})
+    return Workspace(plugin, name=name, graph=graph)
+
+
+def _registry(tmp_path, plugin, **kwargs):
+    return WorkspaceRegistry(store=WorkspaceStore(tmp_path),
+                             loader=lambda state: Workspace.from_snapshot(state, plugin), **kwargs)
+
+
+def test_least_recently_used_workspace_is_spilled_and_reloaded(tmp_path):
+    plugin = MoviesDataSourcePlugin()
+    registry = _registry(tmp_path, plugin, max_resident=2)
+    first, second, third = (_workspace(plugin, name) for name in ("first", "second", "third"))
+    registry.add(first)
+    first.graph_reference.update_node("first-1", {"rating": 99})
+    first.add_filter("rating >= 5")
+    registry.add(second)
+    registry.get(first.id)
+    registry.add(third)
+
+    assert [(e.name, e.resident) for e in registry.entries()] == [("first", True), ("second", False),
+                                                                  ("third", True)]
+    restored = registry.get(second.id)
+    assert restored is not second and restored.name == "second"
+    assert {n.id for n in restored.graph_reference.nodes} == {n.id for n in second.graph_reference.nodes}
+    # Reloading it spilled the least recently used one, first
+    assert [ws.name for ws in registry.resident()] == ["third", "second"]
+
+    restored = registry.get(first.id)
+    assert restored.graph_reference.get_node("first-1").data["rating"] == 99
+    assert {f.expression for f in restored.filters} == {"rating >= 5"}
+    assert len(restored.graph.nodes) == 6
+
+
+def test_listing_does_not_reload(tmp_path):
+    plugin = MoviesDataSourcePlugin()
+    registry = _registry(tmp_path, plugin, max_resident=1)
+    first, second = _workspace(plugin, "first"), _workspace(plugin, "second")
+    registry.add(first)
+    registry.add(second)
+
+    assert [e.resident for e in registry.entries()] == [False, True]
+    assert first.id in registry
+    assert [e.resident for e in registry.entries()] == [False, True]
+
+
+def test_workspace_being_written_is_not_evicted(tmp_path):
+    plugin = MoviesDataSourcePlugin()
+    registry = _registry(tmp_path, plugin, max_resident=1)
+    first, second = _workspace(plugin, "first"), _workspace(plugin, "second")
+    registry.add(first)
+    locked, go_on = threading.Event(), threading.Event()
+
+    def writer():
+        with registry.using(first.id) as ws, ws.lock.write():
+            locked.set()
+            go_on.wait(5)
+            ws.graph_reference.update_node("first-1", {"rating": 99})
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    assert locked.wait(5)
+    registry.add(second)
+    # Over the limit, but the only other workspace is busy
+    assert [e.resident for e in registry.entries()] == [True, True]
+    go_on.set()
+    thread.join(5)
+
+    registry.get(second.id)
+    assert [e.resident for e in registry.entries()] == [False, True]
+    assert registry.get(first.id).graph_reference.get_node("first-1").data["rating"] == 99
+
+
+def test_workspace_in_use_is_not_evicted(tmp_path):
+    plugin = MoviesDataSourcePlugin()
+    registry = _registry(tmp_path, plugin, max_resident=1)
+    first, second = _workspace(plugin, "first"), _workspace(plugin, "second")
+    registry.add(first)
+
+    with registry.using(first.id) as ws:
+        assert ws is first
+        registry.add(second)
+        assert registry.evict(first.id) is False
+    assert registry.evict(first.id) is True
@@ -0,0 +1,41 @@
+import json
+import shutil
+from pathlib import Path
+
+from core.application import Application
+from core.const import DATASOURCE_GROUP
+
+MOVIES = "movies_data_source_plugin"
+VISUALIZER = "simple_visualizer"
+DATA = Path(__file__).parents[2] / "data_source_plugin-movies" / "src" / "movies_json" / "data" / "movies.json"
+
+
+def _rate(path, rating):
+    data = json.loads(path.read_text())
+    data["nodes"][0]["rating"] = rating
+    path.write_text(json.dumps(data))
+
+
+def test_reload_diffs_are_dropped_once_every_workspace_has_them(tmp_path):
+    path = tmp_path / "movies.json"
+    shutil.copy(DATA, path)
+    app = Application(max_resident_workspaces=1, snapshot_dir=tmp_path / "snapshots")
+    plugin = app.service_plugin.get_plugin(DATASOURCE_GROUP, MOVIES)
+    plugin.load_data(file_path=str(path))
+    app.create_workspace(data_plugin=MOVIES, visualizer=VISUALIZER, workspace="first")
+    first = app.current_workspace()
+    app.create_workspace(data_plugin=MOVIES, visualizer=VISUALIZER, workspace="second")
+
+    _rate(path, 1.0)
+    assert app.reload_data_source(plugin) == 1
+    # The evicted first workspace doesn't have the diff yet
+    assert len(app._source_diffs[MOVIES]) == 1
+    _rate(path, 2.0)
+    app.reload_data_source(plugin)
+    assert len(app._source_diffs[MOVIES]) == 2
+
+    restored = app.get_workspace(first.id)
+    assert restored.graph_reference.get_node("film001").data["rating"] == 2.0
+    # Reloading it evicted the second one, which has every diff
+    assert app._source_diffs[MOVIES] == []
+    assert restored.source_version == 2
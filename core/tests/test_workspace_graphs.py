@@ -0,0 +1,50 @@
+from core.application import Application
+
+MOVIES = "movies_data_source_plugin"
+VISUALIZER = "simple_visualizer"
+
+
+def _create(app, name):
+    app.create_workspace(data_plugin=MOVIES, visualizer=VISUALIZER, workspace=name)
+    return app.current_workspace()
+
+
+def test_workspaces_of_one_data_source_own_their_graph():
+    app = Application()
+    first, second = _create(app, "first"), _create(app, "second")
+
+    assert first.graph_reference is not second.graph_reference
+    app.select_workspace(id=first.id)
+    app.create_node(id="only-first")
+    assert second.graph_reference.get_node("only-first") is None
+
+
+def test_evicted_workspace_comes_back_with_its_edits(tmp_path):
+    app = Application(max_resident_workspaces=1, snapshot_dir=tmp_path)
+    first = _create(app, "first")
+    app.create_node(id="edited")
+    second = _create(app, "second")
+
+    assert [e.resident for e in app.workspaces.entries()] == [False, True]
+    restored = app.get_workspace(first.id)
+    assert restored is not first
+    assert restored.graph_reference.get_node("edited") is not None
+    assert restored.graph_reference is not app.get_workspace(second.id).graph_reference
+
+
+def test_restart_restores_private_graphs(tmp_path):
+    app = Application(persist_dir=tmp_path)
+    edited, untouched = _create(app, "edited"), _create(app, "untouched")
+    app.select_workspace(id=edited.id)
+    app.create_node(id="logged")
+    app.edit_node(id="logged", properties={"rating": 3})
+
+    restarted = Application(persist_dir=tmp_path)
+    edited, untouched = restarted.get_workspace(edited.id), restarted.get_workspace(untouched.id)
+
+    assert edited.graph_reference.get_node("logged").data["rating"] == 3
+    assert untouched.graph_reference.get_node("logged") is None
+    assert edited.graph_reference is not untouched.graph_reference
+    restarted.select_workspace(id=untouched.id)
+    restarted.create_node(id="after-restart")
+    assert edited.graph_reference.get_node("after-restart") is None
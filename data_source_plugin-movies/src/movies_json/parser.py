@@ -1,38 +1,46 @@
-from typing import Dict, Set
+from typing import Dict, Set, Tuple, Iterable
 from api.model import Node, Edge
 
 
-def create_nodes(data: Dict, only_films: bool = False, min_rating: float = None) -> Set[Node]:
+def node_records(data: Dict, only_films: bool = False, min_rating: float = None) -> Dict[str, Dict]:
     """
-    Create Node objects from JSON.
+    Select the node records of the JSON to load, keyed by node id.
     """
-    nodes = set()
+    records = {}
     for node in data["nodes"]:
         if only_films and node.get("type") != "film":
             continue
         if min_rating and node.get("type") == "film" and node.get("rating", 0) < min_rating:
             continue
-
-        n = Node(id=node["id"], data=node)
-        nodes.add(n)
-    return nodes
+        records.setdefault(node["id"], node)
+    return records
 
 
-def create_edges(data: Dict, nodes: Set[Node], **kwargs) -> Set[Edge]:
+def edge_records(data: Dict, node_ids: Iterable[str]) -> Dict[Tuple[str, str], Dict]:
     """
-    Create Edge objects from JSON.
+    Build the edge data of the JSON edges between the given nodes, keyed by (from, to).
     """
-    edges = set()
-    node_dict = {n.id: n for n in nodes}
-
+    records = {}
     for edge in data["edges"]:
         source_id = edge["from"]
         target_id = edge["to"]
+        if source_id in node_ids and target_id in node_ids:
+            records.setdefault((source_id, target_id), {**edge, "type": edge.get("relationType")})
+    return records
+
+
+def create_nodes(data: Dict, only_films: bool = False, min_rating: float = None) -> Set[Node]:
+    """
+    Create Node objects from JSON.
+    """
+    return {Node(id=node_id, data=node)
+            for node_id, node in node_records(data, only_films, min_rating).items()}
 
-        if source_id in node_dict and target_id in node_dict:
-            source_node = node_dict[source_id]
-            target_node = node_dict[target_id]
-            e = Edge(source_node, target_node, data={**edge, "type": edge.get("relationType")})
-            edges.add(e)
 
-    return edges
+def create_edges(data: Dict, nodes: Set[Node], **kwargs) -> Set[Edge]:
+    """
+    Create Edge objects from JSON.
+    """
+    node_dict = {n.id: n for n in nodes}
+    return {Edge(node_dict[source_id], node_dict[target_id], data=edge)
+            for (source_id, target_id), edge in edge_records(data, node_dict).items()}
@@ -1,12 +1,14 @@
 import os
 import json
+import weakref
 from pathlib import Path
-from typing import Dict, Set, List
+from typing import Dict, Iterable, Set, List, Optional, Tuple, Union
 
-from api.model import Graph, Node, Edge
+from api.model import Graph, GraphDiff, Node, Edge
 from api.services import DataSourcePlugin
 
-from .parser import create_nodes, create_edges
+from .parser import node_records, edge_records
+from .query import MovieQuery
 from .utils import validate_json, cache_graph
 
 
@@ -26,6 +28,15 @@ class MoviesDataSourcePlugin(DataSourcePlugin):
     def __init__(self):
         # Cache for loaded graph
         self._graph_cache = None
+        # Query indexes per graph, with the graph version they were built at
+        self._queries: "weakref.WeakKeyDictionary[Graph, Tuple[int, MovieQuery]]" = weakref.WeakKeyDictionary()
+        # id of the node or edge set of each graph in _queries -> the graph, so the helpers
+        # given a graph's sets find its query in O(1) (see _query)
+        self._owners: Dict[int, "weakref.ref[Graph]"] = {}
+        # Path and options of the last load, with copies of the loaded records, for reload_data
+        self._source: Optional[tuple] = None
+        self._source_nodes: Dict[str, Dict] = {}
+        self._source_edges: Dict[tuple, Dict] = {}
 
     @cache_graph
     def load_data(self, file_path: str = None, **kwargs) -> Graph:
@@ -42,6 +53,29 @@ class MoviesDataSourcePlugin(DataSourcePlugin):
             plugin_dir = Path(__file__).parent
             file_path = plugin_dir / "data" / "movies_large.json"
 
+        self.report_progress(0.0, "Reading JSON file")
+        node_data, edge_data = self._read_records(file_path, **kwargs)
+        self._source = (str(file_path), kwargs)
+        self._source_nodes = {k: dict(v) for k, v in node_data.items()}
+        self._source_edges = {k: dict(v) for k, v in edge_data.items()}
+
+        # kreiranje grafa
+        self.report_progress(0.5, f"Creating {len(node_data)} nodes")
+        nodes = {node_id: Node(id=node_id, data=data) for node_id, data in node_data.items()}
+        self.report_progress(0.7, f"Creating {len(edge_data)} edges")
+        edges = {Edge(nodes[source_id], nodes[target_id], data=data)
+                 for (source_id, target_id), data in edge_data.items()}
+
+        self.report_progress(0.85, "Building graph")
+        graph = Graph(edges=edges, nodes=set(nodes.values()), directed=True)
+        # Lets the helpers given the graph's node and edge sets find it (see _query)
+        self._track(graph)
+        self.report_progress(1.0)
+        return graph
+
+    @staticmethod
+    def _read_records(file_path, **kwargs):
+        """Read and validate the JSON file; return its node and edge records."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"JSON data file not found: {file_path}")
 
@@ -51,93 +85,155 @@ class MoviesDataSourcePlugin(DataSourcePlugin):
         # validacija
         validate_json(data)
 
-        # kreiranje grafa
-        nodes = create_nodes(data, **kwargs)
-        edges = create_edges(data, nodes, **kwargs)
+        nodes = node_records(data, **kwargs)
+        return nodes, edge_records(data, nodes)
 
-        graph = Graph(edges=edges, nodes=nodes, directed=True)
-        return graph
+    def source_files(self) -> List[str]:
+        """
+        The JSON file of the last load, or nothing if no data was loaded yet.
+
+        :return: Paths of the source files
+        :rtype: List[str]
+        """
+        return [self._source[0]] if self._source is not None else []
+
+    def reload_data(self) -> Optional[GraphDiff]:
+        """
+        Re-read the JSON file of the last load and return what changed in it.
+
+        Records are compared with copies kept from the previous read, so edits made to
+        loaded graphs don't show up as changes. The cached graph is dropped: graphs
+        already handed out get the diff from the caller, later loads read the new file.
 
-    def get_top_rated_movies(self, nodes: Set["Node"], n: int = 5) -> List["Node"]:
+        :return: The changes, or None if no data was loaded yet
+        :rtype: Optional[GraphDiff]
+        """
+        if self._source is None:
+            return None
+        file_path, kwargs = self._source
+        node_data, edge_data = self._read_records(file_path, **kwargs)
+        diff = GraphDiff.between(self._source_nodes, node_data, self._source_edges, edge_data)
+        self._source_nodes = {k: dict(v) for k, v in node_data.items()}
+        self._source_edges = {k: dict(v) for k, v in edge_data.items()}
+        if diff:
+            self._graph_cache = None
+        return diff
+
+    def query(self, graph: Graph) -> MovieQuery:
+        """
+        Get an indexed query layer over the given graph.
+
+        The indexes are kept per graph and rebuilt when the graph's version changes.
+
+        :param graph: Any graph, e.g. one returned by `load_data` or a workspace's copy.
+        :return: MovieQuery over the graph's nodes and edges.
+        :rtype: MovieQuery
+        """
+        version, query = self._queries.get(graph, (-1, None))
+        if query is None or version != graph.version:
+            query = MovieQuery(graph.nodes, graph.edges)
+            if graph not in self._queries:
+                self._track(graph)
+            self._queries[graph] = (graph.version, query)
+        return query
+
+    def _track(self, graph: Graph) -> None:
+        """Remember a graph, so that its node and edge sets lead back to it."""
+        keys = (id(graph.nodes), id(graph.edges))
+
+        def forget(_, owners=self._owners):
+            for key in keys:
+                owners.pop(key, None)
+
+        ref = weakref.ref(graph, forget)
+        for key in keys:
+            self._owners[key] = ref
+        self._queries.setdefault(graph, (-1, None))
+
+    def _query(self, nodes: Union[Graph, Set["Node"], None] = None,
+               edges: Optional[Set["Edge"]] = None) -> MovieQuery:
+        """
+        Return the query layer of the given graph, or of the graph owning the given sets,
+        from the cache of `query`. Sets of no graph seen by the plugin (loaded or queried)
+        are indexed as given, on every call.
+        """
+        if isinstance(nodes, Graph):
+            return self.query(nodes)
+        if isinstance(edges, Graph):
+            return self.query(edges)
+        ref = self._owners.get(id(nodes if nodes is not None else edges))
+        graph = ref() if ref is not None else None
+        if graph is not None and (nodes is None or graph.nodes is nodes) and (edges is None or graph.edges is edges):
+            return self.query(graph)
+        return MovieQuery(_items(nodes), _items(edges))
+
+    def get_top_rated_movies(self, nodes: Union[Graph, Set["Node"]], n: int = 5) -> List["Node"]:
         """
         Retrieve the top N movies ranked by rating.
 
-        :param nodes: Set of Node objects in the graph.
+        :param nodes: The graph, or the set of its nodes; a graph's query is cached (see `query`).
         :param n: Number of movies to return (default = 5).
         :return: List of Node objects representing the top-rated movies.
         :rtype: List[Node]
         """
-        films = [node for node in nodes if node.data.get("type") == "film"]
-        sorted_films = sorted(films, key=lambda f: f.data.get("rating", 0), reverse=True)
-        return sorted_films[:n]
+        return self._query(nodes).top_rated(n)
 
-    def get_movies_by_director(self, nodes: Set["Node"], edges: Set["Edge"], director_name: str) -> List["Node"]:
+    def get_movies_by_director(self, nodes: Union[Graph, Set["Node"]], edges: Optional[Set["Edge"]],
+                               director_name: str) -> List["Node"]:
         """
         Retrieve all movies directed by a given director.
 
-        :param nodes: Set of Node objects in the graph.
-        :param edges: Set of Edge objects in the graph.
+        :param nodes: The graph, or the set of its nodes; a graph's query is cached (see `query`).
+        :param edges: Set of Edge objects in the graph; None when a graph is given.
         :param director_name: Full name of the director.
         :return: List of Node objects representing movies directed by the specified director.
         :rtype: List[Node]
         """
-        director_nodes = [n for n in nodes if n.data.get("type") == "director" and n.data.get("name") == director_name]
-        if not director_nodes:
-            return []
-        director_id = director_nodes[0].id
-
-        directed_edges = [e for e in edges if e.origin.id == director_id and e.data.get("type") == "directed"]
-        return [e.target for e in directed_edges]
+        return self._query(nodes, edges).movies_by_director(director_name)
 
-    def get_filmography(self, nodes: Set["Node"], edges: Set["Edge"], actor_name: str) -> List["Node"]:
+    def get_filmography(self, nodes: Union[Graph, Set["Node"]], edges: Optional[Set["Edge"]],
+                        actor_name: str) -> List["Node"]:
         """
         Retrieve all movies an actor has played in.
 
-        :param nodes: Set of Node objects in the graph.
-        :param edges: Set of Edge objects in the graph.
+        :param nodes: The graph, or the set of its nodes; a graph's query is cached (see `query`).
+        :param edges: Set of Edge objects in the graph; None when a graph is given.
         :param actor_name: Full name of the actor.
         :return: List of Node objects representing movies the actor starred in.
         :rtype: List[Node]
         """
-        actor_nodes = [n for n in nodes if n.data.get("type") == "actor" and n.data.get("name") == actor_name]
-        if not actor_nodes:
-            return []
-        actor_id = actor_nodes[0].id
-
-        acted_in_edges = [e for e in edges if e.origin.id == actor_id and e.data.get("type") == "acted_in"]
-        return [e.target for e in acted_in_edges]
+        return self._query(nodes, edges).filmography(actor_name)
 
-    def get_sequels(self, edges: Set["Edge"], film_id: str) -> List["Node"]:
+    def get_sequels(self, edges: Union[Graph, Set["Edge"]], film_id: str) -> List["Node"]:
         """
         Retrieve all sequels of a given film.
 
-        :param edges: Set of Edge objects in the graph.
+        :param edges: The graph, or the set of its edges; a graph's query is cached (see `query`).
         :param film_id: Unique identifier of the film node.
         :return: List of Node objects representing sequel movies.
         :rtype: List[Node]
         """
-        return [e.target for e in edges if e.origin.id == film_id and e.data.get("type") == "sequel_of"]
+        return self._query(edges=edges).sequels(film_id)
 
-    def get_movies_by_studio(self, nodes: Set["Node"], edges: Set["Edge"], studio_name: str) -> List["Node"]:
+    def get_movies_by_studio(self, nodes: Union[Graph, Set["Node"]], edges: Optional[Set["Edge"]],
+                             studio_name: str) -> List["Node"]:
         """
         Retrieve all movies produced by a given studio.
 
-        :param nodes: Set of Node objects in the graph.
-        :param edges: Set of Edge objects in the graph.
+        :param nodes: The graph, or the set of its nodes; a graph's query is cached (see `query`).
+        :param edges: Set of Edge objects in the graph; None when a graph is given.
         :param studio_name: Name of the studio.
         :return: List of Node objects representing movies produced by the specified studio.
         :rtype: List[Node]
         """
-        studio_nodes = [n for n in nodes if n.data.get("type") == "studio" and n.data.get("name") == studio_name]
-        if not studio_nodes:
-            return []
-        studio_id = studio_nodes[0].id
-
-        produced_edges = [e for e in edges if e.target.id == studio_id and e.data.get("type") == "produced_by"]
-        return [e.origin for e in produced_edges]
+        return self._query(nodes, edges).movies_by_studio(studio_name)
 
     def name(self) -> str:
         return "Movies Data Source Plugin"
 
     def identifier(self) -> str:
         return "movies_data_source_plugin"
+
+
+def _items(collection: Optional[Iterable]) -> Iterable:
+    return collection if collection is not None else ()
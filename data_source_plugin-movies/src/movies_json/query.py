@@ -0,0 +1,119 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from api.model import Node, Edge
+
+
+class MovieQuery(object):
+    """
+    Indexed query layer over the nodes and edges of a movie graph.
+
+    Indexes are built once, in a single pass over the collections:
+    - (type, name) -> node, for actors, directors and studios
+    - (origin id, relation type) -> edges
+    - (target id, relation type) -> edges
+    - film nodes, for heap-based top-k selection by rating
+
+    After that every lookup costs O(result size).
+    """
+
+    def __init__(self, nodes: Iterable[Node], edges: Iterable[Edge]):
+        """
+        Build the indexes for the given nodes and edges.
+
+        :param nodes: Nodes of the graph.
+        :param edges: Edges of the graph.
+        """
+        self._by_type_name: Dict[Tuple[str, str], Node] = {}
+        self._films: List[Node] = []
+        self._outgoing: Dict[Tuple[str, str], List[Edge]] = defaultdict(list)
+        self._incoming: Dict[Tuple[str, str], List[Edge]] = defaultdict(list)
+        # Largest top-k computed so far, reused for any smaller k
+        self._top_rated: List[Node] = []
+
+        for node in nodes:
+            node_type = node.data.get("type")
+            if node_type == "film":
+                self._films.append(node)
+            name = node.data.get("name")
+            if name is not None:
+                # Keep the first match, like the linear scans did
+                self._by_type_name.setdefault((node_type, name), node)
+
+        for edge in edges:
+            relation = edge.data.get("type")
+            self._outgoing[(edge.origin.id, relation)].append(edge)
+            self._incoming[(edge.target.id, relation)].append(edge)
+
+    def find_node(self, node_type: str, name: str) -> Optional[Node]:
+        """
+        Find a node by its type and name.
+
+        :param node_type: Node type (e.g. "actor", "director", "studio").
+        :param name: Value of the node's "name" attribute.
+        :return: The matching node, or None if there is none.
+        :rtype: Optional[Node]
+        """
+        return self._by_type_name.get((node_type, name))
+
+    def outgoing(self, node_id: str, relation: str) -> List[Edge]:
+        """
+        Get edges of the given relation type leaving a node.
+
+        :param node_id: Identifier of the origin node.
+        :param relation: Relation type (e.g. "acted_in").
+        :return: List of matching edges.
+        :rtype: List[Edge]
+        """
+        return self._outgoing.get((node_id, relation), [])
+
+    def incoming(self, node_id: str, relation: str) -> List[Edge]:
+        """
+        Get edges of the given relation type entering a node.
+
+        :param node_id: Identifier of the target node.
+        :param relation: Relation type (e.g. "produced_by").
+        :return: List of matching edges.
+        :rtype: List[Edge]
+        """
+        return self._incoming.get((node_id, relation), [])
+
+    def top_rated(self, n: int = 5) -> List[Node]:
+        """
+        Get the N best rated films.
+
+        :param n: Number of films to return.
+        :return: Films ordered by rating, best first.
+        :rtype: List[Node]
+        """
+        if n <= 0:
+            return []
+        if n > len(self._top_rated) and len(self._top_rated) < len(self._films):
+            self._top_rated = heapq.nlargest(n, self._films, key=lambda f: f.data.get("rating", 0))
+        return self._top_rated[:n]
+
+    def movies_by_director(self, director_name: str) -> List[Node]:
+        """Films directed by the named director."""
+        director = self.find_node("director", director_name)
+        if director is None:
+            return []
+        return [e.target for e in self.outgoing(director.id, "directed")]
+
+    def filmography(self, actor_name: str) -> List[Node]:
+        """Films the named actor has played in."""
+        actor = self.find_node("actor", actor_name)
+        if actor is None:
+            return []
+        return [e.target for e in self.outgoing(actor.id, "acted_in")]
+
+    def sequels(self, film_id: str) -> List[Node]:
+        """Sequels of the film with the given identifier."""
+        return [e.target for e in self.outgoing(film_id, "sequel_of")]
+
+    def movies_by_studio(self, studio_name: str) -> List[Node]:
+        """Films produced by the named studio."""
+        studio = self.find_node("studio", studio_name)
+        if studio is None:
+            return []
+        return [e.origin for e in self.incoming(studio.id, "produced_by")]
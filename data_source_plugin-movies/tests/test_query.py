@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from api.model import Edge, Graph, Node
+from movies_json.plugin import MoviesDataSourcePlugin
+from movies_json.query import MovieQuery
+
+MOVIES = Path(__file__).parent.parent / "src" / "movies_json" / "data" / "movies.json"
+
+
+def _films(*ratings):
+    return [Node(f"f{i}", {"type": "film", "rating": rating}) for i, rating in enumerate(ratings)]
+
+
+def test_top_rated_follows_updates_that_keep_the_size():
+    plugin = MoviesDataSourcePlugin()
+    graph = plugin.load_data(MOVIES)
+    top = plugin.get_top_rated_movies(graph.nodes, 3)
+    worst = min((n for n in graph.nodes if n.data.get("type") == "film"),
+                key=lambda n: n.data.get("rating", 0))
+
+    graph.update_node(worst.id, {"rating": 99.0})
+
+    assert plugin.get_top_rated_movies(graph.nodes, 3) == [worst] + top[:2]
+
+
+def test_queries_are_kept_per_graph():
+    plugin = MoviesDataSourcePlugin()
+    first, second = Graph(nodes=set(_films(1.0, 2.0))), Graph(nodes=set(_films(5.0, 3.0)))
+
+    assert [n.data["rating"] for n in plugin.query(first).top_rated(2)] == [2.0, 1.0]
+    assert [n.data["rating"] for n in plugin.query(second).top_rated(2)] == [5.0, 3.0]
+    assert plugin.query(first) is plugin.query(first)
+
+
+def test_sequels_use_the_edges_given():
+    plugin = MoviesDataSourcePlugin()
+    graph = plugin.load_data(MOVIES)
+    plugin.get_top_rated_movies(graph.nodes, 1)
+    first, sequel = _films(1.0, 2.0)
+    edges = {Edge(sequel, first, {"type": "sequel_of"})}
+
+    # Unknown edges are not paired with the index of the loaded graph
+    assert plugin.get_sequels(edges, sequel.id) == [first]
+
+
+def test_helpers_reuse_the_index_of_a_copied_graph(monkeypatch):
+    plugin = MoviesDataSourcePlugin()
+    copy = plugin.load_data(MOVIES).deep_copy()
+    built = []
+    original = MovieQuery.__init__
+
+    def counting(self, nodes, edges):
+        built.append(self)
+        original(self, nodes, edges)
+    monkeypatch.setattr(MovieQuery, "__init__", counting)
+
+    for _ in range(5):
+        top = plugin.get_top_rated_movies(copy, 3)
+        plugin.get_sequels(copy, top[0].id)
+    for _ in range(5):
+        # Once the plugin has seen the graph, its sets lead back to it
+        plugin.get_top_rated_movies(copy.nodes, 3)
+        plugin.get_filmography(copy.nodes, copy.edges, "Nobody")
+    assert len(built) == 1
+
+    copy.update_node(top[-1].id, {"rating": 99.0})
+    assert plugin.get_top_rated_movies(copy.nodes, 1) == [copy.get_node(top[-1].id)]
+    assert len(built) == 2
@@ -1,10 +1,10 @@
 import os
 from pathlib import Path
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set, Tuple
 from rdflib import Graph as RDFGraph, Namespace, URIRef, Literal
 from rdflib.namespace import FOAF, XSD
 
-from api.model import Node, Edge, Graph
+from api.model import Node, Edge, Graph, GraphDiff
 from api.services import DataSourcePlugin
 
 
@@ -24,6 +24,10 @@ class PackagesDataSourcePlugin(DataSourcePlugin):
         
         # Cache for loaded data
         self._graph_cache = None
+        # Path of the last load and copies of its records, for reload_data
+        self._source_path: Optional[str] = None
+        self._source_nodes: Dict[str, Dict] = {}
+        self._source_edges: Dict[Tuple[str, str], Dict] = {}
 
     def load_data(self, file_path: str = None, **kwargs) -> Graph:
         """
@@ -44,17 +48,57 @@ class PackagesDataSourcePlugin(DataSourcePlugin):
             raise FileNotFoundError(f"RDF data file not found: {file_path}")
         
         # Load and parse RDF data
+        self.report_progress(0.0, "Parsing RDF file")
         rdf_graph = RDFGraph()
         rdf_graph.parse(file_path, format="turtle")
         
         # Create nodes and edges
+        self.report_progress(0.6, f"Creating nodes from {len(rdf_graph)} triples")
         nodes = self._create_nodes(rdf_graph)
+        self.report_progress(0.75, f"Creating edges between {len(nodes)} packages")
         edges = self._create_edges(rdf_graph, nodes)
-        
+
+        self._source_path = str(file_path)
+        self._source_nodes, self._source_edges = self._records(nodes, edges)
+
         # Create and return the graph
+        self.report_progress(0.9, "Building graph")
         graph = Graph(edges=edges, nodes=nodes, directed=True)
+        self.report_progress(1.0)
         return graph
 
+    @staticmethod
+    def _records(nodes: Set[Node], edges: Set[Edge]):
+        """Copy the data of nodes and edges, keyed by node id and edge endpoints."""
+        return ({node.id: dict(node.data) for node in nodes},
+                {(edge.origin.id, edge.target.id): dict(edge.data) for edge in edges})
+
+    def source_files(self) -> List[str]:
+        """
+        The TTL file of the last load, or nothing if no data was loaded yet.
+
+        :return: Paths of the source files
+        :rtype: List[str]
+        """
+        return [self._source_path] if self._source_path is not None else []
+
+    def reload_data(self) -> Optional[GraphDiff]:
+        """
+        Re-parse the TTL file of the last load and return what changed in it.
+
+        :return: The changes, or None if no data was loaded yet
+        :rtype: Optional[GraphDiff]
+        """
+        if self._source_path is None:
+            return None
+        rdf_graph = RDFGraph()
+        rdf_graph.parse(self._source_path, format="turtle")
+        nodes = self._create_nodes(rdf_graph)
+        node_data, edge_data = self._records(nodes, self._create_edges(rdf_graph, nodes))
+        diff = GraphDiff.between(self._source_nodes, node_data, self._source_edges, edge_data)
+        self._source_nodes, self._source_edges = node_data, edge_data
+        return diff
+
     def _create_nodes(self, rdf_graph: RDFGraph) -> Set[Node]:
         """
         Create Node objects from package data in the RDF graph.
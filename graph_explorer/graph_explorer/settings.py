@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from api.log import logging_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'graph_explorer_app.middleware.MetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'graph_explorer.urls'
@@ -121,3 +124,64 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Workspaces
+# Maximum number of workspaces kept in memory, and maximum estimated bytes they may
+# hold (None for no limit); beyond either, the least recently used ones are
+# snapshotted to WORKSPACE_SNAPSHOT_DIR and reloaded on access.
+
+WORKSPACE_MAX_RESIDENT = None
+
+WORKSPACE_MEMORY_BUDGET = 1024 * 1024 * 1024
+
+WORKSPACE_SNAPSHOT_DIR = BASE_DIR / 'workspace_snapshots'
+
+# Workspaces, graph edits and filters are kept in WORKSPACE_PERSIST_DIR across
+# restarts (None to keep nothing): a log of edits per workspace, compacted into a
+# snapshot every WORKSPACE_SNAPSHOT_EVERY edits.
+
+WORKSPACE_PERSIST_DIR = BASE_DIR / 'workspace_data'
+
+WORKSPACE_SNAPSHOT_EVERY = 1000
+
+# Workspaces are created by background jobs, WORKSPACE_JOB_WORKERS at a time; the
+# others wait in a queue.
+
+WORKSPACE_JOB_WORKERS = 1
+
+# Seconds between checks of the data source files (None to not watch them); changes
+# are applied to open workspaces as diffs, keeping their filters.
+
+DATA_SOURCE_POLL_INTERVAL = 2.0
+
+# Tracing
+# When enabled, request latencies per endpoint and the spans of filtering, plugin loading,
+# rendering and CLI commands are recorded into histograms, served in the Prometheus text
+# format at /metrics to the addresses in METRICS_ALLOWED_IPS.
+
+TRACING_ENABLED = True
+
+METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")
+
+# Logging
+# Levels of the api and core loggers, per module or package, from the SOK_LOG environment
+# variable, e.g. SOK_LOG="info,api.model.graph=debug" (WARNING by default). Hot-path
+# events such as node inserts are logged 1 in SOK_LOG_SAMPLE (100 by default).
+
+LOGGING = logging_config()
+
+# Profiling
+# When enabled, staff users can sample the stacks of the request threads for a few
+# seconds at /diagnostics/profile/?seconds=10 and get a collapsed-stack file for
+# flamegraph.pl or speedscope, with stacks labelled by workspace.
+
+PROFILER_ENABLED = False
+
+# Graph work of async views
+# Filtering, rendering and plugin loading run in a pool of GRAPH_WORKERS threads, off
+# the event loop. At most GRAPH_MAX_PENDING jobs wait or run at once; requests beyond
+# that get a 503.
+
+GRAPH_WORKERS = 4
+
+GRAPH_MAX_PENDING = 64
@@ -9,8 +9,12 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.apps import apps
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'graph_explorer.settings')
 
 application = get_wsgi_application()
+
+# Restore the workspaces and start the background services before the first request
+apps.get_app_config('graph_explorer_app').start()
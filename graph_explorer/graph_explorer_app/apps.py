@@ -1,10 +1,12 @@
-from typing import List
+import threading
 
 from django.apps import AppConfig
+from django.conf import settings
 
 from core.application import Application
+from core.executor import GraphExecutor, MAX_PENDING, MAX_WORKERS
 from core.model.command_processor import CommandProcessor
-from core.model.workspace import Workspace
+from core.model.registry import WorkspaceRegistry
 
 
 class GraphExplorerAppConfig(AppConfig):
@@ -12,10 +14,47 @@ class GraphExplorerAppConfig(AppConfig):
     name = 'graph_explorer_app'
 
     def ready(self):
-        self.app_core = Application()
+        # The application restores persisted workspaces and starts the source watcher and
+        # the job pool, so it is only built for a server (see start), not by manage.py
+        # commands such as check or migrate
+        self._start_lock = threading.Lock()
+        self._app_core: Application | None = None
+        self._executor: GraphExecutor | None = None
+
+    def start(self) -> None:
+        """Build the application and the graph executor, once; called by the WSGI and ASGI entry points."""
+        with self._start_lock:
+            if self._app_core is not None:
+                return
+            self._app_core = Application(
+                max_resident_workspaces=getattr(settings, "WORKSPACE_MAX_RESIDENT", None),
+                snapshot_dir=getattr(settings, "WORKSPACE_SNAPSHOT_DIR", None),
+                memory_budget=getattr(settings, "WORKSPACE_MEMORY_BUDGET", None),
+                persist_dir=getattr(settings, "WORKSPACE_PERSIST_DIR", None),
+                snapshot_every=getattr(settings, "WORKSPACE_SNAPSHOT_EVERY", 1000),
+                poll_interval=getattr(settings, "DATA_SOURCE_POLL_INTERVAL", None),
+                job_workers=getattr(settings, "WORKSPACE_JOB_WORKERS", 1),
+            )
+            self._executor = GraphExecutor(
+                max_workers=getattr(settings, "GRAPH_WORKERS", MAX_WORKERS),
+                max_pending=getattr(settings, "GRAPH_MAX_PENDING", MAX_PENDING),
+            )
+
+    @property
+    def app_core(self) -> Application:
+        """The application, started on first use when no entry point started it (e.g. in tests)."""
+        if self._app_core is None:
+            self.start()
+        return self._app_core
+
+    @property
+    def executor(self) -> GraphExecutor:
+        if self._executor is None:
+            self.start()
+        return self._executor
 
     @property
-    def workspaces(self) -> List[Workspace]:
+    def workspaces(self) -> WorkspaceRegistry:
         return self.app_core.workspaces
     @property
     def command_processor(self) -> CommandProcessor:
@@ -1,13 +1,16 @@
   let isGraphLoaded = false;
   const configuration = { attributes: true, childList: true, subtree: true };
 
+  // The visualizer may draw after the page loads (its shell and the graph are fetched):
+  // wait for the first drawing in the main view's svg
   const graphObserver = new MutationObserver(() => {
-    if (!isGraphLoaded) {
+    const mainSvg = document.querySelector("#main-canvas svg");
+    if (!isGraphLoaded && mainSvg && mainSvg.childElementCount > 0) {
       renderNewBirdView();
     }
   });
   window.onload = () => {
-    const mainCanvas = document.querySelector("#main-canvas svg");
+    const mainCanvas = document.getElementById("main-canvas");
     if (mainCanvas) {
       graphObserver.observe(mainCanvas, configuration);
     }
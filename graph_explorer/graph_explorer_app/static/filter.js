@@ -9,6 +9,8 @@ let APPLY_FILTER_URL = '';
 let REMOVE_FILTER_URL = '';
 let APPLY_SEARCH_URL = '';
 let REMOVE_SEARCH_URL = '';
+let AUTOCOMPLETE_FILTER_URL = '';
+let autocompleteTimer = null;
 
 /**
  * Initialize filter functionality
@@ -17,13 +19,15 @@ let REMOVE_SEARCH_URL = '';
  * @param {string} removeFilterUrl - URL for removing filters
  * @param {string} applySearchUrl - URL for applying searches
  * @param {string} removeSearchUrl - URL for removing searches
+ * @param {string} autocompleteFilterUrl - URL for filter query suggestions (optional)
  */
-function initializeFilters(csrfToken, applyFilterUrl, removeFilterUrl, applySearchUrl, removeSearchUrl) {
+function initializeFilters(csrfToken, applyFilterUrl, removeFilterUrl, applySearchUrl, removeSearchUrl, autocompleteFilterUrl) {
   CSRF_TOKEN = csrfToken;
   APPLY_FILTER_URL = applyFilterUrl;
   REMOVE_FILTER_URL = removeFilterUrl;
   APPLY_SEARCH_URL = applySearchUrl;
   REMOVE_SEARCH_URL = removeSearchUrl;
+  AUTOCOMPLETE_FILTER_URL = autocompleteFilterUrl || '';
   
   setupFilterEventListeners();
   loadExistingFilters();
@@ -38,6 +42,40 @@ function setupFilterEventListeners() {
   
   // Apply search button
   document.getElementById("applySearchBtn").addEventListener("click", applySearch);
+
+  // Suggest attributes, operators and values while typing a filter query
+  if (AUTOCOMPLETE_FILTER_URL) {
+    document.getElementById("filterQueryInput").addEventListener("input", () => {
+      clearTimeout(autocompleteTimer);
+      autocompleteTimer = setTimeout(suggestFilterCompletions, 150);
+    });
+  }
+}
+
+/**
+ * Fill the filter query's suggestion list with completions of the text typed so far
+ */
+function suggestFilterCompletions() {
+  const input = document.getElementById("filterQueryInput");
+  const text = input.value;
+
+  fetch(AUTOCOMPLETE_FILTER_URL + "?q=" + encodeURIComponent(text))
+  .then(response => response.json())
+  .then(data => {
+    if (input.value !== text) {
+      return;  // Outdated: the user kept typing
+    }
+    const head = text.slice(0, text.length - (data.prefix || "").length);
+    const separator = head && !/[\s(]$/.test(head) ? " " : "";
+    const list = document.getElementById("filterSuggestions");
+    list.innerHTML = "";
+    (data.suggestions || []).forEach(suggestion => {
+      const option = document.createElement("option");
+      option.value = head + separator + suggestion + " ";
+      list.appendChild(option);
+    });
+  })
+  .catch(error => console.error("Error:", error));
 }
 
 /**
@@ -0,0 +1,108 @@
+/**
+ * Decoder of the compact binary graph format (api.model.wire)
+ * Turns the payload of graph-data/?format=binary into {directed, nodes, edges}
+ */
+
+const GRAPH_WIRE_MAGIC = "SOKG";
+const GRAPH_WIRE_VERSION = 1;
+const GRAPH_WIRE_CONTENT_TYPE = "application/vnd.sok.graph";
+
+// Column value types
+const WIRE_FLOAT64 = 1;
+const WIRE_INT32 = 2;
+const WIRE_BOOL = 3;
+const WIRE_STRING = 4;
+const WIRE_JSON = 5;
+
+/**
+ * Decode an encoded graph
+ * @param {ArrayBuffer} buffer - The payload
+ * @returns {{directed: boolean, nodes: Array<{id: string, data: Object}>, edges: Array<{from: string, to: string, data: Object}>}}
+ */
+function decodeGraph(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== GRAPH_WIRE_MAGIC || view.getUint8(4) !== GRAPH_WIRE_VERSION) {
+    throw new Error("Not an encoded graph, or an unsupported version");
+  }
+  const directed = (view.getUint8(5) & 1) === 1;
+  const stringCount = view.getUint32(8, true);
+  const nodeCount = view.getUint32(12, true);
+  const edgeCount = view.getUint32(16, true);
+  const columnCount = view.getUint32(20, true);
+  let position = 24;
+
+  // Arrays start on 8-byte boundaries, so they are views on the buffer, not copies
+  function take(ArrayType, count) {
+    const items = new ArrayType(buffer, position, count);
+    const size = items.byteLength;
+    position += size + ((8 - size % 8) % 8);
+    return items;
+  }
+
+  const offsets = take(Uint32Array, stringCount + 1);
+  const blob = new Uint8Array(buffer, position, offsets[stringCount]);
+  position += offsets[stringCount] + ((8 - offsets[stringCount] % 8) % 8);
+  const decoder = new TextDecoder();
+  const text = decoder.decode(blob);
+  // Pure ASCII: byte offsets are character offsets, so one decode serves all strings
+  const ascii = text.length === blob.length;
+  const strings = new Array(stringCount);
+  for (let i = 0; i < stringCount; i++) {
+    strings[i] = ascii ? text.slice(offsets[i], offsets[i + 1])
+      : decoder.decode(blob.subarray(offsets[i], offsets[i + 1]));
+  }
+
+  const nodeIds = take(Uint32Array, nodeCount);
+  const nodes = new Array(nodeCount);
+  for (let i = 0; i < nodeCount; i++) {
+    nodes[i] = {id: strings[nodeIds[i]], data: {}};
+  }
+  const origins = take(Uint32Array, edgeCount);
+  const targets = take(Uint32Array, edgeCount);
+  const edges = new Array(edgeCount);
+  for (let i = 0; i < edgeCount; i++) {
+    edges[i] = {from: nodes[origins[i]].id, to: nodes[targets[i]].id, data: {}};
+  }
+
+  const arrayTypes = {
+    [WIRE_FLOAT64]: Float64Array, [WIRE_INT32]: Int32Array, [WIRE_BOOL]: Uint8Array,
+    [WIRE_STRING]: Uint32Array, [WIRE_JSON]: Uint32Array
+  };
+  for (let c = 0; c < columnCount; c++) {
+    const key = strings[view.getUint32(position, true)];
+    const items = view.getUint8(position + 4) === 0 ? nodes : edges;
+    const kind = view.getUint8(position + 5);
+    const count = view.getUint32(position + 8, true);
+    position += 16;
+    const bitmap = take(Uint8Array, Math.ceil(items.length / 8));
+    const values = take(arrayTypes[kind], count);
+    let next = 0;
+    for (let row = 0; row < items.length; row++) {
+      if (bitmap[row >> 3] & (1 << (row & 7))) {
+        const value = values[next++];
+        items[row].data[key] = kind === WIRE_BOOL ? value === 1
+          : kind === WIRE_STRING ? strings[value]
+          : kind === WIRE_JSON ? JSON.parse(strings[value])
+          : value;
+      }
+    }
+  }
+  return {directed, nodes, edges};
+}
+
+/**
+ * Fetch a graph in the binary format, falling back to JSON if the server sends JSON
+ * @param {string} url - URL of the graph data (graph-data/)
+ * @returns {Promise<Object>} The decoded graph
+ */
+async function fetchGraph(url) {
+  const response = await fetch(url, {headers: {"Accept": GRAPH_WIRE_CONTENT_TYPE + ", application/json;q=0.5"}});
+  if (!response.ok) {
+    throw new Error(`Loading the graph failed: ${response.status}`);
+  }
+  if ((response.headers.get("Content-Type") || "").startsWith(GRAPH_WIRE_CONTENT_TYPE)) {
+    return decodeGraph(await response.arrayBuffer());
+  }
+  return response.json();
+}
@@ -1,3 +1,25 @@
-from django.test import TestCase
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+
+class StartupTests(SimpleTestCase):
+    def test_management_commands_do_not_start_the_application(self):
+        config = apps.get_app_config("graph_explorer_app")
+        call_command("check", verbosity=0)
+        self.assertIsNone(config._app_core)
+        self.assertIsNone(config._executor)
+
+
+@override_settings(PROFILER_ENABLED=True)
+class ProfileViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("admin", is_staff=True))
+
+    def test_non_finite_durations_are_rejected(self):
+        for query in ("seconds=nan", "seconds=inf", "interval=nan", "interval=inf"):
+            with self.subTest(query=query):
+                response = self.client.get(f"{reverse('profile')}?{query}")
+                self.assertEqual(response.status_code, 400)
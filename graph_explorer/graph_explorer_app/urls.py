@@ -8,7 +8,17 @@ urlpatterns = [
     path("select-visualizer/", views.select_visualizer, name="select_visualizer"),
     path("apply-filter/", views.apply_filter, name="apply_filter"),
     path("remove-filter/", views.remove_filter, name="remove_filter"),
+    path("autocomplete-filter/", views.autocomplete_filter, name="autocomplete_filter"),
     path("apply-search/", views.apply_search, name="apply_search"),
     path("remove-search/", views.remove_search, name="remove_search"),
     path("execute-cli/", views.execute_cli_command, name="execute_cli_command"),
+    path("execute-cli-batch/", views.execute_cli_batch, name="execute_cli_batch"),
+    path("graph-data/", views.graph_data, name="graph_data"),
+    path("changes/", views.graph_changes, name="graph_changes"),
+    path("visualizers/<str:visualizer_id>/shell/", views.visualizer_shell, name="visualizer_shell"),
+    path("jobs/<str:job_id>/", views.job_status, name="job_status"),
+    path("jobs/<str:job_id>/events/", views.job_events, name="job_events"),
+    path("metrics", views.metrics, name="metrics"),
+    path("diagnostics/profile/", views.profile, name="profile"),
+    path("diagnostics/memory/", views.memory_usage, name="memory_usage"),
 ]
\ No newline at end of file
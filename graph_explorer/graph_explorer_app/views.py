@@ -1,121 +1,200 @@
+import asyncio
+import hashlib
+import math
 import random
+import time
+import uuid
+from functools import lru_cache, wraps
 from typing import List
 import json
 
-from api.model import Graph, Node, Edge
-from django.http import HttpResponse, JsonResponse
+from api import tracing
+from api.model import Graph, Node, Edge, wire
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
-from simple_visualizer.implementation import SimpleVisualizer
-from block_visualizer.block_visualizer import BlockVisualizer
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 
 from core.model.command_processor import Command
+from core.model.command_compiler import parse_value
 from core.model.filter import Filter
+from core.model.filter_expression import CompositeFilter, complete
 from core.model.search import Search
 from django.apps import apps
 
+from core import profiler
+from core.executor import ExecutorBusy
 from core.application import Application
 from api.services.visualizer import Visualizer
 
 
+# Nodes or edges serialized per chunk of a streamed graph
+STREAM_CHUNK = 2000
+# Seconds between checks of what is streamed as server-sent events (jobs, graph changes;
+# changes made in between are sent as one event), and between keepalive comments
+EVENTS_POLL_INTERVAL = 0.25
+EVENTS_KEEPALIVE = 15.0
+# Plugin group of the visualizers
+VISUALIZERS = "graph_explorer.visualizers"
+
+
+def _session_id(request) -> str:
+    """Identifier of the browser session; workspace selection and filters are scoped to it."""
+    session_id = request.session.get("sok_session_id")
+    if session_id is None:
+        session_id = uuid.uuid4().hex
+        request.session["sok_session_id"] = session_id
+    return session_id
+
+
+async def _asession_id(request) -> str:
+    """_session_id for async views."""
+    session_id = await request.session.aget("sok_session_id")
+    if session_id is None:
+        session_id = uuid.uuid4().hex
+        await request.session.aset("sok_session_id", session_id)
+    return session_id
+
+
+def _event(name: str, data, event_id=None) -> str:
+    """A server-sent event with JSON data"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _event_stream(events) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Don't let proxies such as nginx buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def offloaded(view):
+    """
+    Turn a sync view into an async one running it in the graph executor, so filtering,
+    rendering and plugin loading don't block the event loop. When the client disconnects,
+    a request whose job hasn't started yet is dropped; a full executor answers 503.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        executor = apps.get_app_config("graph_explorer_app").executor
+        try:
+            return await executor.run(view, request, *args, **kwargs)
+        except ExecutorBusy as e:
+            return JsonResponse({"error": f"Server busy, try again later ({e})"}, status=503)
+    return wrapper
+
+
+@offloaded
 def index(request):
     app_core = apps.get_app_config("graph_explorer_app").app_core
+    session_id = _session_id(request)
 
     context = {}
 
     # Current workspace (if any)
-    if getattr(app_core, "current_workspace_id", None):
-
-        current_ws = next(
-            filter(lambda ws: ws.id == app_core.current_workspace_id, app_core.workspaces),
-            None
-        )
-        if current_ws.visualizer_id:
-            visualizers : List[Visualizer] = app_core.service_plugin.get_plugins("graph_explorer.visualizers")
-            visualizer = next((v for v in visualizers if v.identifier() == current_ws.visualizer_id), None)
-
-            if visualizer:
-                context["graph_html"] = visualizer.display_graph(current_ws.graph)
-        data = {
-            "nodes": [{"id": str(n.id), "data": n.data} for n in current_ws.graph.nodes],
-            "edges": [{"from": str(e.origin.id), "to": str(e.target.id)} for e in current_ws.graph.edges],
-        }
-        context["graph_json"] = json.dumps(data)
+    current_ws = app_core.current_workspace(session_id)
+    if current_ws:
+        current_view = app_core.current_view(session_id)
+        if current_view.visualizer_id:
+            visualizer: Visualizer = app_core.service_plugin.get_plugin(VISUALIZERS, current_view.visualizer_id)
+            shell = visualizer.shell() if visualizer else None
+            if shell is not None:
+                # The page loads the shell, which draws the graph of graph_data
+                context["visualizer_shell_url"] = (reverse("visualizer_shell", args=[current_view.visualizer_id])
+                                                   + "?v=" + _shell_version(shell))
+            elif visualizer:
+                # Hold the read lock so CLI edits can't mutate nodes while they are serialized
+                with current_view.lock.read():
+                    context["graph_html"] = visualizer.display_graph(current_view.graph)
         context["current_workspace"] = current_ws
+        context["current_view"] = current_view
         # Separate filters and searches for template
-        if current_ws:
-            filters_list = []
-            searches_list = []
-            for item in current_ws.filters:
-                if isinstance(item, Search):
-                    searches_list.append(item)
-                elif isinstance(item, Filter):
-                    filters_list.append(item)
-            context["current_filters"] = filters_list
-            context["current_searches"] = searches_list
-        else:
-            context["current_filters"] = []
-            context["current_searches"] = []
-
-    # Pass all workspaces
-    context["workspaces"] = app_core.workspaces
-
-    # Pass plugin options
+        filters_list = []
+        searches_list = []
+        for item in list(current_view.filters):
+            if isinstance(item, Search):
+                searches_list.append(item)
+            elif isinstance(item, (Filter, CompositeFilter)):
+                filters_list.append(item)
+        context["current_filters"] = filters_list
+        context["current_searches"] = searches_list
+
+    # Pass all workspaces (listing entries doesn't reload evicted ones)
+    context["workspaces"] = app_core.workspaces.entries()
+    # Workspaces still being created in this session
+    context["pending_jobs"] = app_core.jobs.jobs(owner=session_id, pending=True)
+
+    # Pass plugin options (read from entry points, without importing the plugins)
     context["visualizer_plugins"] = [
-        {"id": p.__class__.__name__, "name": getattr(p, "name", p.__class__.__name__)}
-        for p in app_core.service_plugin.get_plugins("graph_explorer.visualizers")
+        {"id": p.class_name, "name": p.name}
+        for p in app_core.service_plugin.get_plugins(VISUALIZERS)
     ]
 
     context["data_plugins"] = [
-        {"id": p.__class__.__name__, "name": getattr(p, "name", p.__class__.__name__)}
+        {"id": p.class_name, "name": p.name}
         for p in app_core.service_plugin.get_plugins("sok.plugins.datasource")
     ]
 
-    return render(request, "index.html", context)
+    with tracing.span("view.render_template"):
+        return render(request, "index.html", context)
 
 
 @csrf_exempt
 def save_workspace(request):
+    """
+    Start creating a workspace in the background and return at once: the index shows its
+    progress. Clients asking for JSON get the job (202) to follow at job_status or job_events.
+    """
     app_config = apps.get_app_config("graph_explorer_app")
     app_core = app_config.app_core
     if request.method == "POST":
-        app_core.command_processor.execute(Command.CREATE_WORKSPACE,
-                                           workspace=request.POST.get("workspace"),
-                                           data_plugin=request.POST.get("data_plugin"),
-                                           visualizer=request.POST.get("visualizer"))
+        job = app_core.start_workspace_creation(data_plugin=request.POST.get("data_plugin"),
+                                                visualizer=request.POST.get("visualizer"),
+                                                workspace=request.POST.get("workspace"),
+                                                session=_session_id(request))
+        if "application/json" in request.headers.get("Accept", ""):
+            return JsonResponse(job.to_dict(), status=202)
         return redirect("index")
 
     return JsonResponse({"error": "Only POST allowed"}, status=405)
 
 
 @csrf_exempt
+@offloaded
 def select_workspace(request):
     app_core = apps.get_app_config("graph_explorer_app").app_core
     if request.method == "POST":
         ws_id = request.POST.get("workspace_id")
         if ws_id:
             ws_id = str(ws_id)
-            found = next((ws for ws in app_core.workspaces if ws.id == ws_id), None)
+            found = app_core.get_workspace(ws_id)
             if found:
-                app_core.current_workspace_id = ws_id
-                app_core.command_processor.execute(Command.SELECT_WORKSPACE,id=ws_id)
+                app_core.command_processor.execute(Command.SELECT_WORKSPACE, id=ws_id,
+                                                   session=_session_id(request))
         return redirect("index")
     return JsonResponse({"error": "Only POST allowed"}, status=405)
 
 
 @csrf_exempt
+@offloaded
 def select_visualizer(request):
     app_core = apps.get_app_config("graph_explorer_app").app_core
 
     if request.method == "POST":
         visualizer_id = request.POST.get("visualizer_id")
 
-        print(visualizer_id)
-
-        if app_core.current_workspace_id and visualizer_id:
+        if visualizer_id:
             app_core.command_processor.execute(
                 Command.SELECT_VISUALIZER,
-                visualizer=visualizer_id
+                visualizer=visualizer_id,
+                session=_session_id(request)
             )
 
         return redirect("index")
@@ -124,6 +203,7 @@ def select_visualizer(request):
 
 
 @csrf_exempt
+@offloaded
 def apply_filter(request):
     """Apply a filter to the current workspace using filter string"""
     app_core = apps.get_app_config("graph_explorer_app").app_core
@@ -137,26 +217,20 @@ def apply_filter(request):
                 return JsonResponse({"error": "Missing filter query"}, status=400)
 
             # Create and apply filter using the new string format
-            if app_core.current_workspace_id:
-                current_ws = next(
-                    (ws for ws in app_core.workspaces if ws.id == app_core.current_workspace_id),
-                    None
-                )
-
-                if current_ws:
-                    try:
-                        # Use the new decorator functionality - pass filter string directly
-                        current_ws.add_filter(filter_query)
-
-                        return JsonResponse({
-                            "success": True,
-                            "message": f"Filter applied: {filter_query}",
-                            "filter_query": filter_query
-                        })
-                    except (ValueError, TypeError) as e:
-                        return JsonResponse({"error": str(e)}, status=400)
-                else:
-                    return JsonResponse({"error": "No current workspace found"}, status=400)
+            current_view = app_core.current_view(_session_id(request))
+
+            if current_view:
+                try:
+                    # Use the new decorator functionality - pass filter string directly
+                    current_view.add_filter(filter_query)
+
+                    return JsonResponse({
+                        "success": True,
+                        "message": f"Filter applied: {filter_query}",
+                        "filter_query": filter_query
+                    })
+                except (ValueError, TypeError) as e:
+                    return JsonResponse({"error": str(e)}, status=400)
             else:
                 return JsonResponse({"error": "No workspace selected"}, status=400)
 
@@ -168,7 +242,20 @@ def apply_filter(request):
     return JsonResponse({"error": "Only POST allowed"}, status=405)
 
 
+def autocomplete_filter(request):
+    """Suggest how to continue the filter expression in ?q=, from the attribute statistics"""
+    app_core = apps.get_app_config("graph_explorer_app").app_core
+    current_view = app_core.current_view(_session_id(request))
+    if not current_view:
+        return JsonResponse({"kind": None, "prefix": "", "suggestions": []})
+
+    with current_view.lock.read():
+        result = complete(request.GET.get("q", ""), current_view.graph_reference)
+    return JsonResponse(result)
+
+
 @csrf_exempt
+@offloaded
 def remove_filter(request):
     """Remove a filter from the current workspace using filter string"""
     app_core = apps.get_app_config("graph_explorer_app").app_core
@@ -181,25 +268,19 @@ def remove_filter(request):
             if not filter_query:
                 return JsonResponse({"error": "Missing filter query"}, status=400)
 
-            if app_core.current_workspace_id:
-                current_ws = next(
-                    (ws for ws in app_core.workspaces if ws.id == app_core.current_workspace_id),
-                    None
-                )
-
-                if current_ws:
-                    try:
-                        # Use the new decorator functionality - pass filter string directly
-                        current_ws.remove_filter(filter_query)
-
-                        return JsonResponse({
-                            "success": True,
-                            "message": f"Filter removed: {filter_query}"
-                        })
-                    except ValueError as e:
-                        return JsonResponse({"error": str(e)}, status=400)
-                else:
-                    return JsonResponse({"error": "No current workspace found"}, status=400)
+            current_view = app_core.current_view(_session_id(request))
+
+            if current_view:
+                try:
+                    # Use the new decorator functionality - pass filter string directly
+                    current_view.remove_filter(filter_query)
+
+                    return JsonResponse({
+                        "success": True,
+                        "message": f"Filter removed: {filter_query}"
+                    })
+                except ValueError as e:
+                    return JsonResponse({"error": str(e)}, status=400)
             else:
                 return JsonResponse({"error": "No workspace selected"}, status=400)
 
@@ -212,6 +293,7 @@ def remove_filter(request):
 
 
 @csrf_exempt
+@offloaded
 def apply_search(request):
     """Apply a search filter to the current workspace"""
     app_core = apps.get_app_config("graph_explorer_app").app_core
@@ -224,44 +306,24 @@ def apply_search(request):
             if not search_value:
                 return JsonResponse({"error": "Missing search value"}, status=400)
 
-            # Convert value to appropriate type (same logic as filter)
-            try:
-                # Try to convert to int first
-                if search_value.isdigit() or (search_value.startswith('-') and search_value[1:].isdigit()):
-                    search_value = int(search_value)
-                # Try to convert to float
-                elif '.' in search_value:
-                    try:
-                        search_value = float(search_value)
-                    except ValueError:
-                        pass  # Keep as string
-                # Check for boolean values
-                elif search_value.lower() in ['true', 'false']:
-                    search_value = search_value.lower() == 'true'
-            except (ValueError, AttributeError):
-                pass  # Keep as string
+            # Convert value to appropriate type (same logic as the CLI)
+            search_value = parse_value(str(search_value))
 
             # Create and apply search
-            if app_core.current_workspace_id:
-                current_ws = next(
-                    (ws for ws in app_core.workspaces if ws.id == app_core.current_workspace_id),
-                    None
-                )
-
-                if current_ws:
-                    try:
-                        search_obj = Search(value=search_value)
-                        current_ws.add_search(search_obj)
-
-                        return JsonResponse({
-                            "success": True,
-                            "message": f"Search applied: {search_value}",
-                            "search_id": f"search_{search_value}"
-                        })
-                    except (ValueError, TypeError) as e:
-                        return JsonResponse({"error": str(e)}, status=400)
-                else:
-                    return JsonResponse({"error": "No current workspace found"}, status=400)
+            current_view = app_core.current_view(_session_id(request))
+
+            if current_view:
+                try:
+                    search_obj = Search(value=search_value)
+                    current_view.add_search(search_obj)
+
+                    return JsonResponse({
+                        "success": True,
+                        "message": f"Search applied: {search_value}",
+                        "search_id": f"search_{search_value}"
+                    })
+                except (ValueError, TypeError) as e:
+                    return JsonResponse({"error": str(e)}, status=400)
             else:
                 return JsonResponse({"error": "No workspace selected"}, status=400)
 
@@ -274,6 +336,7 @@ def apply_search(request):
 
 
 @csrf_exempt
+@offloaded
 def remove_search(request):
     """Remove a search filter from the current workspace"""
     app_core = apps.get_app_config("graph_explorer_app").app_core
@@ -287,38 +350,21 @@ def remove_search(request):
                 return JsonResponse({"error": "Missing search value"}, status=400)
 
             # Convert value to appropriate type (same logic as apply_search)
-            try:
-                if search_value.isdigit() or (search_value.startswith('-') and search_value[1:].isdigit()):
-                    search_value = int(search_value)
-                elif '.' in str(search_value):
-                    try:
-                        search_value = float(search_value)
-                    except ValueError:
-                        pass
-                elif str(search_value).lower() in ['true', 'false']:
-                    search_value = str(search_value).lower() == 'true'
-            except (ValueError, AttributeError):
-                pass
-
-            if app_core.current_workspace_id:
-                current_ws = next(
-                    (ws for ws in app_core.workspaces if ws.id == app_core.current_workspace_id),
-                    None
-                )
-
-                if current_ws:
-                    try:
-                        search_obj = Search(value=search_value)
-                        current_ws.remove_search(search_obj)
-
-                        return JsonResponse({
-                            "success": True,
-                            "message": f"Search removed: {search_value}"
-                        })
-                    except ValueError as e:
-                        return JsonResponse({"error": str(e)}, status=400)
-                else:
-                    return JsonResponse({"error": "No current workspace found"}, status=400)
+            search_value = parse_value(str(search_value))
+
+            current_view = app_core.current_view(_session_id(request))
+
+            if current_view:
+                try:
+                    search_obj = Search(value=search_value)
+                    current_view.remove_search(search_obj)
+
+                    return JsonResponse({
+                        "success": True,
+                        "message": f"Search removed: {search_value}"
+                    })
+                except ValueError as e:
+                    return JsonResponse({"error": str(e)}, status=400)
             else:
                 return JsonResponse({"error": "No workspace selected"}, status=400)
 
@@ -330,85 +376,334 @@ def remove_search(request):
     return JsonResponse({"error": "Only POST allowed"}, status=405)
 
 
+# Commands after which the client should re-fetch the graph
+REFRESHING_COMMANDS = {
+    Command.CREATE_NODE, Command.DELETE_NODE,
+    Command.CREATE_EDGE, Command.DELETE_EDGE,
+    Command.EDIT_NODE, Command.EDIT_EDGE, Command.CLEAR_GRAPH,
+    Command.FILTER_GRAPH, Command.SEARCH_GRAPH,
+}
+
+
 @csrf_exempt
+@offloaded
 def execute_cli_command(request):
-    """Execute a CLI command in the backend and return the output"""
+    """Execute a CLI command in the backend and return the output.
+
+    The JSON body holds the "command" line and, optionally, "params" for its {name} placeholders.
+    """
     if request.method != "POST":
         return JsonResponse({"output": "Invalid request", "refresh_graph": False})
 
     try:
         data = json.loads(request.body)
         command_str = data.get("command", "").strip()
+        params = data.get("params") or {}
         app_core = apps.get_app_config("graph_explorer_app").app_core
 
         if not command_str:
             return JsonResponse({"output": "No command provided", "refresh_graph": False})
 
-        def convert_value(value):
-            try:
-                if str(value).isdigit() or (str(value).startswith('-') and str(value)[1:].isdigit()):
-                    return int(value)
-                elif '.' in str(value):
-                    try:
-                        return float(value)
-                    except ValueError:
-                        pass
-                elif str(value).lower() in ['true', 'false']:
-                    return str(value).lower() == 'true'
-            except (ValueError, AttributeError):
-                pass
-            return value
-
-        def get_current_workspace():
-            ws = next((ws for ws in app_core.workspaces if ws.id == app_core.current_workspace_id), None)
-            if not ws:
-                raise ValueError("No current workspace found")
-            return ws
-
-        tokens = command_str.split()
-        if not tokens:
-            return JsonResponse({"output": "Empty command", "refresh_graph": False})
-
-        cmd = tokens[0].lower()
-
-        if cmd == "search":
-            if len(tokens) < 2:
-                return JsonResponse({"output": "Missing search value", "refresh_graph": False})
-            value = convert_value(" ".join(tokens[1:]))
-            ws = get_current_workspace()
-            search_obj = Search(value=value)
-            ws.add_search(search_obj)
-            return JsonResponse({
-                "output": f"Search applied: {value}",
-                "refresh_graph": True,
-                "search_id": f"search_{value}"
-            })
-
-        elif cmd == "filter":
-            if len(tokens) < 4:
-                return JsonResponse({"output": "Missing field/operator/value for filter", "refresh_graph": False})
-            # Join all tokens after "filter" to create the filter string
-            filter_query = " ".join(tokens[1:])
-            ws = get_current_workspace()
-            # Use the new decorator functionality - pass filter string directly
-            ws.add_filter(filter_query)
-            return JsonResponse({
-                "output": f"Filter applied: {filter_query}",
-                "refresh_graph": True,
-                "filter_query": filter_query
-            })
+        try:
+            prepared = app_core.command_processor.prepare(command_str)
+            kwargs = prepared.bind(**params)
+        except ValueError as e:
+            return JsonResponse({"output": str(e), "refresh_graph": False})
+
+        output = app_core.command_processor.execute(prepared.command, session=_session_id(request), **kwargs)
+        response = {
+            "output": output,
+            "refresh_graph": prepared.command in REFRESHING_COMMANDS
+        }
+        if prepared.command is Command.SEARCH_GRAPH:
+            response["search_id"] = f"search_{kwargs['value']}"
+        elif prepared.command is Command.FILTER_GRAPH:
+            response["filter_query"] = kwargs["filter"]
+        return JsonResponse(response)
 
-        else:
-            output = app_core.command_processor.parse_and_execute(command_str)
-            refresh_graph = any(op in command_str for op in [
-                "create_node", "delete_node",
-                "create_edge", "delete_edge",
-                "edit_node", "edit_edge", "clear_graph"
-            ])
-            return JsonResponse({
-                "output": output,
-                "refresh_graph": refresh_graph
-            })
+    except Exception as e:
+        return JsonResponse({"output": str(e), "refresh_graph": False})
+
+
+@csrf_exempt
+@offloaded
+def execute_cli_batch(request):
+    """Execute a batch of CLI commands as one graph update and return per-command results.
+
+    Accepts a JSON body with either "script" (multi-line string, one command per line)
+    or "commands" (list of command strings).
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST allowed"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    script = data.get("commands", data.get("script"))
+    if not script or not isinstance(script, (str, list)):
+        return JsonResponse({"error": "Missing script or commands"}, status=400)
 
+    app_core = apps.get_app_config("graph_explorer_app").app_core
+    try:
+        results = app_core.command_processor.execute(Command.EXECUTE_SCRIPT, script=script,
+                                                     session=_session_id(request))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
     except Exception as e:
-        return JsonResponse({"output": str(e), "refresh_graph": False})
\ No newline at end of file
+        return JsonResponse({"error": str(e)}, status=500)
+
+    return JsonResponse({
+        "results": results,
+        "executed": len(results),
+        "failed": sum(1 for r in results if not r["success"]),
+        "refresh_graph": any(r["success"] for r in results)
+    })
+
+
+def _session_job(app_core: Application, job_id: str, session_id: str):
+    """The job with the given id if it belongs to the session, else 404"""
+    job = app_core.jobs.get(job_id)
+    if job is None or job.owner != session_id:
+        raise Http404("No such job")
+    return job
+
+
+def job_status(request, job_id):
+    """State and progress of a background job of this session, for polling"""
+    app_core = apps.get_app_config("graph_explorer_app").app_core
+    return JsonResponse(_session_job(app_core, job_id, _session_id(request)).to_dict())
+
+
+async def job_events(request, job_id):
+    """
+    Server-sent events with the state and progress of a background job of this session,
+    one `progress` event per change (changes between two checks are sent as one), until
+    the job finishes.
+    """
+    app_core = apps.get_app_config("graph_explorer_app").app_core
+    job = _session_job(app_core, job_id, await _asession_id(request))
+
+    async def events():
+        version = None
+        idle = 0.0
+        while True:
+            if job.version != version:
+                state = job.to_dict()
+                version = state["version"]
+                yield _event("progress", state, version)
+                if state["finished"]:
+                    return
+                idle = 0.0
+            elif idle >= EVENTS_KEEPALIVE:
+                yield ": keepalive\n\n"
+                idle = 0.0
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+            idle += EVENTS_POLL_INTERVAL
+
+    return _event_stream(events())
+
+
+def _workspace_feed(app_core: Application, session_id: str, workspace_id: str | None):
+    """Change feed of the given workspace, or of the session's current one"""
+    if workspace_id is None:
+        workspace_id = app_core.session(session_id).current_workspace_id
+    return app_core.change_feed(workspace_id) if workspace_id else None
+
+
+async def graph_changes(request):
+    """
+    Server-sent events with the changes made to the base graph of the session's workspace
+    (or ?workspace=<id>) by any session or data source reload, so open pages stay in sync:
+
+    - `changes`: {"version": n, "changes": [...]}, the changes since the previous event
+      coalesced per node and edge (see core.service.change_feed)
+    - `resync`: {"version": n}, the client fell behind or missed changes while
+      reconnecting and should fetch the whole graph (graph_data) again
+
+    Event ids are graph versions, so a reconnecting browser (Last-Event-ID) is told to
+    resync only if the graph changed meanwhile. Filters are not applied to the changes.
+    """
+    config = apps.get_app_config("graph_explorer_app")
+    session_id = await _asession_id(request)
+    try:
+        # May reload an evicted workspace
+        feed = await config.executor.run(_workspace_feed, config.app_core, session_id, request.GET.get("workspace"))
+    except ExecutorBusy as e:
+        return JsonResponse({"error": f"Server busy, try again later ({e})"}, status=503)
+    if feed is None:
+        raise Http404("No such workspace")
+    subscription = feed.subscribe()
+    last_seen = request.headers.get("Last-Event-ID")
+
+    async def events():
+        try:
+            if last_seen is not None and last_seen != str(subscription.version):
+                yield _event("resync", {"version": subscription.version}, subscription.version)
+            idle = 0.0
+            while not subscription.closed:
+                version, changes, resync = subscription.drain()
+                if resync:
+                    yield _event("resync", {"version": version}, version)
+                    idle = 0.0
+                elif changes:
+                    yield _event("changes", {"version": version, "changes": changes}, version)
+                    idle = 0.0
+                elif idle >= EVENTS_KEEPALIVE:
+                    yield ": keepalive\n\n"
+                    idle = 0.0
+                await asyncio.sleep(EVENTS_POLL_INTERVAL)
+                idle += EVENTS_POLL_INTERVAL
+        finally:
+            subscription.close()
+
+    return _event_stream(events())
+
+
+def metrics(request):
+    """Request and span latency histograms in the Prometheus text format, for local scrapers only"""
+    if request.META.get("REMOTE_ADDR") not in getattr(settings, "METRICS_ALLOWED_IPS", ("127.0.0.1", "::1")):
+        return HttpResponseForbidden("Metrics are only served locally")
+    return HttpResponse(tracing.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@staff_member_required
+def profile(request):
+    """
+    Sample the stacks of the threads serving requests for ?seconds= (default 5) every
+    ?interval= milliseconds (default 5), or of all threads with ?threads=all, and return
+    them as a collapsed-stack file for flamegraph.pl or speedscope. Enabled by PROFILER_ENABLED.
+    """
+    if not getattr(settings, "PROFILER_ENABLED", False):
+        raise Http404("Profiling is disabled")
+    try:
+        seconds = float(request.GET.get("seconds", 5))
+        interval = float(request.GET.get("interval", profiler.INTERVAL * 1000)) / 1000
+    except ValueError:
+        return JsonResponse({"error": "seconds and interval must be numbers"}, status=400)
+    if not (math.isfinite(seconds) and math.isfinite(interval)):
+        return JsonResponse({"error": "seconds and interval must be finite"}, status=400)
+    if interval <= 0:
+        return JsonResponse({"error": "interval must be positive"}, status=400)
+
+    try:
+        stacks = profiler.profile(seconds, interval, requests_only=request.GET.get("threads") != "all")
+    except RuntimeError as e:
+        return JsonResponse({"error": str(e)}, status=409)
+
+    response = HttpResponse(stacks, content_type="text/plain; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="profile-{time.strftime("%Y%m%d-%H%M%S")}.folded"'
+    return response
+
+
+@staff_member_required
+@offloaded
+def memory_usage(request):
+    """Workspaces sorted by measured memory, with a breakdown per part; JSON with ?format=json"""
+    app_core = apps.get_app_config("graph_explorer_app").app_core
+    workspaces = [{"id": entry.id, "name": entry.name, "resident": entry.resident, "usage": usage}
+                  for entry, usage in app_core.memory_usage()]
+    memory = app_core.workspaces.memory
+    estimate = {"total": memory.total(), "budget": memory.budget} if memory is not None else None
+    if request.GET.get("format") == "json":
+        return JsonResponse({"workspaces": workspaces, "estimate": estimate})
+    parts = list(workspaces[0]["usage"]) if workspaces and workspaces[0]["usage"] else []
+    for workspace in workspaces:
+        workspace["sizes"] = [workspace["usage"][part] for part in parts] if workspace["usage"] else []
+    return render(request, "memory.html", {"workspaces": workspaces, "parts": parts, "estimate": estimate})
+
+
+def _serialize_chunk(view, items, first: bool, edges: bool) -> str:
+    """JSON of a chunk of nodes or edges, preceded by a comma unless it is the first chunk"""
+    with view.lock.read():
+        if edges:
+            records = [{"from": str(e.origin.id), "to": str(e.target.id)} for e in items]
+        else:
+            records = [{"id": str(n.id), "data": n.data} for n in items]
+    text = json.dumps(records, default=str)[1:-1]
+    return text if first or not text else "," + text
+
+
+def _encode_graph(view, edge_data: bool) -> bytes:
+    with view.lock.read():
+        return wire.encode(view.graph, edge_data)
+
+
+@gzip_page
+async def graph_data(request):
+    """
+    Stream the current view's filtered graph as JSON ({"nodes": [...], "edges": [...]}),
+    serialized chunk by chunk in the graph executor; stops when the client disconnects.
+
+    With ?format=binary or an Accept header naming its type, the graph is sent in the
+    compact binary format of api.model.wire instead (decoded by static/graph-wire.js),
+    with the attributes of the edges if ?edge_data=1. Either is gzipped when the client
+    accepts it.
+    """
+    config = apps.get_app_config("graph_explorer_app")
+    session_id = await _asession_id(request)
+    try:
+        view = await config.executor.run(config.app_core.current_view, session_id)
+    except ExecutorBusy as e:
+        return JsonResponse({"error": f"Server busy, try again later ({e})"}, status=503)
+    if view is None:
+        return JsonResponse({"error": "No workspace selected"}, status=400)
+    if request.GET.get("format") == "binary" or wire.CONTENT_TYPE in request.headers.get("Accept", ""):
+        try:
+            payload = await config.executor.run(_encode_graph, view, request.GET.get("edge_data") == "1")
+        except ExecutorBusy as e:
+            return JsonResponse({"error": f"Server busy, try again later ({e})"}, status=503)
+        response = HttpResponse(payload, content_type=wire.CONTENT_TYPE)
+        patch_vary_headers(response, ("Accept",))
+        return response
+    # A snapshot: later changes replace the filtered graph instead of modifying it
+    graph = view.graph
+
+    async def chunks():
+        for key, items, edges in (("nodes", list(graph.nodes), False), ("edges", list(graph.edges), True)):
+            yield ('{"' if key == "nodes" else '], "') + key + '": ['
+            for start in range(0, len(items), STREAM_CHUNK):
+                yield await config.executor.run(_serialize_chunk, view, items[start:start + STREAM_CHUNK],
+                                                start == 0, edges)
+        yield "]}"
+
+    response = StreamingHttpResponse(chunks(), content_type="application/json")
+    patch_vary_headers(response, ("Accept",))
+    return response
+
+
+@lru_cache(maxsize=32)
+def _shell_version(shell: str) -> str:
+    """Version of a visualizer shell, for its URL and ETag"""
+    return hashlib.sha1(shell.encode("utf-8")).hexdigest()[:16]
+
+
+def _visualizer_shell(visualizer_id: str) -> str | None:
+    app_core = apps.get_app_config("graph_explorer_app").app_core
+    visualizer: Visualizer = app_core.service_plugin.get_plugin(VISUALIZERS, visualizer_id)
+    return visualizer.shell() if visualizer else None
+
+
+def _shell_etag(request, visualizer_id: str) -> str | None:
+    shell = _visualizer_shell(visualizer_id)
+    return _shell_version(shell) if shell is not None else None
+
+
+@gzip_page
+@condition(etag_func=_shell_etag)
+def visualizer_shell(request, visualizer_id):
+    """
+    The shell of a visualizer (see Visualizer.shell): the same for every graph, so browsers
+    keep it. Under the versioned URL given to the index (?v=) it never changes; otherwise
+    it is revalidated with its ETag.
+    """
+    shell = _visualizer_shell(visualizer_id)
+    if shell is None:
+        raise Http404("No such visualizer, or it has no shell")
+    response = HttpResponse(shell, content_type="text/html; charset=utf-8")
+    if request.GET.get("v") == _shell_version(shell):
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = "no-cache"
+    return response
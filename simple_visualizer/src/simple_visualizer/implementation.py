@@ -1,12 +1,10 @@
 import os.path
 from abc import ABC
-from datetime import datetime
 
 from django.views import View
 from jinja2 import Environment, FileSystemLoader
 from api.model.graph import Graph
-from api.services.visualizer import Visualizer
-from serializer import serialize
+from api.services.visualizer import GRAPH_DATA_ELEMENT, Visualizer, graph_data_script
 
 
 class SimpleVisualizer(Visualizer,ABC):
@@ -16,8 +14,9 @@ class SimpleVisualizer(Visualizer,ABC):
         env = Environment(
             loader = FileSystemLoader(template_path + "/template"),
         )
-        env.filters['serializeToJson'] = serialize
         self.template = env.get_template('simple-visualizer.html')
+        # The template doesn't depend on the graph: render it once
+        self._shell = self.template.render(data_element=GRAPH_DATA_ELEMENT)
     def identifier(self):
         return "simple_visualizer"
 
@@ -25,8 +24,10 @@ class SimpleVisualizer(Visualizer,ABC):
         """Implementation of the abstract method"""
         return "Simple Visualizer"
 
+    def shell(self):
+        """The rendered template, drawing the graph it is given (see Visualizer.shell)"""
+        return self._shell
+
     def display_graph(self,graph : Graph,**kwargs):
-        """Display function"""
-        nodes_list = [{"id": n.id, "data": n.data} for n in graph.nodes]
-        edges_list = [{"from": e.origin.id, "to": e.target.id} for e in graph.edges]
-        return self.template.render(nodes=nodes_list,edges=edges_list,directed=graph.is_directed())
\ No newline at end of file
+        """Display function: the shell, after the graph as a data block"""
+        return graph_data_script(graph) + self._shell
@@ -1,4 +0,0 @@
-import json
-
-def serialize(obj):
-    return json.dumps(obj)
\ No newline at end of file